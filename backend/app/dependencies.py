@@ -0,0 +1,65 @@
+"""
+Services partagés par les routeurs de l'API
+
+Chaque service est construit au premier appel, c'est-à-dire à l'import du
+premier routeur monté qui l'utilise : un déploiement qui ne monte que le
+routeur des feedbacks (API_ROUTERS=feedback) n'importe ni TensorFlow, ni le
+client LLM, ni le catalogue des plantes.
+"""
+
+import asyncio
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def get_upload_service():
+    """Lecture par blocs et validation des images (MAX_UPLOAD_BYTES, MAX_IMAGE_PIXELS)"""
+    from app.services.upload_service import UploadService
+    return UploadService()
+
+
+@lru_cache(maxsize=None)
+def get_vision_service():
+    """Service de vision ; le modèle est chargé au préchauffage ou à la première identification"""
+    from app.services.vision_service import VisionService
+    return VisionService(defer_model_load=True)
+
+
+@lru_cache(maxsize=None)
+def get_llm_service():
+    """Génération des informations médicinales"""
+    from app.services.llm_service import LLMService
+    return LLMService()
+
+
+@lru_cache(maxsize=None)
+def get_feedback_service():
+    """Stockage et curation des feedbacks"""
+    from app.services.feedback_service import FeedbackService
+    return FeedbackService()
+
+
+@lru_cache(maxsize=None)
+def get_job_service():
+    """Travaux d'identification en masse"""
+    from app.services.job_service import JobService
+    return JobService(get_vision_service(), upload_service=get_upload_service())
+
+
+@lru_cache(maxsize=None)
+def get_identification_serializer():
+    """Fragments pré-sérialisés des fiches plantes"""
+    from app.services.serialization import IdentificationSerializer
+    return IdentificationSerializer()
+
+
+async def require_model():
+    """
+    Dépendance des routes d'identification : attend le chargement du modèle
+
+    Une requête arrivée avant la fin du préchauffage attend le modèle plutôt
+    que de recevoir une identification fictive.
+    """
+    vision_service = get_vision_service()
+    if vision_service.model_pending:
+        await asyncio.to_thread(vision_service.ensure_model)
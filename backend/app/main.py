@@ -1,32 +1,30 @@
 """
 API FastAPI pour ivoire.ai
 Reconnaissance de plantes médicinales avec modèles de vision et LLM
+
+Les routes sont réparties en routeurs montés selon API_ROUTERS (défaut :
+identify,medicinal,feedback). Un routeur non monté n'est pas importé : avec
+API_ROUTERS=feedback, l'API démarre sans TensorFlow ni client LLM.
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, HTTPException, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import List, Optional
+from fastapi.responses import JSONResponse, Response
+from typing import Optional
 import uvicorn
 from dotenv import load_dotenv
+import importlib
 import os
+import secrets
 import logging
 
 logger = logging.getLogger(__name__)
 
-from app.services.vision_service import VisionService
-from app.services.llm_service import LLMService
-from app.services.feedback_service import FeedbackService
-from app.models.schemas import (
-    IdentificationResponse,
-    PlantInfo,
-    MedicinalInfo
-)
-from app.models.feedback_schemas import (
-    PredictionFeedback,
-    FeedbackQuery,
-    FeedbackStats
-)
+from app.services import metrics
+from app.services.admission import AdmissionMiddleware
+from app.services.metrics import MetricsMiddleware
+from app.services.slow_requests import SlowRequestRecorder, SlowRequestMiddleware
+from app.services.upload_service import RequestSizeLimitMiddleware
 
 load_dotenv()
 
@@ -36,6 +34,49 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Routeurs disponibles (nom dans API_ROUTERS -> module)
+ROUTERS = {
+    "identify": "app.routers.identify",
+    "medicinal": "app.routers.medicinal",
+    "feedback": "app.routers.feedback",
+}
+API_ROUTERS = [
+    name.strip()
+    for name in os.getenv("API_ROUTERS", ",".join(ROUTERS)).split(",")
+    if name.strip()
+]
+unknown_routers = set(API_ROUTERS) - set(ROUTERS)
+if unknown_routers:
+    raise ValueError(
+        f"API_ROUTERS: routeur(s) inconnu(s) {', '.join(sorted(unknown_routers))} "
+        f"(disponibles: {', '.join(ROUTERS)})"
+    )
+
+# Rejet immédiat des corps trop volumineux (marge pour les champs du formulaire)
+FORM_OVERHEAD_BYTES = 1024 * 1024
+body_limits = {}
+rate_limited_paths = set()
+concurrency_limited_paths = set()
+for name in API_ROUTERS:
+    module = importlib.import_module(ROUTERS[name])
+    app.include_router(module.router)
+    for path, limit in getattr(module, "BODY_LIMITS", {}).items():
+        body_limits[path] = limit + FORM_OVERHEAD_BYTES
+    rate_limited_paths |= getattr(module, "RATE_LIMITED_PATHS", set())
+    concurrency_limited_paths |= getattr(module, "CONCURRENCY_LIMITED_PATHS", set())
+logger.info(f"Routeurs montés: {', '.join(API_ROUTERS)}")
+
+app.add_middleware(RequestSizeLimitMiddleware, limits=body_limits)
+
+# Refus rapides (429/503 avec Retry-After) des endpoints coûteux ; à
+# l'intérieur de CORS pour que le navigateur puisse lire la réponse
+if rate_limited_paths or concurrency_limited_paths:
+    app.add_middleware(
+        AdmissionMiddleware,
+        rate_limited_paths=rate_limited_paths,
+        concurrency_limited_paths=concurrency_limited_paths
+    )
+
 # CORS configuration
 # Collect all allowed origins
 allowed_origins = [
@@ -73,39 +114,102 @@ else:
         allow_headers=["*"],
     )
 
-# Initialize services
-vision_service = VisionService()
-llm_service = LLMService()
-feedback_service = FeedbackService()
+# Capture des requêtes lentes (SLOW_REQUEST_THRESHOLD_MS) avec durées par étape
+slow_request_recorder = SlowRequestRecorder()
+app.add_middleware(SlowRequestMiddleware, recorder=slow_request_recorder)
+
+# Nombre de requêtes et durée par route (le plus externe : inclut CORS et les rejets)
+app.add_middleware(MetricsMiddleware)
+
+# Jeton des endpoints d'administration (désactivés s'il n'est pas défini)
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+
+# Services des routeurs montés (construits à l'import des routeurs)
+vision_service = None
+llm_service = None
+warmup = None
+if "identify" in API_ROUTERS or "medicinal" in API_ROUTERS:
+    from app.dependencies import get_vision_service, get_llm_service
+    vision_service = get_vision_service()
+    llm_service = get_llm_service()
+if "identify" in API_ROUTERS:
+    from app.dependencies import get_identification_serializer
+    from app.services.warmup import StartupWarmup
+    warmup = StartupWarmup(vision_service, get_identification_serializer())
+
+
+@app.on_event("startup")
+async def startup():
+    """Démarre les ressources de fond des services"""
+    if vision_service is not None:
+        vision_service.catalog.start()
+    if warmup is not None:
+        vision_service.start_preprocess_pool()
+        # En arrière-plan : /api/health/live répond pendant le préchauffage
+        warmup.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Libère les ressources de fond des services"""
+    if vision_service is not None:
+        vision_service.catalog.stop()
+        if vision_service.preprocess_pool is not None:
+            vision_service.preprocess_pool.shutdown()
+        vision_service.inference_thread.shutdown()
 
 
 @app.get("/")
 async def root():
+    endpoints = {
+        "health": "/api/health",
+        "readiness": "/api/health/ready",
+        "liveness": "/api/health/live",
+        "metrics": "/metrics",
+    }
+    if "identify" in API_ROUTERS:
+        endpoints.update({
+            "identify": "/api/identify",
+            "identify_batch": "/api/identify/batch",
+            "identify_multi_view": "/api/identify/multi-view",
+            "jobs": "/api/jobs/identify",
+        })
+    if "medicinal" in API_ROUTERS:
+        endpoints["medicinal_info"] = "/api/medicinal-info"
+    if "feedback" in API_ROUTERS:
+        endpoints.update({
+            "feedback": "/api/feedback",
+            "feedback_stats": "/api/feedback/stats",
+        })
     return {
         "message": "ivoire.ai API",
         "version": "1.0.0",
-        "endpoints": {
-            "identify": "/api/identify",
-            "health": "/api/health",
-            "feedback": "/api/feedback",
-            "feedback_stats": "/api/feedback/stats"
-        }
+        "routers": API_ROUTERS,
+        "endpoints": endpoints
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Métriques au format texte Prometheus (durées par étape, compteurs, files)"""
+    return Response(metrics.REGISTRY.render(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+
 @app.get("/api/health")
 async def health_check():
-    """Vérifie l'état de l'API et des services"""
+    """Vérifie l'état de l'API et des services des routeurs montés"""
     try:
-        vision_ready = vision_service.is_ready()
-        llm_ready = llm_service.is_ready()
+        services = {}
+        if vision_service is not None:
+            services["vision"] = "ready" if vision_service.is_ready() else "not_ready"
+        if llm_service is not None:
+            services["llm"] = "ready" if llm_service.is_ready() else "not_ready"
         
         return {
-            "status": "healthy" if (vision_ready and llm_ready) else "degraded",
-            "services": {
-                "vision": "ready" if vision_ready else "not_ready",
-                "llm": "ready" if llm_ready else "not_ready"
-            }
+            "status": "healthy" if all(state == "ready" for state in services.values()) else "degraded",
+            "routers": API_ROUTERS,
+            "services": services,
+            "warmup": warmup.status if warmup is not None else None
         }
     except Exception as e:
         return {
@@ -114,327 +218,76 @@ async def health_check():
         }
 
 
-@app.post("/api/identify", response_model=IdentificationResponse)
-async def identify_plant(
-    file: UploadFile = File(...),
-    user_intent: Optional[str] = Form(None),
-    include_medicinal_info: bool = Form(True)
-):
-    """
-    Identifie une plante à partir d'une image
-    
-    Args:
-        file: Image de la plante (feuille, fleur, fruit)
-        user_intent: 'agriculture' ou 'medecine'
-        include_medicinal_info: Inclure les informations médicinales générées par LLM
-    
-    Returns:
-        IdentificationResponse avec les résultats de l'identification
-    """
-    try:
-        # Vérifier le type de fichier
-        if not file.content_type or not file.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail="Le fichier doit être une image")
-        
-        # Lire l'image
-        image_bytes = await file.read()
-        
-        # Identification avec le modèle de vision
-        vision_results = await vision_service.identify(image_bytes)
-        
-        if not vision_results or len(vision_results) == 0:
-            raise HTTPException(
-                status_code=404,
-                detail="Aucune plante identifiée. Veuillez essayer avec une autre image."
-            )
-        
-        # Récupérer la meilleure prédiction
-        best_match = vision_results[0]
-        plant_id = best_match['plant_id']
-        confidence = best_match['confidence']
-        
-        # Récupérer les informations de la plante depuis la base de données
-        plant_info = await vision_service.get_plant_info(plant_id)
-        
-        if not plant_info:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Plante {plant_id} non trouvée dans la base de données"
-            )
-        
-        # Générer les informations médicinales avec LLM si demandé
-        medicinal_info = None
-        if include_medicinal_info and user_intent == 'medecine':
-            medicinal_info = await llm_service.generate_medicinal_info(
-                plant_info=plant_info,
-                user_query=None  # Peut être étendu pour des requêtes spécifiques
-            )
-        
-        # Préparer les alternatives
-        alternatives = []
-        if len(vision_results) > 1:
-            for alt in vision_results[1:4]:  # Top 3 alternatives
-                alt_plant_info = await vision_service.get_plant_info(alt['plant_id'])
-                if alt_plant_info:
-                    alternatives.append({
-                        "plant": alt_plant_info,
-                        "confidence": alt['confidence']
-                    })
-        
-        return IdentificationResponse(
-            plant=plant_info,
-            confidence=confidence,
-            alternatives=alternatives if alternatives else None,
-            medicinal_info=medicinal_info,
-            user_intent=user_intent
-        )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erreur lors de l'identification: {str(e)}"
-        )
+@app.get("/api/health/live")
+async def liveness_check():
+    """Sonde de vivacité : le processus répond (aucune dépendance vérifiée)"""
+    return {"status": "alive"}
 
 
-@app.post("/api/medicinal-info")
-async def get_medicinal_info(
-    plant_id: str,
-    query: Optional[str] = None
-):
+@app.get("/api/health/ready")
+async def readiness_check():
     """
-    Génère des informations médicinales pour une plante spécifique
-    
-    Args:
-        plant_id: ID de la plante
-        query: Requête spécifique (ex: "fièvre", "diabète", "douleurs")
-    
-    Returns:
-        Informations médicinales générées par le LLM
+    Sonde de disponibilité : 200 une fois le modèle chargé et préchauffé
+
+    Renvoie 503 pendant le préchauffage (ou s'il a échoué) pour que le
+    répartiteur n'envoie pas de trafic à un worker froid. Sans le routeur
+    d'identification, il n'y a rien à préchauffer : toujours prêt.
     """
-    try:
-        plant_info = await vision_service.get_plant_info(plant_id)
-        if not plant_info:
-            raise HTTPException(status_code=404, detail="Plante non trouvée")
-        
-        medicinal_info = await llm_service.generate_medicinal_info(
-            plant_info=plant_info,
-            user_query=query
-        )
-        
-        return medicinal_info
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erreur lors de la génération: {str(e)}"
-        )
+    if warmup is None:
+        return {"status": "ready", "routers": API_ROUTERS, "warmup": None}
+    body = {
+        "status": "ready" if warmup.ready else "not_ready",
+        "model_loaded": vision_service.model is not None,
+        "model_version": vision_service.model_version,
+        "warmup": warmup.snapshot()
+    }
+    return JSONResponse(body, status_code=200 if warmup.ready else 503)
+
+
+# ==================== ADMIN ENDPOINTS ====================
 
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Vérifie l'en-tête X-Admin-Token"""
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Endpoints d'administration désactivés (ADMIN_API_TOKEN non défini)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Jeton d'administration invalide")
 
-# ==================== FEEDBACK ENDPOINTS ====================
 
-@app.post("/api/feedback")
-async def submit_feedback(
-    image: Optional[UploadFile] = File(None),
-    feedback: Optional[str] = Form(None)
-):
+@app.get("/api/admin/slow-requests", dependencies=[Depends(require_admin)])
+async def get_slow_requests(limit: Optional[int] = None):
     """
-    Soumet un feedback utilisateur sur une prédiction
+    Liste les requêtes lentes capturées, de la plus récente à la plus ancienne
     
-    Args:
-        image: Image de la prédiction (optionnel, sera sauvegardée)
-        feedback: JSON string avec les données du feedback (dans le formulaire)
+    Chaque entrée contient les durées par étape, le hash et la taille des
+    images, la version du modèle et le fournisseur, le modèle et les tokens LLM.
     
-    Returns:
-        ID du feedback créé
+    Args:
+        limit: Nombre maximal de requêtes retournées
     """
-    try:
-        import json
-        
-        # Parser le JSON du feedback
-        if not feedback:
-            raise HTTPException(status_code=400, detail="Données de feedback requises")
-        
-        try:
-            feedback_data = json.loads(feedback)
-        except json.JSONDecodeError as e:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"JSON invalide dans le feedback: {str(e)}"
-            )
-        
-        # Lire l'image si fournie
-        image_bytes = None
-        if image:
-            image_bytes = await image.read()
-            # Calculer le hash si pas déjà fourni dans les données
-            if not feedback_data.get('image_hash'):
-                feedback_data['image_hash'] = feedback_service.hash_image(image_bytes)
-        
-        # Valider que image_hash est présent (soit fourni dans les données, soit calculé depuis l'image)
-        if not feedback_data.get('image_hash'):
-            raise HTTPException(
-                status_code=400, 
-                detail="image_hash est requis (fournir une image ou inclure image_hash dans les données)"
-            )
-        
-        if not feedback_data.get('predicted_plant_id'):
-            raise HTTPException(
-                status_code=400, 
-                detail="predicted_plant_id est requis"
-            )
-        
-        if not feedback_data.get('predicted_confidence'):
-            raise HTTPException(
-                status_code=400, 
-                detail="predicted_confidence est requis"
-            )
-        
-        if not feedback_data.get('feedback_type'):
-            raise HTTPException(
-                status_code=400, 
-                detail="feedback_type est requis"
-            )
-        
-        # Créer l'objet PredictionFeedback
-        try:
-            feedback_obj = PredictionFeedback(**feedback_data)
-        except Exception as e:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Données de feedback invalides: {str(e)}"
-            )
-        
-        # Soumettre le feedback
-        feedback_id = await feedback_service.submit_feedback(feedback_obj, image_bytes)
-        
-        return {
-            "success": True,
-            "feedback_id": feedback_id,
-            "message": "Feedback enregistré avec succès"
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        import traceback
-        logger.error(f"Erreur lors de l'enregistrement du feedback: {e}\n{traceback.format_exc()}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erreur lors de l'enregistrement du feedback: {str(e)}"
-        )
-
-
-@app.get("/api/feedback/{feedback_id}")
-async def get_feedback(feedback_id: str):
-    """Récupère un feedback par son ID"""
-    feedback = feedback_service.get_feedback(feedback_id)
-    if not feedback:
-        raise HTTPException(status_code=404, detail="Feedback non trouvé")
-    return feedback
-
-
-@app.post("/api/feedback/query")
-async def query_feedbacks(query: FeedbackQuery):
-    """Interroge les feedbacks avec des filtres"""
-    try:
-        results = feedback_service.query_feedbacks(query)
-        return {
-            "results": results,
-            "count": len(results),
-            "total": len(feedback_service.feedbacks)
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erreur lors de la requête: {str(e)}"
-        )
+    entries = slow_request_recorder.entries(limit)
+    return {
+        "threshold_ms": slow_request_recorder.threshold_ms,
+        "capacity": slow_request_recorder.capacity,
+        "count": len(entries),
+        "requests": entries
+    }
 
 
-@app.get("/api/feedback/stats", response_model=FeedbackStats)
-async def get_feedback_stats():
-    """Récupère les statistiques sur les feedbacks"""
-    return feedback_service.get_stats()
+@app.get("/api/admin/slow-requests/export", dependencies=[Depends(require_admin)])
+async def export_slow_requests():
+    """Exporte les requêtes lentes capturées en JSONL (ordre chronologique)"""
+    return Response(
+        slow_request_recorder.to_jsonl(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="slow-requests.jsonl"'}
+    )
 
 
-@app.post("/api/feedback/{feedback_id}/curate")
-async def curate_feedback(
-    feedback_id: str,
-    status: str,
-    curator_notes: Optional[str] = None,
-    curated_by: Optional[str] = None
-):
-    """
-    Curate un feedback (approuver/rejeter)
-    
-    Args:
-        feedback_id: ID du feedback
-        status: Nouveau statut ('approved', 'rejected')
-        curator_notes: Notes du curateur
-        curated_by: ID du curateur
-    """
-    from app.models.feedback_schemas import FeedbackStatus
-    
-    try:
-        feedback_status = FeedbackStatus(status)
-        success = feedback_service.update_feedback_status(
-            feedback_id,
-            feedback_status,
-            curator_notes,
-            curated_by
-        )
-        
-        if not success:
-            raise HTTPException(status_code=404, detail="Feedback non trouvé")
-        
-        return {
-            "success": True,
-            "message": f"Feedback {feedback_id} mis à jour: {status}"
-        }
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Statut invalide")
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erreur lors de la curation: {str(e)}"
-        )
-
-
-@app.get("/api/feedback/training-dataset")
-async def get_training_dataset(
-    min_confidence: float = 0.0,
-    only_approved: bool = True,
-    correction_weight: float = 2.0
-):
-    """
-    Prépare le dataset d'entraînement à partir des feedbacks
-    
-    Args:
-        min_confidence: Confiance minimale
-        only_approved: Seulement les feedbacks approuvés
-        correction_weight: Poids des corrections
-    
-    Returns:
-        Liste des entrées pour l'entraînement
-    """
-    try:
-        entries = feedback_service.prepare_training_dataset(
-            min_confidence=min_confidence,
-            only_approved=only_approved,
-            correction_weight=correction_weight
-        )
-        
-        return {
-            "entries": [entry.model_dump() for entry in entries],
-            "count": len(entries)
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erreur lors de la préparation: {str(e)}"
-        )
+@app.delete("/api/admin/slow-requests", dependencies=[Depends(require_admin)])
+async def clear_slow_requests():
+    """Vide le tampon des requêtes lentes"""
+    return {"success": True, "cleared": slow_request_recorder.clear()}
 
 
 if __name__ == "__main__":
@@ -444,4 +297,3 @@ if __name__ == "__main__":
         port=8000,
         reload=True
     )
-
@@ -0,0 +1,42 @@
+"""
+Schémas pour les travaux d'identification en masse (archives d'images)
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+from enum import Enum
+
+
+class JobStatus(str, Enum):
+    """Statut d'un travail"""
+    QUEUED = "queued"  # En attente d'un worker
+    RUNNING = "running"  # En cours de traitement
+    COMPLETED = "completed"  # Terminé
+    FAILED = "failed"  # Échec (archive invalide, interruption, etc.)
+
+
+class ResultFormat(str, Enum):
+    """Format du fichier de résultats"""
+    JSONL = "jsonl"
+    CSV = "csv"
+
+
+class IdentificationJob(BaseModel):
+    """Travail d'identification d'une archive d'images"""
+    id: str
+    status: JobStatus = JobStatus.QUEUED
+    result_format: ResultFormat = ResultFormat.JSONL
+    archive_name: Optional[str] = None
+    archive_size: int = 0
+
+    # Progression
+    total_images: Optional[int] = None  # Connu une fois l'archive ouverte
+    processed_images: int = 0
+    failed_images: int = 0
+
+    # Métadonnées
+    created_at: datetime = Field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
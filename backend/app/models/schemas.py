@@ -62,3 +62,23 @@ class IdentificationResponse(BaseModel):
     medicinal_info: Optional[MedicinalInfo] = None
     user_intent: Optional[str] = None
 
+
+
+class FusedIdentificationResponse(IdentificationResponse):
+    """Réponse d'identification fusionnée à partir de plusieurs vues d'un spécimen"""
+    image_count: int  # Images reçues
+    used_image_count: int  # Images décodées et prises en compte dans la fusion
+
+
+class BatchIdentificationItem(BaseModel):
+    """Résultat d'identification pour une image d'un lot"""
+    filename: Optional[str] = None
+    result: Optional[IdentificationResponse] = None
+    error: Optional[str] = None
+
+
+class BatchIdentificationResponse(BaseModel):
+    """Réponse d'identification par lot (une entrée par image, dans l'ordre d'envoi)"""
+    results: List[BatchIdentificationItem]
+    count: int
+    identified_count: int
@@ -0,0 +1,228 @@
+"""
+Routes des feedbacks utilisateurs : soumission, requêtes, curation, dataset
+
+N'importe ni TensorFlow ni le client LLM : API_ROUTERS=feedback démarre un
+service d'ingestion des feedbacks léger.
+"""
+
+import json
+import logging
+import traceback
+from typing import Optional
+
+from fastapi import APIRouter, File, UploadFile, HTTPException, Form
+
+from app.dependencies import get_feedback_service, get_upload_service
+from app.models.feedback_schemas import (
+    PredictionFeedback,
+    FeedbackQuery,
+    FeedbackStats,
+    FeedbackStatus
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["feedback"])
+
+upload_service = get_upload_service()
+feedback_service = get_feedback_service()
+
+BODY_LIMITS = {
+    "/api/feedback": upload_service.max_bytes,
+}
+
+
+@router.post("/api/feedback")
+async def submit_feedback(
+    image: Optional[UploadFile] = File(None),
+    feedback: Optional[str] = Form(None)
+):
+    """
+    Soumet un feedback utilisateur sur une prédiction
+    
+    Args:
+        image: Image de la prédiction (optionnel, sera sauvegardée)
+        feedback: JSON string avec les données du feedback (dans le formulaire)
+    
+    Returns:
+        ID du feedback créé
+    """
+    try:
+        # Parser le JSON du feedback
+        if not feedback:
+            raise HTTPException(status_code=400, detail="Données de feedback requises")
+        
+        try:
+            feedback_data = json.loads(feedback)
+        except json.JSONDecodeError as e:
+            raise HTTPException(
+                status_code=400, 
+                detail=f"JSON invalide dans le feedback: {str(e)}"
+            )
+        
+        # Lire l'image si fournie
+        image_bytes = None
+        if image:
+            image_bytes = await upload_service.read_image(image)
+            # Calculer le hash si pas déjà fourni dans les données
+            if not feedback_data.get('image_hash'):
+                feedback_data['image_hash'] = feedback_service.hash_image(image_bytes)
+        
+        # Valider que image_hash est présent (soit fourni dans les données, soit calculé depuis l'image)
+        if not feedback_data.get('image_hash'):
+            raise HTTPException(
+                status_code=400, 
+                detail="image_hash est requis (fournir une image ou inclure image_hash dans les données)"
+            )
+        
+        if not feedback_data.get('predicted_plant_id'):
+            raise HTTPException(
+                status_code=400, 
+                detail="predicted_plant_id est requis"
+            )
+        
+        if not feedback_data.get('predicted_confidence'):
+            raise HTTPException(
+                status_code=400, 
+                detail="predicted_confidence est requis"
+            )
+        
+        if not feedback_data.get('feedback_type'):
+            raise HTTPException(
+                status_code=400, 
+                detail="feedback_type est requis"
+            )
+        
+        # Créer l'objet PredictionFeedback
+        try:
+            feedback_obj = PredictionFeedback(**feedback_data)
+        except Exception as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Données de feedback invalides: {str(e)}"
+            )
+        
+        # Soumettre le feedback
+        feedback_id = await feedback_service.submit_feedback(feedback_obj, image_bytes)
+        
+        return {
+            "success": True,
+            "feedback_id": feedback_id,
+            "message": "Feedback enregistré avec succès"
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erreur lors de l'enregistrement du feedback: {e}\n{traceback.format_exc()}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors de l'enregistrement du feedback: {str(e)}"
+        )
+
+
+@router.post("/api/feedback/query")
+async def query_feedbacks(query: FeedbackQuery):
+    """Interroge les feedbacks avec des filtres"""
+    try:
+        results = feedback_service.query_feedbacks(query)
+        return {
+            "results": results,
+            "count": len(results),
+            "total": len(feedback_service.feedbacks)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors de la requête: {str(e)}"
+        )
+
+
+@router.get("/api/feedback/stats", response_model=FeedbackStats)
+async def get_feedback_stats():
+    """Récupère les statistiques sur les feedbacks"""
+    return feedback_service.get_stats()
+
+
+@router.get("/api/feedback/training-dataset")
+async def get_training_dataset(
+    min_confidence: float = 0.0,
+    only_approved: bool = True,
+    correction_weight: float = 2.0
+):
+    """
+    Prépare le dataset d'entraînement à partir des feedbacks
+    
+    Args:
+        min_confidence: Confiance minimale
+        only_approved: Seulement les feedbacks approuvés
+        correction_weight: Poids des corrections
+    
+    Returns:
+        Liste des entrées pour l'entraînement
+    """
+    try:
+        entries = feedback_service.prepare_training_dataset(
+            min_confidence=min_confidence,
+            only_approved=only_approved,
+            correction_weight=correction_weight
+        )
+        
+        return {
+            "entries": [entry.model_dump() for entry in entries],
+            "count": len(entries)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors de la préparation: {str(e)}"
+        )
+
+
+@router.get("/api/feedback/{feedback_id}")
+async def get_feedback(feedback_id: str):
+    """Récupère un feedback par son ID"""
+    feedback = feedback_service.get_feedback(feedback_id)
+    if not feedback:
+        raise HTTPException(status_code=404, detail="Feedback non trouvé")
+    return feedback
+
+
+@router.post("/api/feedback/{feedback_id}/curate")
+async def curate_feedback(
+    feedback_id: str,
+    status: str,
+    curator_notes: Optional[str] = None,
+    curated_by: Optional[str] = None
+):
+    """
+    Curate un feedback (approuver/rejeter)
+    
+    Args:
+        feedback_id: ID du feedback
+        status: Nouveau statut ('approved', 'rejected')
+        curator_notes: Notes du curateur
+        curated_by: ID du curateur
+    """
+    try:
+        feedback_status = FeedbackStatus(status)
+        success = feedback_service.update_feedback_status(
+            feedback_id,
+            feedback_status,
+            curator_notes,
+            curated_by
+        )
+        
+        if not success:
+            raise HTTPException(status_code=404, detail="Feedback non trouvé")
+        
+        return {
+            "success": True,
+            "message": f"Feedback {feedback_id} mis à jour: {status}"
+        }
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Statut invalide")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors de la curation: {str(e)}"
+        )
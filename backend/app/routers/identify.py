@@ -0,0 +1,443 @@
+"""
+Routes d'identification : image unique, lots, multi-vues et travaux en masse
+"""
+
+import os
+import shutil
+import asyncio
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, File, UploadFile, HTTPException, Form, Depends
+from fastapi.responses import FileResponse
+
+from app.dependencies import (
+    get_identification_serializer,
+    get_job_service,
+    get_llm_service,
+    get_upload_service,
+    get_vision_service,
+    require_model
+)
+from app.services import metrics
+from app.services.serialization import FastJSONResponse
+from app.services.upload_service import UploadRejected
+from app.models.schemas import (
+    IdentificationResponse,
+    FusedIdentificationResponse,
+    BatchIdentificationItem,
+    BatchIdentificationResponse
+)
+from app.models.job_schemas import IdentificationJob, JobStatus, ResultFormat
+
+router = APIRouter(tags=["identification"])
+
+# Limites des requêtes d'identification par lot
+MAX_BATCH_IMAGES = int(os.getenv("MAX_BATCH_IMAGES", "32"))
+MAX_BATCH_BYTES = int(os.getenv("MAX_BATCH_BYTES", str(50 * 1024 * 1024)))
+
+# Taille maximale d'une archive pour les travaux d'identification en masse
+MAX_JOB_ARCHIVE_BYTES = int(os.getenv("MAX_JOB_ARCHIVE_BYTES", str(2 * 1024 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+upload_service = get_upload_service()
+vision_service = get_vision_service()
+llm_service = get_llm_service()
+job_service = get_job_service()
+identification_serializer = get_identification_serializer()
+
+# Taille maximale des corps par route, hors champs du formulaire (RequestSizeLimitMiddleware)
+BODY_LIMITS = {
+    "/api/identify": upload_service.max_bytes,
+    "/api/identify/batch": MAX_BATCH_BYTES,
+    "/api/identify/multi-view": MAX_BATCH_BYTES,
+    "/api/jobs/identify": MAX_JOB_ARCHIVE_BYTES,
+}
+
+# Contrôle d'admission (AdmissionMiddleware) : seau de jetons par client, et
+# identifications synchrones comptées dans la limite de concurrence du worker
+RATE_LIMITED_PATHS = set(BODY_LIMITS)
+CONCURRENCY_LIMITED_PATHS = {"/api/identify", "/api/identify/batch", "/api/identify/multi-view"}
+
+
+async def _resolve_identification(
+    vision_results: List[dict],
+    user_intent: Optional[str],
+    include_medicinal_info: bool,
+    medicinal_tasks: Optional[Dict[str, asyncio.Task]] = None
+) -> Dict:
+    """
+    Rassemble les données de la réponse d'identification à partir des résultats de vision
+    
+    Args:
+        vision_results: Résultats classés (plant_id, confidence)
+        user_intent: 'agriculture' ou 'medecine'
+        include_medicinal_info: Inclure les informations médicinales générées par LLM
+        medicinal_tasks: Tâches LLM partagées par plante (évite de régénérer
+            les informations d'une même plante dans un lot)
+    """
+    if not vision_results or len(vision_results) == 0:
+        raise HTTPException(
+            status_code=404,
+            detail="Aucune plante identifiée. Veuillez essayer avec une autre image."
+        )
+    
+    # Récupérer la meilleure prédiction
+    best_match = vision_results[0]
+    plant_id = best_match['plant_id']
+    confidence = best_match['confidence']
+    
+    # Récupérer les informations de la plante depuis la base de données
+    with metrics.stage("plant_lookup"):
+        plant_info = await vision_service.get_plant_info(plant_id)
+    
+    if not plant_info:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Plante {plant_id} non trouvée dans la base de données"
+        )
+    
+    # Générer les informations médicinales avec LLM si demandé
+    medicinal_info = None
+    if include_medicinal_info and user_intent == 'medecine':
+        if medicinal_tasks is None:
+            medicinal_info = await llm_service.generate_medicinal_info(
+                plant_info=plant_info,
+                user_query=None  # Peut être étendu pour des requêtes spécifiques
+            )
+        else:
+            metrics.cache_access("medicinal_tasks", plant_id in medicinal_tasks)
+            if plant_id not in medicinal_tasks:
+                medicinal_tasks[plant_id] = asyncio.ensure_future(
+                    llm_service.generate_medicinal_info(plant_info=plant_info, user_query=None)
+                )
+            medicinal_info = await medicinal_tasks[plant_id]
+    
+    # Préparer les alternatives
+    alternatives = []
+    if len(vision_results) > 1:
+        for alt in vision_results[1:4]:  # Top 3 alternatives
+            with metrics.stage("plant_lookup"):
+                alt_plant_info = await vision_service.get_plant_info(alt['plant_id'])
+            if alt_plant_info:
+                alternatives.append({
+                    "plant": alt_plant_info,
+                    "confidence": alt['confidence']
+                })
+    
+    return {
+        "plant": plant_info,
+        "confidence": confidence,
+        "alternatives": alternatives if alternatives else None,
+        "medicinal_info": medicinal_info,
+        "user_intent": user_intent
+    }
+
+
+async def _build_identification_response(
+    vision_results: List[dict],
+    user_intent: Optional[str],
+    include_medicinal_info: bool,
+    medicinal_tasks: Optional[Dict[str, asyncio.Task]] = None
+) -> IdentificationResponse:
+    """Construit la réponse d'identification validée (modèle pydantic)"""
+    return IdentificationResponse(**await _resolve_identification(
+        vision_results,
+        user_intent=user_intent,
+        include_medicinal_info=include_medicinal_info,
+        medicinal_tasks=medicinal_tasks
+    ))
+
+
+@router.post("/api/identify", response_model=IdentificationResponse, dependencies=[Depends(require_model)])
+async def identify_plant(
+    file: UploadFile = File(...),
+    user_intent: Optional[str] = Form(None),
+    include_medicinal_info: bool = Form(True)
+):
+    """
+    Identifie une plante à partir d'une image
+    
+    Args:
+        file: Image de la plante (feuille, fleur, fruit)
+        user_intent: 'agriculture' ou 'medecine'
+        include_medicinal_info: Inclure les informations médicinales générées par LLM
+    
+    Returns:
+        IdentificationResponse avec les résultats de l'identification
+    """
+    try:
+        # Vérifier le type de fichier
+        if not file.content_type or not file.content_type.startswith('image/'):
+            raise HTTPException(status_code=400, detail="Le fichier doit être une image")
+        
+        # Lire l'image par blocs (taille, format et dimensions vérifiés)
+        image_bytes = await upload_service.read_image(file)
+        
+        # Identification avec le modèle de vision
+        vision_results = await vision_service.identify(image_bytes)
+        
+        result = await _resolve_identification(
+            vision_results,
+            user_intent=user_intent,
+            include_medicinal_info=include_medicinal_info
+        )
+        
+        # Fiches plantes pré-sérialisées, sans revalidation pydantic
+        with metrics.stage("serialize"):
+            body = identification_serializer.render(result, vision_service.catalog.version)
+        return FastJSONResponse(body)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors de l'identification: {str(e)}"
+        )
+
+
+@router.post("/api/identify/batch", response_model=BatchIdentificationResponse, dependencies=[Depends(require_model)])
+async def identify_plants_batch(
+    files: List[UploadFile] = File(...),
+    user_intent: Optional[str] = Form(None),
+    include_medicinal_info: bool = Form(True)
+):
+    """
+    Identifie plusieurs plantes en une seule requête multipart
+    
+    Les images sont décodées en parallèle puis passent dans le modèle en un
+    seul batch. Les informations médicinales ne sont générées qu'une fois
+    par plante distincte.
+    
+    Args:
+        files: Images des plantes (MAX_BATCH_IMAGES au maximum)
+        user_intent: 'agriculture' ou 'medecine'
+        include_medicinal_info: Inclure les informations médicinales générées par LLM
+    
+    Returns:
+        BatchIdentificationResponse avec un résultat par image, dans l'ordre d'envoi
+    """
+    if len(files) > MAX_BATCH_IMAGES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Trop d'images: {len(files)} (maximum {MAX_BATCH_IMAGES})"
+        )
+    
+    try:
+        # Lire les images en vérifiant la taille totale
+        items: List[BatchIdentificationItem] = []
+        images: List[bytes] = []
+        positions: List[int] = []
+        total_bytes = 0
+        for position, upload in enumerate(files):
+            items.append(BatchIdentificationItem(filename=upload.filename))
+            if not upload.content_type or not upload.content_type.startswith('image/'):
+                items[-1].error = "Le fichier doit être une image"
+                continue
+            try:
+                image_bytes = await upload_service.read_image(upload)
+            except UploadRejected as e:
+                items[-1].error = e.detail
+                continue
+            total_bytes += len(image_bytes)
+            if total_bytes > MAX_BATCH_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Taille totale du lot supérieure à {MAX_BATCH_BYTES} octets"
+                )
+            images.append(image_bytes)
+            positions.append(position)
+        
+        # Identification en une seule passe avant
+        batch_results = await vision_service.identify_batch(images) if images else []
+        
+        medicinal_tasks: Dict[str, asyncio.Task] = {}
+        
+        async def build_item(position: int, vision_results: Optional[List[dict]]):
+            if vision_results is None:
+                items[position].error = "Image illisible"
+                return
+            try:
+                items[position].result = await _build_identification_response(
+                    vision_results,
+                    user_intent=user_intent,
+                    include_medicinal_info=include_medicinal_info,
+                    medicinal_tasks=medicinal_tasks
+                )
+            except HTTPException as e:
+                items[position].error = e.detail
+        
+        await asyncio.gather(*(
+            build_item(position, vision_results)
+            for position, vision_results in zip(positions, batch_results)
+        ))
+        
+        return BatchIdentificationResponse(
+            results=items,
+            count=len(items),
+            identified_count=sum(1 for item in items if item.result is not None)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors de l'identification par lot: {str(e)}"
+        )
+
+
+@router.post("/api/identify/multi-view", response_model=FusedIdentificationResponse, dependencies=[Depends(require_model)])
+async def identify_plant_multi_view(
+    files: List[UploadFile] = File(...),
+    user_intent: Optional[str] = Form(None),
+    include_medicinal_info: bool = Form(True)
+):
+    """
+    Identifie une plante à partir de plusieurs photos du même spécimen
+    
+    Les vues (feuille, fleur, fruit...) passent dans le modèle en un seul
+    batch et leurs probabilités sont fusionnées en un classement unique.
+    
+    Args:
+        files: Images du même spécimen (MAX_BATCH_IMAGES au maximum)
+        user_intent: 'agriculture' ou 'medecine'
+        include_medicinal_info: Inclure les informations médicinales générées par LLM
+    
+    Returns:
+        FusedIdentificationResponse avec le résultat fusionné
+    """
+    if len(files) > MAX_BATCH_IMAGES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Trop d'images: {len(files)} (maximum {MAX_BATCH_IMAGES})"
+        )
+    
+    try:
+        images: List[bytes] = []
+        total_bytes = 0
+        for upload in files:
+            if not upload.content_type or not upload.content_type.startswith('image/'):
+                raise HTTPException(status_code=400, detail="Tous les fichiers doivent être des images")
+            image_bytes = await upload_service.read_image(upload)
+            total_bytes += len(image_bytes)
+            if total_bytes > MAX_BATCH_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Taille totale des images supérieure à {MAX_BATCH_BYTES} octets"
+                )
+            images.append(image_bytes)
+        
+        vision_results, used_count = await vision_service.identify_fused(images)
+        
+        result = await _resolve_identification(
+            vision_results,
+            user_intent=user_intent,
+            include_medicinal_info=include_medicinal_info
+        )
+        with metrics.stage("serialize"):
+            body = identification_serializer.render(
+                result,
+                vision_service.catalog.version,
+                extra={"image_count": len(images), "used_image_count": used_count}
+            )
+        return FastJSONResponse(body)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors de l'identification multi-vues: {str(e)}"
+        )
+
+
+def _save_archive(archive: UploadFile, path):
+    """Copie par blocs de l'archive reçue dans le répertoire du travail"""
+    archive.file.seek(0)
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(archive.file, f, UPLOAD_CHUNK_SIZE)
+
+
+@router.post(
+    "/api/jobs/identify",
+    response_model=IdentificationJob,
+    status_code=202,
+    dependencies=[Depends(require_model)]
+)
+async def create_identification_job(
+    archive: UploadFile = File(...),
+    result_format: ResultFormat = Form(ResultFormat.JSONL)
+):
+    """
+    Crée un travail d'identification pour une archive ZIP d'images
+    
+    L'archive est copiée par blocs sur disque (dans un thread, sans bloquer
+    les autres requêtes) puis traitée en arrière-plan :
+    les images sont lues une à une depuis le ZIP (sans extraction), identifiées
+    par batch et les résultats écrits au fur et à mesure.
+    
+    Args:
+        archive: Archive ZIP contenant les images
+        result_format: 'jsonl' (défaut) ou 'csv'
+    
+    Returns:
+        Le travail créé (à suivre avec GET /api/jobs/{job_id})
+    """
+    # Corps déjà borné à la réception (RequestSizeLimitMiddleware)
+    if archive.size is not None and archive.size > MAX_JOB_ARCHIVE_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Archive supérieure à {MAX_JOB_ARCHIVE_BYTES} octets"
+        )
+    job = job_service.create_job(archive.filename, result_format)
+    try:
+        # Copie de plusieurs Go : hors de la boucle d'événements
+        await asyncio.to_thread(_save_archive, archive, job_service.archive_path(job.id))
+        return job_service.submit(job)
+        
+    except HTTPException:
+        job_service.discard(job)
+        raise
+    except ValueError as e:
+        job_service.discard(job)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        job_service.discard(job)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors de la création du travail: {str(e)}"
+        )
+
+
+@router.get("/api/jobs/{job_id}", response_model=IdentificationJob)
+async def get_identification_job(job_id: str):
+    """Récupère l'état et la progression d'un travail"""
+    job = job_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Travail non trouvé")
+    return job
+
+
+@router.get("/api/jobs/{job_id}/results")
+async def get_identification_job_results(job_id: str):
+    """
+    Télécharge le fichier de résultats d'un travail
+    
+    Disponible dès le début du traitement : le fichier est complété au fur
+    et à mesure (vérifier le statut pour savoir s'il est complet).
+    """
+    job = job_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Travail non trouvé")
+    
+    result_path = job_service.result_path(job)
+    if job.status == JobStatus.QUEUED or not result_path.exists():
+        raise HTTPException(status_code=409, detail="Résultats pas encore disponibles")
+    
+    media_type = "text/csv" if job.result_format == ResultFormat.CSV else "application/x-ndjson"
+    return FileResponse(
+        result_path,
+        media_type=media_type,
+        filename=f"{job.id}.{job.result_format.value}"
+    )
@@ -0,0 +1,56 @@
+"""
+Routes des informations médicinales générées par LLM
+
+Le service de vision n'y sert qu'à la recherche des fiches plantes : son
+modèle (et TensorFlow) n'est jamais chargé par ce routeur.
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+
+from app.dependencies import get_llm_service, get_vision_service
+
+router = APIRouter(tags=["medicinal"])
+
+vision_service = get_vision_service()
+llm_service = get_llm_service()
+
+# Seau de jetons par client (AdmissionMiddleware) : un appel LLM de plusieurs secondes
+RATE_LIMITED_PATHS = {"/api/medicinal-info"}
+
+
+@router.post("/api/medicinal-info")
+async def get_medicinal_info(
+    plant_id: str,
+    query: Optional[str] = None
+):
+    """
+    Génère des informations médicinales pour une plante spécifique
+    
+    Args:
+        plant_id: ID de la plante
+        query: Requête spécifique (ex: "fièvre", "diabète", "douleurs")
+    
+    Returns:
+        Informations médicinales générées par le LLM
+    """
+    try:
+        plant_info = await vision_service.get_plant_info(plant_id)
+        if not plant_info:
+            raise HTTPException(status_code=404, detail="Plante non trouvée")
+        
+        medicinal_info = await llm_service.generate_medicinal_info(
+            plant_info=plant_info,
+            user_query=query
+        )
+        
+        return medicinal_info
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors de la génération: {str(e)}"
+        )
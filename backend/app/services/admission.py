@@ -0,0 +1,326 @@
+"""
+Contrôle d'admission des endpoints coûteux
+
+Une identification coûte une passe du modèle, une fiche médicinale un appel
+LLM de plusieurs secondes : un client abusif peut affamer tous les autres.
+Le middleware refuse avant toute lecture du corps :
+- 429 quand un seau de jetons du client est vide (RATE_LIMIT_PER_MINUTE,
+  RATE_LIMIT_BURST ; désactivé par défaut) : seau de son IP, et en plus
+  celui de son en-tête de session avec RATE_LIMIT_KEY=session ;
+- 503 quand le worker a déjà MAX_INFLIGHT_IDENTIFICATIONS identifications
+  en cours.
+
+Les deux réponses portent un en-tête Retry-After. Les seaux sont gardés en
+mémoire (par worker) ou, avec RATE_LIMIT_STORE=sqlite, dans une base SQLite
+locale partagée par les workers de serve.py.
+"""
+
+import os
+import math
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Set, Tuple
+
+from fastapi.responses import JSONResponse
+
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_REJECTIONS = metrics.REGISTRY.counter(
+    "ivoire_admission_rejections_total",
+    "Requêtes refusées par le contrôle d'admission (reason: rate_limit ou concurrency)",
+    ["path", "reason"]
+)
+INFLIGHT_IDENTIFICATIONS = metrics.REGISTRY.gauge(
+    "ivoire_inflight_identifications",
+    "Identifications en cours dans le worker"
+)
+
+
+class TokenBucketLimiter:
+    """
+    Seaux de jetons en mémoire, un par client
+
+    Chaque client dispose de `burst` jetons, regagnés au rythme de `rate`
+    par seconde ; une requête consomme un jeton. Les clients les moins
+    récents sont oubliés au-delà de `max_clients` (leur seau serait plein).
+    """
+
+    shared = False
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> float:
+        """
+        Consomme un jeton du client
+
+        Returns:
+            0 si la requête est admise, sinon secondes avant le prochain jeton
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens, retry_after = _take(tokens, updated, now, self.rate, self.burst)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def refund(self, key: str):
+        """Rend le jeton d'une requête finalement refusée par un autre seau"""
+        with self._lock:
+            if key in self._buckets:
+                tokens, updated = self._buckets[key]
+                self._buckets[key] = (min(self.burst, tokens + 1), updated)
+
+
+class SQLiteTokenBucketLimiter:
+    """
+    Seaux de jetons dans une base SQLite locale, partagés entre processus
+
+    Chaque acquisition est une transaction IMMEDIATE (verrou d'écriture de la
+    base) : les workers de serve.py voient le même seau pour un client. Les
+    seaux pleins depuis longtemps sont purgés périodiquement.
+    """
+
+    shared = True
+    PURGE_INTERVAL = 60.0
+
+    def __init__(self, rate: float, burst: int, db_path: str):
+        self.rate = rate
+        self.burst = burst
+        self.db_path = db_path
+        self._local = threading.local()
+        self._last_purge = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # Connexion temporaire : une connexion SQLite ne doit pas traverser un fork
+        conn = sqlite3.connect(db_path, timeout=5.0)
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Connexion du thread courant (mode WAL, autocommit)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key: str) -> float:
+        """Consomme un jeton du client (0 si admis, sinon secondes d'attente)"""
+        # Horloge murale : partagée par les processus, contrairement à monotonic()
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (self.burst, now)
+            tokens, retry_after = _take(tokens, updated, now, self.rate, self.burst)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now)
+            )
+            if now - self._last_purge > self.PURGE_INTERVAL:
+                # Seau redevenu plein : équivalent à une absence de ligne
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self.burst / self.rate,))
+                self._last_purge = now
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return retry_after
+
+    def refund(self, key: str):
+        """Rend le jeton d'une requête finalement refusée par un autre seau"""
+        self._connect().execute(
+            "UPDATE buckets SET tokens = MIN(?, tokens + 1) WHERE key = ?", (self.burst, key)
+        )
+
+
+def _take(tokens: float, updated: float, now: float, rate: float, burst: int) -> Tuple[float, float]:
+    """Recharge le seau puis retire un jeton ; retourne (jetons, attente)"""
+    tokens = min(burst, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+def _acquire_all(buckets: List[Tuple[TokenBucketLimiter, str]]) -> float:
+    """
+    Débite les seaux dans l'ordre, s'arrête au premier vide (0 si tous admis)
+
+    Une requête refusée ne coûte rien : les jetons déjà pris aux seaux
+    précédents (la session quand l'IP est vide) sont rendus.
+    """
+    for index, (limiter, key) in enumerate(buckets):
+        retry_after = limiter.acquire(key)
+        if retry_after > 0:
+            for taken_limiter, taken_key in buckets[:index]:
+                taken_limiter.refund(taken_key)
+            return retry_after
+    return 0.0
+
+
+def create_rate_limiter(
+    per_minute: Optional[float] = None,
+    burst: Optional[int] = None
+) -> Optional[TokenBucketLimiter]:
+    """
+    Limiteur configuré par l'environnement (None si désactivé)
+
+    Args:
+        per_minute: Requêtes par minute (RATE_LIMIT_PER_MINUTE, défaut 0 = désactivé)
+        burst: Rafale (RATE_LIMIT_BURST, défaut 10)
+    """
+    if per_minute is None:
+        per_minute = float(os.getenv("RATE_LIMIT_PER_MINUTE", "0"))
+    if per_minute <= 0:
+        return None
+    burst = burst or int(os.getenv("RATE_LIMIT_BURST", "10"))
+    store = os.getenv("RATE_LIMIT_STORE", "memory")
+    if store == "sqlite":
+        db_path = os.getenv("RATE_LIMIT_DB_PATH", "data/rate_limits.sqlite3")
+        logger.info(f"Limitation de débit partagée: {per_minute:g}/min, rafale {burst} ({db_path})")
+        return SQLiteTokenBucketLimiter(per_minute / 60, burst, db_path)
+    if store != "memory":
+        raise ValueError(f"RATE_LIMIT_STORE inconnu: {store} (memory ou sqlite)")
+    return TokenBucketLimiter(per_minute / 60, burst)
+
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI de limitation de débit par client et de concurrence
+
+    Ne s'applique qu'aux requêtes POST des chemins déclarés par les routeurs
+    (RATE_LIMITED_PATHS, CONCURRENCY_LIMITED_PATHS).
+    """
+
+    def __init__(
+        self,
+        app,
+        rate_limited_paths: Set[str],
+        concurrency_limited_paths: Set[str],
+        limiter: Optional[TokenBucketLimiter] = None,
+        max_inflight: Optional[int] = None,
+        key: Optional[str] = None,
+        ip_limiter: Optional[TokenBucketLimiter] = None
+    ):
+        """
+        Args:
+            app: Application ASGI
+            rate_limited_paths: Chemins soumis au seau de jetons du client
+            concurrency_limited_paths: Chemins comptés dans les identifications en cours
+            limiter: Seaux de jetons (create_rate_limiter() par défaut)
+            max_inflight: Identifications simultanées par worker (0 = illimité)
+            key: 'ip' ou 'session' (seau de l'en-tête X-Session-ID en plus de celui de l'IP)
+            ip_limiter: Seaux par IP en mode session (RATE_LIMIT_IP_PER_MINUTE,
+                RATE_LIMIT_IP_BURST ; par défaut les mêmes valeurs que limiter)
+        """
+        self.app = app
+        self.rate_limited_paths = rate_limited_paths
+        self.concurrency_limited_paths = concurrency_limited_paths
+        self.limiter = limiter if limiter is not None else create_rate_limiter()
+        self.max_inflight = max_inflight if max_inflight is not None else int(
+            os.getenv("MAX_INFLIGHT_IDENTIFICATIONS", "16")
+        )
+        self.key = key or os.getenv("RATE_LIMIT_KEY", "ip")
+        if self.key not in ("ip", "session"):
+            raise ValueError(f"RATE_LIMIT_KEY inconnu: {self.key} (ip ou session)")
+        self.ip_limiter = self.limiter
+        if self.key == "session" and self.limiter is not None:
+            # L'en-tête de session est choisi par le client : un identifiant
+            # neuf à chaque requête ne doit pas donner un seau plein
+            self.ip_limiter = ip_limiter if ip_limiter is not None else create_rate_limiter(
+                float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", str(self.limiter.rate * 60))),
+                int(os.getenv("RATE_LIMIT_IP_BURST", str(self.limiter.burst)))
+            )
+        self.trust_forwarded = os.getenv("TRUST_FORWARDED_FOR", "false").lower() in ("1", "true", "yes")
+        # Attente suggérée quand le worker est saturé
+        self.busy_retry_after = int(os.getenv("CONCURRENCY_RETRY_AFTER", "1"))
+        self.inflight = 0
+        INFLIGHT_IDENTIFICATIONS.set_function(lambda: self.inflight)
+
+    def client_buckets(self, scope) -> List[Tuple[TokenBucketLimiter, str]]:
+        """
+        Seaux à débiter pour la requête : session d'abord (mode session), puis IP
+
+        L'IP est X-Forwarded-For derrière un proxy de confiance. Le seau de
+        l'IP s'applique toujours, session ou non.
+        """
+        headers = dict(scope["headers"])
+        buckets = []
+        if self.key == "session":
+            session = headers.get(b"x-session-id")
+            if session:
+                buckets.append((self.limiter, "session:" + session.decode("latin-1")[:128]))
+        forwarded = headers.get(b"x-forwarded-for")
+        if self.trust_forwarded and forwarded:
+            ip = forwarded.decode("latin-1").split(",")[0].strip()
+        else:
+            client = scope.get("client")
+            ip = client[0] if client else "unknown"
+        if self.ip_limiter is not None:
+            buckets.append((self.ip_limiter, "ip:" + ip))
+        return buckets
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+
+        if self.limiter is not None and path in self.rate_limited_paths:
+            buckets = self.client_buckets(scope)
+            if self.limiter.shared:
+                retry_after = await asyncio.to_thread(_acquire_all, buckets)
+            else:
+                retry_after = _acquire_all(buckets)
+            if retry_after > 0:
+                await self._reject(
+                    scope, receive, send, 429, "rate_limit", retry_after,
+                    "Trop de requêtes, veuillez réessayer plus tard"
+                )
+                return
+
+        if self.max_inflight <= 0 or path not in self.concurrency_limited_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if self.inflight >= self.max_inflight:
+            await self._reject(
+                scope, receive, send, 503, "concurrency", self.busy_retry_after,
+                "Service saturé, veuillez réessayer plus tard"
+            )
+            return
+        self.inflight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.inflight -= 1
+
+    async def _reject(self, scope, receive, send, status: int, reason: str, retry_after: float, detail: str):
+        ADMISSION_REJECTIONS.inc(path=scope["path"], reason=reason)
+        response = JSONResponse(
+            status_code=status,
+            content={"detail": detail},
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+        await response(scope, receive, send)
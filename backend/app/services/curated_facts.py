@@ -0,0 +1,120 @@
+"""
+Faits médicinaux vérifiés pour enrichir les prompts du LLM
+
+Les propriétés (MedicinalProperty) et usages traditionnels (TraditionalUse)
+saisis dans l'admin Django arrivent avec la fiche plante (PlantCatalog).
+CuratedFactIndex les indexe par plante et par terme normalisé (minuscules,
+sans accents, racine de STEM_LENGTH lettres). Pour une question, seuls les
+faits qui partagent des termes avec elle sont retenus ; sans question (ou
+si aucun fait ne correspond), les faits les mieux établis. Le LLM résume
+alors des faits connus au lieu de tout générer.
+"""
+
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+STEM_LENGTH = 6
+EVIDENCE_ORDER = {"clinique": 0, "preliminaire": 1, "traditionnel": 2}
+STOPWORDS = {
+    "les", "des", "une", "est", "pour", "par", "avec", "dans", "sur", "aux",
+    "que", "qui", "quoi", "comment", "quel", "quelle", "quels", "quelles",
+    "plante", "contre", "chez", "mon", "mes", "son", "ses", "leur", "peut",
+    "utiliser", "traiter", "soigner",
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Minuscules sans accents"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def terms(text: str) -> Set[str]:
+    """Termes d'un texte : mots de 3 lettres ou plus, hors mots vides, tronqués à leur racine"""
+    return {
+        word[:STEM_LENGTH]
+        for word in _WORD.findall(normalize(text))
+        if len(word) >= 3 and word not in STOPWORDS
+    }
+
+
+class CuratedFactIndex:
+    """Index des faits vérifiés, par plante puis par terme"""
+
+    def __init__(self, max_facts: int = 0):
+        """
+        Args:
+            max_facts: Faits envoyés au plus par prompt (LLM_RAG_MAX_FACTS)
+        """
+        self.max_facts = max_facts or int(os.getenv("LLM_RAG_MAX_FACTS", "8"))
+        # plant_id -> (fiche indexée, faits, termes -> positions des faits)
+        self._plants: Dict[str, Tuple[Dict[str, Any], List[str], Dict[str, List[int]]]] = {}
+
+    def _entry(self, plant_info: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str], Dict[str, List[int]]]:
+        plant_id = plant_info.get("id")
+        entry = self._plants.get(plant_id)
+        # Le rechargement du catalogue remplace les fiches : index reconstruit
+        if entry is None or entry[0] is not plant_info:
+            entry = (plant_info, *_index(plant_info))
+            self._plants[plant_id] = entry
+        return entry
+
+    def retrieve(self, plant_info: Dict[str, Any], query: Optional[str] = None) -> List[str]:
+        """Faits de la plante pertinents pour la question, les plus pertinents d'abord"""
+        _, facts, postings = self._entry(plant_info)
+        if query:
+            scores = _scores(postings, query)
+            if scores:
+                ranked = sorted(scores, key=lambda position: (-scores[position], position))
+                return [facts[position] for position in ranked[:self.max_facts]]
+        return facts[:self.max_facts]
+
+    def coverage(self, plant_info: Dict[str, Any], query: Optional[str] = None) -> int:
+        """Faits de la plante qui répondent à la question (tous ses faits sans question)"""
+        _, facts, postings = self._entry(plant_info)
+        if query:
+            return len(_scores(postings, query))
+        return len(facts)
+
+
+def _scores(postings: Dict[str, List[int]], query: str) -> Counter:
+    """Nombre de termes de la question par fait (faits sans terme commun absents)"""
+    return Counter(
+        position
+        for term in terms(query)
+        for position in postings.get(term, ())
+    )
+
+
+def _index(plant_info: Dict[str, Any]) -> Tuple[List[str], Dict[str, List[int]]]:
+    """Faits rédigés (propriétés les mieux établies d'abord, puis usages) et leurs termes"""
+    facts: List[str] = []
+    postings: Dict[str, List[int]] = {}
+
+    def add(text: str, searchable: str):
+        for term in terms(searchable):
+            postings.setdefault(term, []).append(len(facts))
+        facts.append(text)
+
+    properties = sorted(
+        plant_info.get("medicinal_properties") or [],
+        key=lambda prop: EVIDENCE_ORDER.get(prop.get("evidence_level"), len(EVIDENCE_ORDER))
+    )
+    for prop in properties:
+        add(
+            f"Propriété {prop['type']} ({prop.get('evidence_level', 'traditionnel')}) : {prop['description']}",
+            f"{prop['type']} {prop['description']}"
+        )
+    for use in plant_info.get("traditional_uses") or []:
+        text = f"Usage contre {use['indication']} : {use['preparation']}"
+        if use.get("recipe"):
+            text += f", {use['recipe']}"
+        if use.get("region"):
+            text += f" ({use['region']})"
+        add(text, f"{use['indication']} {use['preparation']} {use.get('recipe') or ''}")
+    return facts, postings
@@ -0,0 +1,230 @@
+"""
+Index d'embeddings pour l'identification par plus proches voisins (kNN)
+Permet d'ajouter une espèce sans réentraîner le modèle de vision
+"""
+
+import os
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingIndex:
+    """
+    Index approximatif des plus proches voisins de type IVF (inverted file)
+
+    Les embeddings de référence sont normalisés (L2) et stockés dans une
+    matrice float16 compacte, triée par liste inversée pour que chaque
+    liste sondée corresponde à une tranche contiguë.
+    """
+
+    def __init__(self, n_probe: Optional[int] = None):
+        """
+        Initialise un index vide
+
+        Args:
+            n_probe: Nombre de listes inversées sondées par requête
+        """
+        self.n_probe = n_probe or int(os.getenv("KNN_N_PROBE", "4"))
+        self.plant_ids: List[str] = []
+        self.embeddings = np.zeros((0, 0), dtype=np.float16)
+        self.labels = np.zeros(0, dtype=np.int32)
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        # offsets[i]:offsets[i + 1] = tranche de la liste i dans embeddings
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self._built_size = 0
+
+    def __len__(self) -> int:
+        return int(self.embeddings.shape[0])
+
+    @property
+    def dim(self) -> int:
+        return int(self.embeddings.shape[1]) if len(self) else 0
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[np.newaxis, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _label_for(self, plant_id: str) -> int:
+        try:
+            return self.plant_ids.index(plant_id)
+        except ValueError:
+            self.plant_ids.append(plant_id)
+            return len(self.plant_ids) - 1
+
+    def add(self, plant_id: str, embeddings: np.ndarray):
+        """
+        Ajoute des embeddings de référence pour une plante
+
+        Les nouveaux vecteurs sont rangés dans la liste du centroïde le plus
+        proche ; les centroïdes sont recalculés quand l'index a doublé.
+
+        Args:
+            plant_id: ID de la plante (nouvelle ou existante)
+            embeddings: Matrice (n, dim) d'embeddings
+        """
+        vectors = self._normalize(embeddings)
+        if len(self) and vectors.shape[1] != self.dim:
+            raise ValueError(
+                f"Dimension d'embedding incompatible: {vectors.shape[1]} != {self.dim}"
+            )
+
+        label = self._label_for(plant_id)
+        all_vectors = np.concatenate(
+            [self.embeddings.astype(np.float32).reshape(-1, vectors.shape[1]), vectors]
+        )
+        all_labels = np.concatenate(
+            [self.labels, np.full(len(vectors), label, dtype=np.int32)]
+        )
+
+        if len(self.centroids) == 0 or len(all_vectors) >= 2 * max(self._built_size, 1):
+            self.build(all_vectors, all_labels)
+        else:
+            self._assign(all_vectors, all_labels)
+
+    def build(
+        self,
+        vectors: Optional[np.ndarray] = None,
+        labels: Optional[np.ndarray] = None,
+        n_lists: Optional[int] = None,
+        iterations: int = 10,
+        seed: int = 0
+    ):
+        """
+        (Re)construit les listes inversées par k-means sphérique
+
+        Args:
+            vectors: Embeddings normalisés (par défaut ceux de l'index)
+            labels: Labels associés
+            n_lists: Nombre de listes (par défaut ~sqrt(n))
+            iterations: Itérations de k-means
+            seed: Graine pour l'initialisation
+        """
+        if vectors is None:
+            vectors = self.embeddings.astype(np.float32)
+            labels = self.labels
+        if len(vectors) == 0:
+            return
+
+        n_lists = n_lists or max(1, int(np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            for i in range(n_lists):
+                members = vectors[assignments == i]
+                if len(members):
+                    centroids[i] = members.mean(axis=0)
+            centroids = self._normalize(centroids)
+
+        self.centroids = centroids.astype(np.float32)
+        self._built_size = len(vectors)
+        self._assign(vectors, labels)
+
+    def _assign(self, vectors: np.ndarray, labels: np.ndarray):
+        """Range les vecteurs par liste inversée (tri par centroïde le plus proche)"""
+        assignments = np.argmax(vectors @ self.centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        self.embeddings = vectors[order].astype(np.float16)
+        self.labels = np.asarray(labels, dtype=np.int32)[order]
+        counts = np.bincount(assignments, minlength=len(self.centroids))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def search(self, query: np.ndarray, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recherche les k plus proches voisins (similarité cosinus)
+
+        Args:
+            query: Embedding de requête (dim,)
+            k: Nombre de voisins
+
+        Returns:
+            (similarités, labels) triés par similarité décroissante
+        """
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int32)
+
+        q = self._normalize(query)[0]
+        n_probe = min(self.n_probe, len(self.centroids))
+        probed = np.argpartition(-(self.centroids @ q), n_probe - 1)[:n_probe]
+
+        candidates = np.concatenate([
+            np.arange(self.offsets[i], self.offsets[i + 1]) for i in probed
+        ])
+        if len(candidates) == 0:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int32)
+
+        scores = self.embeddings[candidates].astype(np.float32) @ q
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return scores[top], self.labels[candidates[top]]
+
+    def vote(self, query: np.ndarray, k: int = 10, min_similarity: float = 0.0) -> Dict[str, float]:
+        """
+        Score par plante issu des votes des k voisins
+
+        Chaque voisin au moins aussi similaire que `min_similarity` vote avec
+        sa similarité cosinus brute ; la somme est divisée par k, sans
+        renormalisation. Une plante indexée avec peu d'images, ou dont les
+        voisins sont peu similaires, garde un score faible au lieu de
+        recevoir toute la masse des votes.
+
+        Args:
+            query: Embedding de requête (dim,)
+            k: Nombre de voisins
+            min_similarity: Similarité minimale d'un voisin pour voter
+
+        Returns:
+            Dictionnaire plant_id -> score entre 0 et 1 (vide si aucun
+            voisin n'atteint le seuil)
+        """
+        scores, labels = self.search(query, k)
+        votes: Dict[str, float] = {}
+        for score, label in zip(scores, labels):
+            if score <= 0 or score < min_similarity:
+                continue
+            plant_id = self.plant_ids[label]
+            votes[plant_id] = votes.get(plant_id, 0.0) + float(score) / k
+        return votes
+
+    def save(self, path: str):
+        """Sauvegarde l'index au format .npz"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(
+            path,
+            embeddings=self.embeddings,
+            labels=self.labels,
+            centroids=self.centroids,
+            offsets=self.offsets,
+            plant_ids=np.array(self.plant_ids, dtype=str),
+            built_size=np.array(self._built_size)
+        )
+        logger.info(f"Index d'embeddings sauvegardé: {len(self)} vecteurs -> {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "EmbeddingIndex":
+        """Charge un index sauvegardé avec save()"""
+        data = np.load(path)
+        index = cls()
+        index.embeddings = data["embeddings"].astype(np.float16)
+        index.labels = data["labels"].astype(np.int32)
+        index.centroids = data["centroids"].astype(np.float32)
+        index.offsets = data["offsets"].astype(np.int64)
+        index.plant_ids = [str(p) for p in data["plant_ids"]]
+        index._built_size = int(data["built_size"])
+        logger.info(
+            f"Index d'embeddings chargé: {len(index)} vecteurs, "
+            f"{len(index.plant_ids)} plantes, {len(index.centroids)} listes"
+        )
+        return index
@@ -7,7 +7,8 @@ import os
 import json
 import hashlib
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Dict, Any
 from pathlib import Path
 import logging
 
@@ -22,6 +23,13 @@ from app.models.feedback_schemas import (
 
 logger = logging.getLogger(__name__)
 
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    # Windows : un seul processus écrit les feedbacks
+    FCNTL_AVAILABLE = False
+
 
 class FeedbackService:
     """Service de gestion des feedbacks"""
@@ -38,6 +46,7 @@ class FeedbackService:
             "data/feedbacks"
         ))
         self.feedbacks_file = self.storage_path / "feedbacks.json"
+        self.lock_file = self.storage_path / "feedbacks.lock"
         self.images_dir = self.storage_path / "images"
         
         # Créer les répertoires si nécessaire
@@ -46,10 +55,43 @@ class FeedbackService:
         
         # Charger les feedbacks existants
         self.feedbacks: List[Dict[str, Any]] = []
+        # Signature (mtime, taille) du fichier chargé, pour détecter les
+        # écritures des autres workers (serve.py lance plusieurs processus)
+        self._file_signature = None
         self.load_feedbacks()
     
+    def _signature(self):
+        try:
+            stat = self.feedbacks_file.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def refresh(self):
+        """Recharge les feedbacks si un autre processus a modifié le fichier"""
+        if self._signature() != self._file_signature:
+            self.load_feedbacks()
+    
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """
+        Verrou inter-processus des écritures : relit le fichier sous le verrou
+        pour ne pas écraser les feedbacks ajoutés par un autre worker
+        """
+        if not FCNTL_AVAILABLE:
+            yield
+            return
+        with open(self.lock_file, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self.refresh()
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    
     def load_feedbacks(self):
         """Charge les feedbacks depuis le fichier JSON"""
+        self._file_signature = self._signature()
         if self.feedbacks_file.exists():
             try:
                 with open(self.feedbacks_file, 'r', encoding='utf-8') as f:
@@ -64,8 +106,12 @@ class FeedbackService:
     def save_feedbacks(self):
         """Sauvegarde les feedbacks dans le fichier JSON"""
         try:
-            with open(self.feedbacks_file, 'w', encoding='utf-8') as f:
+            # Remplacement atomique : les autres workers ne lisent jamais un fichier partiel
+            tmp_file = self.feedbacks_file.with_suffix(".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
                 json.dump(self.feedbacks, f, indent=2, default=str, ensure_ascii=False)
+            os.replace(tmp_file, self.feedbacks_file)
+            self._file_signature = self._signature()
             logger.info(f"Sauvegardé {len(self.feedbacks)} feedbacks")
         except Exception as e:
             logger.error(f"Erreur lors de la sauvegarde: {e}")
@@ -106,30 +152,32 @@ class FeedbackService:
         Returns:
             ID du feedback créé
         """
-        # Générer un ID unique
-        feedback_id = f"fb_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{len(self.feedbacks)}"
-        feedback.id = feedback_id
-        
         # Sauvegarder l'image si fournie
         if image_bytes:
             image_path = self.save_image(image_bytes, feedback.image_hash)
             feedback.image_path = image_path
         
-        # Convertir en dict pour stockage
-        feedback_dict = feedback.model_dump()
-        feedback_dict['timestamp'] = feedback.timestamp.isoformat()
-        if feedback.curated_at:
-            feedback_dict['curated_at'] = feedback.curated_at.isoformat()
-        
-        # Ajouter au stockage
-        self.feedbacks.append(feedback_dict)
-        self.save_feedbacks()
+        with self._write_lock():
+            # Générer un ID unique
+            feedback_id = f"fb_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{len(self.feedbacks)}"
+            feedback.id = feedback_id
+            
+            # Convertir en dict pour stockage
+            feedback_dict = feedback.model_dump()
+            feedback_dict['timestamp'] = feedback.timestamp.isoformat()
+            if feedback.curated_at:
+                feedback_dict['curated_at'] = feedback.curated_at.isoformat()
+            
+            # Ajouter au stockage
+            self.feedbacks.append(feedback_dict)
+            self.save_feedbacks()
         
         logger.info(f"Nouveau feedback soumis: {feedback_id}")
         return feedback_id
     
     def get_feedback(self, feedback_id: str) -> Optional[Dict[str, Any]]:
         """Récupère un feedback par son ID"""
+        self.refresh()
         for fb in self.feedbacks:
             if fb.get('id') == feedback_id:
                 return fb
@@ -145,6 +193,7 @@ class FeedbackService:
         Returns:
             Liste des feedbacks correspondants
         """
+        self.refresh()
         results = self.feedbacks.copy()
         
         # Filtrer par statut
@@ -156,10 +205,11 @@ class FeedbackService:
             results = [fb for fb in results if fb.get('predicted_plant_id') == query.plant_id]
         
         # Filtrer par note
+        # (les feedbacks sans note sont stockés avec rating: null)
         if query.min_rating is not None:
-            results = [fb for fb in results if fb.get('rating', 0) >= query.min_rating]
+            results = [fb for fb in results if (fb.get('rating') or 0) >= query.min_rating]
         if query.max_rating is not None:
-            results = [fb for fb in results if fb.get('rating', 5) <= query.max_rating]
+            results = [fb for fb in results if (fb.get('rating') or 5) <= query.max_rating]
         
         # Filtrer par type
         if query.feedback_type:
@@ -198,21 +248,23 @@ class FeedbackService:
         Returns:
             True si la mise à jour a réussi
         """
-        for fb in self.feedbacks:
-            if fb.get('id') == feedback_id:
-                fb['status'] = status.value
-                if curator_notes:
-                    fb['curator_notes'] = curator_notes
-                if curated_by:
-                    fb['curated_by'] = curated_by
-                fb['curated_at'] = datetime.now().isoformat()
-                self.save_feedbacks()
-                logger.info(f"Feedback {feedback_id} mis à jour: {status.value}")
-                return True
+        with self._write_lock():
+            for fb in self.feedbacks:
+                if fb.get('id') == feedback_id:
+                    fb['status'] = status.value
+                    if curator_notes:
+                        fb['curator_notes'] = curator_notes
+                    if curated_by:
+                        fb['curated_by'] = curated_by
+                    fb['curated_at'] = datetime.now().isoformat()
+                    self.save_feedbacks()
+                    logger.info(f"Feedback {feedback_id} mis à jour: {status.value}")
+                    return True
         return False
     
     def get_stats(self) -> FeedbackStats:
         """Calcule les statistiques sur les feedbacks"""
+        self.refresh()
         total = len(self.feedbacks)
         pending = sum(1 for fb in self.feedbacks if fb.get('status') == FeedbackStatus.PENDING.value)
         approved = sum(1 for fb in self.feedbacks if fb.get('status') == FeedbackStatus.APPROVED.value)
@@ -277,6 +329,7 @@ class FeedbackService:
         Returns:
             Liste des entrées pour l'entraînement
         """
+        self.refresh()
         entries: List[TrainingDatasetEntry] = []
         
         # Filtrer les feedbacks
@@ -0,0 +1,151 @@
+"""
+Prétraitement des images pour l'inférence
+Module léger (PIL + numpy, sans TensorFlow) utilisable dans des processus
+workers : le pool de prétraitement décode les images hors du GIL du
+processus principal et renvoie les tenseurs via la mémoire partagée
+"""
+
+import io
+import os
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Taille d'entrée de MobileNetV2
+IMAGE_SIZE = (224, 224)
+TENSOR_SHAPE = (IMAGE_SIZE[1], IMAGE_SIZE[0], 3)
+TENSOR_BYTES = int(np.prod(TENSOR_SHAPE)) * np.dtype(np.float32).itemsize
+
+
+def preprocess_into(image_bytes: bytes, out: np.ndarray):
+    """
+    Décode, redimensionne et normalise une image dans un tableau existant
+
+    Args:
+        image_bytes: Image en bytes
+        out: Tableau float32 de forme (224, 224, 3) à remplir
+    """
+    # Charger l'image
+    image = Image.open(io.BytesIO(image_bytes))
+
+    # Convertir en RGB si nécessaire
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    # Redimensionner à 224x224 (taille d'entrée de MobileNetV2)
+    image = image.resize(IMAGE_SIZE)
+
+    # Normaliser les valeurs entre 0 et 1
+    np.divide(np.asarray(image, dtype=np.float32), np.float32(255.0), out=out)
+
+
+def preprocess(image_bytes: bytes) -> np.ndarray:
+    """
+    Prétraite une image pour l'inférence
+
+    Args:
+        image_bytes: Image en bytes
+
+    Returns:
+        Image prétraitée (1, 224, 224, 3), normalisée entre 0 et 1
+    """
+    out = np.empty((1,) + TENSOR_SHAPE, dtype=np.float32)
+    preprocess_into(image_bytes, out[0])
+    return out
+
+
+def _preprocess_to_shared_memory(shm_name: str, index: int, image_bytes: bytes) -> bool:
+    """
+    Tâche exécutée dans un processus worker : écrit le tenseur de l'image
+    dans l'emplacement `index` du bloc de mémoire partagée `shm_name`
+
+    Returns:
+        True si l'image a été décodée, False sinon
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        batch = np.ndarray((index + 1,) + TENSOR_SHAPE, dtype=np.float32, buffer=shm.buf)
+        preprocess_into(image_bytes, batch[index])
+        del batch
+        return True
+    except Exception:
+        return False
+    finally:
+        shm.close()
+
+
+class PreprocessPool:
+    """
+    Pool de processus pour le décodage et redimensionnement des images
+
+    Les workers reçoivent les bytes bruts et écrivent directement le tenseur
+    224x224x3 dans un bloc de mémoire partagée alloué par lot : seuls les
+    bytes de l'image et un booléen transitent par pickle.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Initialise le pool
+
+        Args:
+            workers: Nombre de processus (PREPROCESS_WORKERS, défaut: nombre de CPU)
+        """
+        self.workers = workers or int(os.getenv("PREPROCESS_WORKERS", "0")) or os.cpu_count() or 1
+        # 'spawn' : les workers n'héritent pas de l'état TensorFlow du parent
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        # Images soumises et pas encore prétraitées (file d'attente du pool)
+        self.pending = 0
+        self._pending_lock = threading.Lock()
+        logger.info(f"Pool de prétraitement démarré: {self.workers} processus")
+
+    def preprocess_batch(self, images: List[bytes]) -> List[Optional[np.ndarray]]:
+        """
+        Prétraite un lot d'images dans les processus workers
+
+        Args:
+            images: Images en bytes
+
+        Returns:
+            Liste alignée sur images de tenseurs (1, 224, 224, 3), None si illisible
+        """
+        if not images:
+            return []
+
+        shm = shared_memory.SharedMemory(create=True, size=TENSOR_BYTES * len(images))
+        with self._pending_lock:
+            self.pending += len(images)
+        try:
+            futures = [
+                self.executor.submit(_preprocess_to_shared_memory, shm.name, i, image_bytes)
+                for i, image_bytes in enumerate(images)
+            ]
+            decoded = [future.result() for future in futures]
+            batch = np.ndarray((len(images),) + TENSOR_SHAPE, dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            with self._pending_lock:
+                self.pending -= len(images)
+            shm.close()
+            shm.unlink()
+
+        return [batch[i:i + 1] if ok else None for i, ok in enumerate(decoded)]
+
+    async def preprocess_batch_async(self, images: List[bytes]) -> List[Optional[np.ndarray]]:
+        """Version asynchrone de preprocess_batch (attente hors de la boucle d'événements)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.preprocess_batch, images)
+
+    def shutdown(self):
+        """Arrête les processus workers"""
+        self.executor.shutdown(wait=True)
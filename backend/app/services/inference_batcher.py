@@ -0,0 +1,116 @@
+"""
+Regroupement des identifications concurrentes en un seul batch (micro-batching)
+
+Une passe avant sur n images coûte bien moins que n passes sur une image :
+les images soumises pendant une courte fenêtre (INFERENCE_BATCH_WINDOW_MS)
+passent ensemble dans le modèle. La fenêtre ajoute au plus sa durée à la
+latence d'une requête isolée ; plan_inference.py mesure le bon compromis.
+
+Toutes les passes avant du worker (batches de la fenêtre, lots, multi-vues,
+travaux, préchauffage) passent une par une dans un même thread d'inférence
+(InferenceThread) : chaque passe utilise déjà les pools intra/inter-op
+dimensionnés par plan_inference.py, deux passes simultanées
+surchargeraient le processeur.
+"""
+
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# predict_batch : (n, 224, 224, 3) -> (probabilités, embeddings ou None)
+PredictFunction = Callable[[np.ndarray], Tuple[np.ndarray, Optional[np.ndarray]]]
+
+
+class InferenceThread:
+    """Thread unique qui exécute les passes avant du modèle, une à la fois"""
+
+    def __init__(self):
+        # Thread créé à la première passe (après le fork des workers de serve.py)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+
+    async def run(self, function: Callable[..., Any], *args) -> Any:
+        """Exécute function(*args) dans le thread d'inférence sans bloquer la boucle"""
+        # Contexte propagé comme avec to_thread (durées rattachées à la requête)
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, context.run, function, *args
+        )
+
+    def run_sync(self, function: Callable[..., Any], *args) -> Any:
+        """Exécute function(*args) dans le thread d'inférence depuis un autre thread"""
+        return self._executor.submit(function, *args).result()
+
+    def shutdown(self):
+        """Arrête le thread d'inférence"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class InferenceBatcher:
+    """Accumule les images d'une fenêtre de temps et les prédit en un batch"""
+
+    def __init__(
+        self,
+        predict: PredictFunction,
+        window_ms: float,
+        max_batch_size: int = 32,
+        inference_thread: Optional[InferenceThread] = None
+    ):
+        """
+        Initialise le regroupement
+
+        Args:
+            predict: Passe avant sur un batch (VisionService.predict_batch)
+            window_ms: Attente maximale après la première image d'un batch
+            max_batch_size: Taille à partir de laquelle le batch part sans attendre
+            inference_thread: Thread des passes avant, partagé avec les autres
+                appels du modèle (propre au regroupement par défaut)
+        """
+        self.predict = predict
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.inference_thread = inference_thread or InferenceThread()
+        self._pending: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def submit(self, image: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Prédit une image prétraitée (1, 224, 224, 3) avec celles de la même fenêtre
+
+        Returns:
+            (probabilités de l'image, embedding ou None)
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((image, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[np.ndarray, asyncio.Future]]):
+        images = np.concatenate([image for image, _ in batch])
+        try:
+            predictions, embeddings = await self.inference_thread.run(self.predict, images)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for i, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result((predictions[i], embeddings[i] if embeddings is not None else None))
@@ -0,0 +1,71 @@
+"""
+Configuration d'inférence recommandée pour la machine
+
+plan_inference.py mesure les combinaisons (workers, threads intra/inter-op
+TensorFlow, fenêtre de regroupement) et écrit la meilleure dans
+models/inference_config.json. VisionService et serve.py l'appliquent au
+démarrage ; les variables d'environnement restent prioritaires.
+"""
+
+import os
+import json
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_PATH = "models/inference_config.json"
+
+# Clé de la configuration -> variable d'environnement prioritaire
+ENV_OVERRIDES = {
+    "workers": "WEB_CONCURRENCY",
+    "intra_op_threads": "TF_NUM_INTRAOP_THREADS",
+    "inter_op_threads": "TF_NUM_INTEROP_THREADS",
+    "batch_window_ms": "INFERENCE_BATCH_WINDOW_MS",
+    "max_batch_size": "INFERENCE_MAX_BATCH_SIZE",
+}
+
+
+def available_cpus() -> int:
+    """CPU utilisables par le processus (affinité du conteneur si disponible)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def load_inference_config(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Configuration recommandée (section 'recommended' du fichier)
+
+    Une configuration mesurée sur un nombre de CPU différent est ignorée :
+    elle ne correspond pas à la machine.
+
+    Returns:
+        Paramètres recommandés, vide si le fichier est absent ou ignoré
+    """
+    path = path or os.getenv("INFERENCE_CONFIG_PATH", DEFAULT_CONFIG_PATH)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Configuration d'inférence illisible {path}: {e}")
+        return {}
+
+    measured_cpus = data.get("host", {}).get("cpus")
+    if measured_cpus is not None and measured_cpus != available_cpus():
+        logger.warning(
+            f"Configuration d'inférence {path} mesurée sur {measured_cpus} CPU "
+            f"({available_cpus()} disponibles) : ignorée, relancer plan_inference.py"
+        )
+        return {}
+    return data.get("recommended", {})
+
+
+def inference_setting(config: Dict[str, Any], key: str, default: float) -> float:
+    """Valeur d'un paramètre : variable d'environnement, puis fichier, puis défaut"""
+    value = os.getenv(ENV_OVERRIDES[key])
+    if value:
+        return float(value)
+    return float(config.get(key, default))
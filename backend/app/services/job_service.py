@@ -0,0 +1,303 @@
+"""
+Service de travaux d'identification en masse
+File d'attente locale et pool de workers pour les archives ZIP d'images
+"""
+
+import os
+import csv
+import json
+import queue
+import re
+import uuid
+import zipfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Iterator, Tuple
+import logging
+
+from app.models.job_schemas import IdentificationJob, JobStatus, ResultFormat
+from app.services import metrics
+from app.services.upload_service import UploadRejected
+
+logger = logging.getLogger(__name__)
+
+# Format des identifiants créés par create_job (protège les lectures disque)
+JOB_ID_PATTERN = re.compile(r"job_\d{8}_\d{6}_[0-9a-f]{8}")
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif", ".tif", ".tiff"}
+
+CSV_COLUMNS = ["filename", "plant_id", "confidence", "alternatives", "error"]
+
+
+class JobService:
+    """Service de gestion des travaux d'identification"""
+
+    def __init__(
+        self,
+        vision_service,
+        storage_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        upload_service=None
+    ):
+        """
+        Initialise le service de travaux
+
+        Args:
+            vision_service: Service de vision utilisé pour l'identification
+            storage_path: Répertoire de stockage des archives et résultats
+            workers: Nombre de workers (threads) traitant les travaux
+            batch_size: Nombre d'images par passe avant du modèle
+            upload_service: Service de validation des en-têtes d'images (optionnel)
+        """
+        self.vision_service = vision_service
+        self.upload_service = upload_service
+        self.storage_path = Path(storage_path or os.getenv(
+            "JOB_STORAGE_PATH",
+            "data/jobs"
+        ))
+        self.workers = workers or int(os.getenv("JOB_WORKERS", "1"))
+        self.batch_size = batch_size or int(os.getenv("JOB_BATCH_SIZE", "32"))
+        self.max_image_bytes = int(os.getenv("JOB_MAX_IMAGE_BYTES", str(20 * 1024 * 1024)))
+
+        self.storage_path.mkdir(parents=True, exist_ok=True)
+
+        self.jobs: Dict[str, IdentificationJob] = {}
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        metrics.QUEUE_DEPTH.set_function(self._queue.qsize, queue="jobs")
+        self.load_jobs()
+
+    def load_jobs(self):
+        """Recharge les travaux existants ; ceux interrompus sont marqués en échec"""
+        for job_file in self.storage_path.glob("*/job.json"):
+            try:
+                job = IdentificationJob.model_validate_json(job_file.read_text(encoding="utf-8"))
+            except Exception as e:
+                logger.error(f"Travail illisible {job_file}: {e}")
+                continue
+            if job.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+                job.status = JobStatus.FAILED
+                job.error = "Travail interrompu par un redémarrage du serveur"
+                self._save_job(job)
+            self.jobs[job.id] = job
+        if self.jobs:
+            logger.info(f"Chargé {len(self.jobs)} travaux d'identification")
+
+    def job_dir(self, job_id: str) -> Path:
+        return self.storage_path / job_id
+
+    def archive_path(self, job_id: str) -> Path:
+        return self.job_dir(job_id) / "archive.zip"
+
+    def result_path(self, job: IdentificationJob) -> Path:
+        return self.job_dir(job.id) / f"results.{job.result_format.value}"
+
+    def _save_job(self, job: IdentificationJob):
+        path = self.job_dir(job.id) / "job.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(job.model_dump_json(indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def create_job(
+        self,
+        archive_name: Optional[str],
+        result_format: ResultFormat = ResultFormat.JSONL
+    ) -> IdentificationJob:
+        """
+        Crée un travail et son répertoire ; l'archive doit ensuite être écrite
+        dans archive_path(job.id) avant l'appel à submit()
+        """
+        job_id = f"job_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.job_dir(job_id).mkdir(parents=True, exist_ok=True)
+        return IdentificationJob(
+            id=job_id,
+            archive_name=archive_name,
+            result_format=result_format
+        )
+
+    def submit(self, job: IdentificationJob) -> IdentificationJob:
+        """
+        Met un travail en file d'attente
+
+        Raises:
+            ValueError: si l'archive n'est pas un fichier ZIP valide
+        """
+        archive = self.archive_path(job.id)
+        if not zipfile.is_zipfile(archive):
+            raise ValueError("L'archive doit être un fichier ZIP valide")
+
+        job.archive_size = archive.stat().st_size
+        with self._lock:
+            self.jobs[job.id] = job
+            self._save_job(job)
+        self._ensure_workers()
+        self._queue.put(job.id)
+        logger.info(f"Travail {job.id} en file d'attente ({job.archive_size} octets)")
+        return job
+
+    def discard(self, job: IdentificationJob):
+        """Supprime les fichiers d'un travail qui n'a pas pu être soumis"""
+        for path in self.job_dir(job.id).glob("*"):
+            path.unlink()
+        self.job_dir(job.id).rmdir()
+
+    def get_job(self, job_id: str) -> Optional[IdentificationJob]:
+        """
+        Récupère un travail par son ID
+
+        Un travail soumis à un autre worker (serve.py) n'est connu que par son
+        fichier job.json, que le worker propriétaire tient à jour.
+        """
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            return None
+        job_file = self.job_dir(job_id) / "job.json"
+        if not job_file.is_file():
+            return None
+        try:
+            return IdentificationJob.model_validate_json(job_file.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.error(f"Travail illisible {job_file}: {e}")
+            return None
+
+    def _ensure_workers(self):
+        """Démarre le pool de workers au premier travail soumis"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"identification-job-worker-{i}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker_loop(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self.process_job(self.jobs[job_id])
+            except Exception as e:
+                logger.error(f"Erreur inattendue sur le travail {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _iter_images(self, archive: zipfile.ZipFile, job: IdentificationJob) -> Iterator[Tuple[str, Optional[bytes], Optional[str]]]:
+        """
+        Lit les images une à une depuis l'archive, sans extraction sur disque
+
+        Yields:
+            (nom du fichier, bytes de l'image ou None, erreur éventuelle)
+        """
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir()
+            and not info.filename.startswith("__MACOSX/")
+            and Path(info.filename).suffix.lower() in IMAGE_EXTENSIONS
+        ]
+        job.total_images = len(members)
+
+        for info in members:
+            if info.file_size > self.max_image_bytes:
+                yield info.filename, None, f"Image trop volumineuse ({info.file_size} octets)"
+                continue
+            try:
+                image_bytes = archive.read(info)
+            except Exception as e:
+                yield info.filename, None, f"Lecture impossible: {e}"
+                continue
+            if self.upload_service is not None:
+                try:
+                    self.upload_service.inspect_image(image_bytes)
+                except UploadRejected as e:
+                    yield info.filename, None, e.detail
+                    continue
+            yield info.filename, image_bytes, None
+
+    def process_job(self, job: IdentificationJob):
+        """Traite un travail : identification par batch et écriture incrémentale"""
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.now()
+        self._save_job(job)
+
+        try:
+            with zipfile.ZipFile(self.archive_path(job.id)) as archive, \
+                    open(self.result_path(job), "w", encoding="utf-8", newline="") as output:
+                writer = _ResultWriter(output, job.result_format)
+                pending: List[Tuple[str, bytes]] = []
+
+                for filename, image_bytes, error in self._iter_images(archive, job):
+                    if error:
+                        writer.write({"filename": filename, "error": error})
+                        job.processed_images += 1
+                        job.failed_images += 1
+                        continue
+                    pending.append((filename, image_bytes))
+                    if len(pending) >= self.batch_size:
+                        self._process_batch(job, pending, writer)
+                        output.flush()
+                        self._save_job(job)
+                        pending = []
+
+                if pending:
+                    self._process_batch(job, pending, writer)
+
+            job.status = JobStatus.COMPLETED
+            logger.info(
+                f"Travail {job.id} terminé: {job.processed_images} images, "
+                f"{job.failed_images} échecs"
+            )
+        except Exception as e:
+            logger.error(f"Échec du travail {job.id}: {e}")
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.now()
+            self._save_job(job)
+
+    def _process_batch(self, job: IdentificationJob, batch: List[Tuple[str, bytes]], writer: "_ResultWriter"):
+        results = self.vision_service.identify_batch_sync([image for _, image in batch])
+        for (filename, _), image_results in zip(batch, results):
+            job.processed_images += 1
+            if not image_results:
+                job.failed_images += 1
+                writer.write({"filename": filename, "error": "Image illisible"})
+                continue
+            best = image_results[0]
+            writer.write({
+                "filename": filename,
+                "plant_id": best["plant_id"],
+                "confidence": round(best["confidence"], 4),
+                "alternatives": [
+                    {"plant_id": alt["plant_id"], "confidence": round(alt["confidence"], 4)}
+                    for alt in image_results[1:4]
+                ]
+            })
+
+
+class _ResultWriter:
+    """Écrit les résultats ligne par ligne en JSONL ou CSV"""
+
+    def __init__(self, output, result_format: ResultFormat):
+        self.output = output
+        self.result_format = result_format
+        self.csv_writer = None
+        if result_format == ResultFormat.CSV:
+            self.csv_writer = csv.DictWriter(output, fieldnames=CSV_COLUMNS)
+            self.csv_writer.writeheader()
+
+    def write(self, record: Dict):
+        if self.csv_writer:
+            row = dict(record)
+            if "alternatives" in row:
+                row["alternatives"] = json.dumps(row["alternatives"], ensure_ascii=False)
+            self.csv_writer.writerow(row)
+        else:
+            self.output.write(json.dumps(record, ensure_ascii=False) + "\n")
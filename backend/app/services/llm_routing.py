@@ -0,0 +1,120 @@
+"""
+Routes LLM : fournisseur + modèle, latence observée et disjoncteur
+
+Une route (ex. groq:llama-3.1-70b-versatile) garde les durées de ses
+derniers appels réussis pour estimer son p95 : LLMService envoie une
+requête couverte (hedged) vers la route de repli quand la route principale
+n'a pas répondu dans ce délai. Le disjoncteur cesse d'appeler une route
+après LLM_BREAKER_FAILURES échecs consécutifs, puis la réessaie avec un
+seul appel après LLM_BREAKER_RESET_SECONDS.
+"""
+
+import os
+import time
+import logging
+from collections import deque
+from typing import Any, Optional
+
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_STATE = metrics.REGISTRY.gauge(
+    "ivoire_llm_circuit_state",
+    "État du disjoncteur par route LLM (0 fermé, 1 semi-ouvert, 2 ouvert)",
+    ["route"]
+)
+
+
+class CircuitBreaker:
+    """Disjoncteur : fermé, ouvert après N échecs consécutifs, semi-ouvert après le délai"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    _GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None, reset_seconds: Optional[float] = None):
+        """
+        Args:
+            name: Nom de la route (étiquette des métriques et des logs)
+            failure_threshold: Échecs consécutifs avant ouverture (LLM_BREAKER_FAILURES)
+            reset_seconds: Durée d'ouverture avant un appel d'essai (LLM_BREAKER_RESET_SECONDS)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold or int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+        self.reset_seconds = reset_seconds if reset_seconds is not None else float(
+            os.getenv("LLM_BREAKER_RESET_SECONDS", "30")
+        )
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._set_state(self.CLOSED)
+
+    def _set_state(self, state: str):
+        self.state = state
+        CIRCUIT_STATE.set(self._GAUGE[state], route=self.name)
+
+    def allow(self) -> bool:
+        """La route peut-elle être appelée ? (semi-ouvert : un seul appel d'essai)"""
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self._trial_running = False
+        if self.state != self.CLOSED:
+            logger.info(f"Route LLM {self.name} rétablie")
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    f"Route LLM {self.name} coupée après {self.failures} échec(s) "
+                    f"(nouvel essai dans {self.reset_seconds:g}s)"
+                )
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def release(self):
+        """Appel annulé (requête couverte perdante) : ni succès ni échec"""
+        self._trial_running = False
+
+
+class LLMRoute:
+    """Un client de fournisseur et un modèle"""
+
+    def __init__(self, client_type: str, client: Any, model_name: str, window: int = 200):
+        """
+        Args:
+            client_type: 'groq' ou 'openai'
+            client: Client asynchrone du fournisseur (AsyncGroq, AsyncOpenAI)
+            model_name: Modèle appelé
+            window: Nombre de durées gardées pour le p95
+        """
+        self.client_type = client_type
+        self.client = client
+        self.model_name = model_name
+        self.name = f"{client_type}:{model_name}"
+        self.breaker = CircuitBreaker(self.name)
+        self.latencies: deque = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        """Durée d'un appel réussi"""
+        self.latencies.append(seconds)
+
+    def latency_quantile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        """Quantile des dernières durées, None tant qu'elles sont trop peu nombreuses"""
+        if len(self.latencies) < min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
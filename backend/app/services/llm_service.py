@@ -4,21 +4,61 @@ Utilise Groq avec Llama pour des performances rapides
 """
 
 import os
-import json
+import time
+import asyncio
+import hashlib
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple, Type
+
+from pydantic import BaseModel
+
+from app.models.schemas import MedicinalInfo, MedicinalProperty, TraditionalUse
+from app.services import metrics, slow_requests
+from app.services.curated_facts import CuratedFactIndex, terms
+from app.services.llm_routing import LLMRoute
+from app.services.medicinal_store import MedicinalStore, prompt_fingerprint
+from app.services.semantic_cache import SemanticCache
+from app.services.single_flight import SingleFlight
+from app.services.structured_output import compact_schema, parse_tolerant, strict_json_schema
 
 logger = logging.getLogger(__name__)
 
 # Essayer d'importer Groq, fallback vers OpenAI si nécessaire
 try:
-    from groq import Groq
+    from groq import AsyncGroq
     GROQ_AVAILABLE = True
 except ImportError:
     GROQ_AVAILABLE = False
     logger.warning("Groq non disponible, installation requise: pip install groq")
 
 
+# Modes de sortie : 'text' (JSON demandé en texte libre), 'json' (mode JSON
+# du fournisseur) ou 'json_schema' (sortie contrainte par le schéma strict)
+OUTPUT_MODES = ("text", "json", "json_schema")
+STRUCTURED_MAX_TOKENS = 900
+# Rédigée localement à partir des autres champs dans les modes JSON
+LOCAL_FIELDS = ("formatted_response",)
+MEDICINAL_SCHEMA = compact_schema(MedicinalInfo, exclude=LOCAL_FIELDS)
+MEDICINAL_JSON_SCHEMA = strict_json_schema(MedicinalInfo, exclude=LOCAL_FIELDS)
+
+# Modèle de repli par défaut (requêtes couvertes et bascule) selon le fournisseur
+DEFAULT_FALLBACK_MODELS = {"groq": "llama-3.1-8b-instant"}
+
+SYSTEM_PROMPTS = {
+    "groq": (
+        "Tu es un expert en plantes médicinales africaines. "
+        "Tu fournis des informations précises, basées sur les connaissances "
+        "traditionnelles et scientifiques, avec des avertissements de sécurité. "
+        "Réponds toujours en français."
+    ),
+    "openai": (
+        "Tu es un expert en plantes médicinales africaines. "
+        "Tu fournis des informations précises, basées sur les connaissances "
+        "traditionnelles et scientifiques, avec des avertissements de sécurité."
+    ),
+}
+
+
 class LLMService:
     """Service de génération de texte avec LLM (Groq/Llama)"""
     
@@ -34,31 +74,101 @@ class LLMService:
         self.client = None
         self.client_type = None
         
-        # Initialiser Groq si disponible et configuré
-        if self.provider == "groq" and GROQ_AVAILABLE:
-            if self.groq_api_key:
+        # Texte libre par défaut ; modes JSON sur option (prompt et réponse différents)
+        self.output_mode = os.getenv("LLM_OUTPUT_MODE", "text")
+        if self.output_mode not in OUTPUT_MODES:
+            raise ValueError(f"LLM_OUTPUT_MODE inconnu: {self.output_mode} ({', '.join(OUTPUT_MODES)})")
+        # Budget de la réponse (0 = selon le mode de sortie)
+        self.max_tokens = int(os.getenv("LLM_MAX_TOKENS", "0"))
+        
+        # Faits vérifiés du catalogue Django ajoutés au prompt (le LLM les résume), sur option
+        self.rag_enabled = os.getenv("LLM_RAG", "false").lower() in ("1", "true", "yes")
+        self.facts = CuratedFactIndex()
+        
+        # Route principale puis route de repli (autre modèle ou autre fournisseur)
+        self._clients: Dict[str, Any] = {}
+        self._route_cache: Dict[str, Optional[LLMRoute]] = {}
+        self.routes: List[LLMRoute] = []
+        fallback_provider = os.getenv("LLM_FALLBACK_PROVIDER", self.provider)
+        fallback_model = os.getenv("LLM_FALLBACK_MODEL", DEFAULT_FALLBACK_MODELS.get(fallback_provider, ""))
+        candidates = [(self.provider, self.model_name)]
+        if fallback_model and (fallback_provider, fallback_model) != (self.provider, self.model_name):
+            candidates.append((fallback_provider, fallback_model))
+        for provider, model_name in candidates:
+            route = self._route(provider, model_name)
+            if route is not None:
+                self.routes.append(route)
+        if self.routes:
+            self.client = self.routes[0].client
+            self.client_type = self.routes[0].client_type
+        
+        # Niveaux de modèles : 'large' (LLM_MODEL) par défaut, 'fast' pour les
+        # demandes simples auxquelles répondent les faits vérifiés du catalogue
+        self.tiers: Dict[str, List[LLMRoute]] = {"large": self.routes}
+        self.keyword_max_terms = int(os.getenv("LLM_KEYWORD_MAX_TERMS", "3"))
+        fast_provider = os.getenv("LLM_FAST_PROVIDER", self.provider)
+        fast_model = os.getenv("LLM_FAST_MODEL", DEFAULT_FALLBACK_MODELS.get(fast_provider, ""))
+        # Sur option : le trafic part vers un autre modèle que LLM_MODEL
+        tier_routing = os.getenv("LLM_TIER_ROUTING", "false").lower() in ("1", "true", "yes")
+        if tier_routing and fast_model and (fast_provider, fast_model) != (self.provider, self.model_name):
+            fast_route = self._route(fast_provider, fast_model)
+            if fast_route is not None:
+                # Repli du niveau rapide : le grand modèle
+                self.tiers["fast"] = [fast_route] + [route for route in self.routes if route is not fast_route]
+        
+        # Requête couverte vers la route de repli si la principale n'a pas
+        # répondu dans son p95 (LLM_HEDGE_DELAY_MS tant qu'il n'est pas mesuré).
+        # Sur option : un appel couvert peut doubler le coût de la requête
+        self.hedge_enabled = os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes")
+        self.hedge_delay = float(os.getenv("LLM_HEDGE_DELAY_MS", "2000")) / 1000
+        
+        if not self.client:
+            logger.warning("Aucun client LLM configuré. Mode mock activé.")
+        
+        # Même prompt demandé en même temps (rafales sur une plante) : un seul appel
+        self.medicinal_flight = SingleFlight("medicinal_info")
+        
+        # Fiches par défaut pré-générées (pregenerate_medicinal.py), servies sans appel LLM
+        self.medicinal_store = MedicinalStore()
+        
+        # Questions des utilisateurs : réponse d'une question proche pour la même plante
+        self.semantic_cache = SemanticCache()
+    
+    def _route(self, provider: str, model_name: str) -> Optional[LLMRoute]:
+        """Route d'un modèle, partagée par les niveaux qui l'utilisent (None sans client)"""
+        name = f"{provider}:{model_name}"
+        if name not in self._route_cache:
+            client = self._create_client(provider)
+            self._route_cache[name] = LLMRoute(provider, client, model_name) if client is not None else None
+            if client is not None:
+                logger.info(f"Service LLM {provider} initialisé avec {model_name}")
+        return self._route_cache[name]
+    
+    def _create_client(self, provider: str):
+        """Client asynchrone d'un fournisseur, partagé par ses routes (None si indisponible)"""
+        if provider in self._clients:
+            return self._clients[provider]
+        client = None
+        if provider == "groq":
+            if not GROQ_AVAILABLE:
+                pass
+            elif self.groq_api_key:
                 try:
-                    self.client = Groq(api_key=self.groq_api_key)
-                    self.client_type = "groq"
-                    logger.info(f"Service LLM Groq initialisé avec {self.model_name}")
+                    client = AsyncGroq(api_key=self.groq_api_key)
                 except Exception as e:
                     logger.error(f"Erreur lors de l'initialisation du client Groq: {e}")
             else:
                 logger.warning("GROQ_API_KEY non définie. Vérifiez votre fichier .env")
-        # Fallback vers OpenAI si configuré
-        elif self.provider == "openai" and self.openai_api_key:
+        elif provider == "openai" and self.openai_api_key:
             try:
-                from openai import OpenAI
-                self.client = OpenAI(api_key=self.openai_api_key)
-                self.client_type = "openai"
-                logger.info(f"Service LLM OpenAI initialisé avec {self.model_name}")
+                from openai import AsyncOpenAI
+                client = AsyncOpenAI(api_key=self.openai_api_key)
             except ImportError:
                 logger.warning("OpenAI non installé, installation requise: pip install openai")
             except Exception as e:
                 logger.error(f"Erreur lors de l'initialisation du client OpenAI: {e}")
-        
-        if not self.client:
-            logger.warning("Aucun client LLM configuré. Mode mock activé.")
+        self._clients[provider] = client
+        return client
     
     def is_ready(self) -> bool:
         """Vérifie si le service est prêt"""
@@ -79,67 +189,212 @@ class LLMService:
         Returns:
             Dictionnaire avec les informations médicinales structurées
         """
+        prompt = self._build_prompt(plant_info, user_query)
+        if not user_query and self.medicinal_store.enabled:
+            # Fiche par défaut : pré-générée, sauf plante modifiée depuis
+            stored = self.medicinal_store.get(plant_info.get("id"), prompt_fingerprint(prompt))
+            metrics.cache_access("medicinal_store", stored is not None)
+            if stored is not None:
+                slow_requests.annotate(llm_provider="store")
+                return stored
+        
         if not self.client:
+            metrics.LLM_REQUESTS.inc(provider="mock", outcome="mock")
+            slow_requests.annotate(llm_provider="mock")
             return self._generate_mock_info(plant_info, user_query)
         
+        if user_query and self.semantic_cache.enabled:
+            cached = self.semantic_cache.get(plant_info.get("id"), self._plant_context(plant_info), user_query)
+            metrics.cache_access("semantic_query", cached is not None)
+            if cached is not None:
+                slow_requests.annotate(llm_provider="semantic_cache")
+                return cached
+        
+        kind, tier = self.classify(plant_info, user_query)
+        metrics.LLM_ROUTED.inc(kind=kind, tier=tier)
+        key = hashlib.sha256(f"{tier}:{self.tiers[tier][0].name}:{prompt}".encode()).hexdigest()
+        return await self.medicinal_flight.do(key, lambda: self._generate(plant_info, user_query, prompt, tier))
+    
+    def _plant_context(self, plant_info: Dict[str, Any]) -> str:
+        """Empreinte de la fiche plante et des faits envoyés au LLM (réponses en cache périmées si elle change)"""
+        return prompt_fingerprint(self._build_prompt(plant_info, None))
+    
+    def classify(self, plant_info: Dict[str, Any], user_query: Optional[str]) -> Tuple[str, str]:
+        """
+        Type de la demande et niveau de modèle qui la traite
+        
+        Types : none (fiche par défaut), keyword (au plus LLM_KEYWORD_MAX_TERMS
+        termes, sans point d'interrogation) ou question (texte libre). Les
+        demandes none et keyword vont au modèle rapide quand des faits
+        vérifiés du catalogue y répondent (le LLM n'a qu'à les résumer) ;
+        les questions et les demandes non couvertes, au grand modèle.
+        
+        Returns:
+            (type, niveau : 'fast' ou 'large')
+        """
+        if not user_query:
+            kind = "none"
+        elif "?" not in user_query and len(terms(user_query)) <= self.keyword_max_terms:
+            kind = "keyword"
+        else:
+            kind = "question"
+        covered = self.rag_enabled and self.facts.coverage(plant_info, user_query) > 0
+        tier = "fast" if kind != "question" and covered and "fast" in self.tiers else "large"
+        return kind, tier
+    
+    async def _generate(
+        self,
+        plant_info: Dict[str, Any],
+        user_query: Optional[str],
+        prompt: str,
+        tier: str = "large"
+    ) -> Dict[str, Any]:
+        """Appelle le LLM pour un prompt (exécuté une fois par prompt en cours)"""
+        routes = [route for route in self.tiers[tier] if route.breaker.allow()]
+        if not routes:
+            # Toutes les routes coupées : réponse immédiate plutôt qu'un appel voué à l'échec
+            metrics.LLM_REQUESTS.inc(provider="mock", outcome="circuit_open")
+            slow_requests.annotate(llm_provider="mock")
+            return self._generate_mock_info(plant_info, user_query)
         try:
-            # Construire le prompt
-            prompt = self._build_prompt(plant_info, user_query)
+            start = time.perf_counter()
+            route, response = await self._complete(prompt, routes)
+            metrics.LLM_TIER_SECONDS.observe(time.perf_counter() - start, tier=tier)
             
-            # Appeler l'API (Groq ou OpenAI)
-            if self.client_type == "groq":
-                response = self.client.chat.completions.create(
-                    model=self.model_name,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": (
-                                "Tu es un expert en plantes médicinales africaines. "
-                                "Tu fournis des informations précises, basées sur les connaissances "
-                                "traditionnelles et scientifiques, avec des avertissements de sécurité. "
-                                "Réponds toujours en français."
-                            )
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    temperature=0.7,
-                    max_tokens=2000,
-                    top_p=0.9
+            # Parser la réponse
+            choice = response.choices[0]
+            content = choice.message.content
+            truncated = getattr(choice, "finish_reason", None) == "length"
+            if truncated:
+                logger.warning(
+                    f"Réponse LLM tronquée à {self.completion_budget(route.client_type)} tokens, "
+                    "réparée par le parseur"
                 )
-            elif self.client_type == "openai":
-                response = self.client.chat.completions.create(
-                    model=self.model_name,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": (
-                                "Tu es un expert en plantes médicinales africaines. "
-                                "Tu fournis des informations précises, basées sur les connaissances "
-                                "traditionnelles et scientifiques, avec des avertissements de sécurité."
-                            )
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    temperature=0.7,
-                    max_tokens=1500
+            usage = getattr(response, "usage", None)
+            slow_requests.annotate(llm_provider=route.client_type, llm_model=route.model_name, llm_tier=tier)
+            if usage is not None:
+                slow_requests.add_tokens(usage.prompt_tokens, usage.completion_tokens)
+                metrics.LLM_TOKENS.inc(usage.prompt_tokens, provider=route.client_type, tier=tier, kind="prompt")
+                metrics.LLM_TOKENS.inc(
+                    usage.completion_tokens, provider=route.client_type, tier=tier, kind="completion"
                 )
-            else:
-                return self._generate_mock_info(plant_info, user_query)
-            
-            # Parser la réponse
-            content = response.choices[0].message.content
-            return self._parse_llm_response(content, plant_info)
+            metrics.LLM_REQUESTS.inc(provider=route.client_type, outcome="success")
+            info = self._parse_llm_response(content, plant_info)
+            # Réponse tronquée ou illisible (données fictives) : jamais gardée
+            if user_query and not truncated and parse_tolerant(content or "") is not None:
+                self.semantic_cache.put(plant_info.get("id"), self._plant_context(plant_info), user_query, info)
+            return info
             
         except Exception as e:
             logger.error(f"Erreur lors de la génération LLM: {e}")
             return self._generate_mock_info(plant_info, user_query)
     
+    async def _complete(self, prompt: str, routes: Optional[List[LLMRoute]] = None) -> Tuple[LLMRoute, Any]:
+        """
+        Appel chat completions avec requête couverte et bascule
+        
+        La route principale est appelée seule ; si elle n'a pas répondu dans
+        son p95, la route de repli est appelée aussi et la première réponse
+        l'emporte (l'autre requête est annulée). Si la principale échoue
+        avant, la route de repli prend le relais.
+        
+        Args:
+            prompt: Prompt utilisateur
+            routes: Routes autorisées par leur disjoncteur (toutes par défaut)
+        
+        Returns:
+            (route qui a répondu, réponse du fournisseur)
+        """
+        if routes is None:
+            routes = [route for route in self.routes if route.breaker.allow()]
+        if not routes:
+            raise RuntimeError("Aucune route LLM disponible")
+        spare = list(routes[1:])
+        pending: Dict[asyncio.Future, LLMRoute] = {
+            asyncio.ensure_future(self._call(routes[0], prompt)): routes[0]
+        }
+        hedged = False
+        error: Optional[BaseException] = None
+        try:
+            with metrics.stage("llm"):
+                if spare and self.hedge_enabled:
+                    delay = routes[0].latency_quantile(0.95) or self.hedge_delay
+                    done, _ = await asyncio.wait(pending, timeout=delay)
+                    if not done:
+                        metrics.LLM_HEDGES.inc(outcome="sent")
+                        hedged = True
+                        route = spare.pop(0)
+                        pending[asyncio.ensure_future(self._call(route, prompt))] = route
+                
+                while pending:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        route = pending.pop(task)
+                        if task.exception() is None:
+                            if hedged:
+                                metrics.LLM_HEDGES.inc(outcome="won" if route is not routes[0] else "lost")
+                            return route, task.result()
+                        error = task.exception()
+                    if not pending and spare:
+                        metrics.LLM_HEDGES.inc(outcome="failover")
+                        route = spare.pop(0)
+                        pending[asyncio.ensure_future(self._call(route, prompt))] = route
+            raise error
+        finally:
+            # Requête perdante annulée (la connexion HTTP est fermée)
+            for task, route in pending.items():
+                task.cancel()
+                route.breaker.release()
+            for route in spare:
+                route.breaker.release()
+    
+    async def _call(self, route: LLMRoute, prompt: str):
+        """Un appel sur une route, comptabilisé par son disjoncteur et sa latence"""
+        start = time.perf_counter()
+        try:
+            response = await route.client.chat.completions.create(**self._completion_kwargs(prompt, route))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Échec de la route LLM {route.name}: {e}")
+            route.breaker.record_failure()
+            metrics.LLM_REQUESTS.inc(provider=route.client_type, outcome="error")
+            raise
+        route.observe(time.perf_counter() - start)
+        route.breaker.record_success()
+        return response
+    
+    def completion_budget(self, client_type: Optional[str] = None) -> int:
+        """max_tokens de la réponse : LLM_MAX_TOKENS, sinon selon le mode de sortie"""
+        if self.max_tokens:
+            return self.max_tokens
+        if self.output_mode != "text":
+            # Pas de formatted_response à générer : le JSON seul tient en moins de tokens
+            return STRUCTURED_MAX_TOKENS
+        return 2000 if (client_type or self.client_type) == "groq" else 1500
+    
+    def _completion_kwargs(self, prompt: str, route: LLMRoute) -> Dict[str, Any]:
+        """Paramètres de l'appel chat completions selon la route et le mode de sortie"""
+        kwargs: Dict[str, Any] = {
+            "model": route.model_name,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPTS[route.client_type]},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7,
+            "max_tokens": self.completion_budget(route.client_type)
+        }
+        if route.client_type == "groq":
+            kwargs["top_p"] = 0.9
+        if self.output_mode == "json":
+            kwargs["response_format"] = {"type": "json_object"}
+        elif self.output_mode == "json_schema":
+            kwargs["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "medicinal_info", "strict": True, "schema": MEDICINAL_JSON_SCHEMA}
+            }
+        return kwargs
+    
     def _build_prompt(self, plant_info: Dict, user_query: Optional[str]) -> str:
         """Construit le prompt pour le LLM"""
         base_info = f"""
@@ -148,6 +403,23 @@ Nom commun: {plant_info.get('common_names', {}).get('fr', 'N/A')}
 Famille: {plant_info.get('family', 'N/A')}
 Description: {plant_info.get('description', 'N/A')}
 Parties utilisées: {', '.join(plant_info.get('parts_used', []))}
+"""
+        facts = self.facts.retrieve(plant_info, user_query) if self.rag_enabled else []
+        if facts:
+            base_info += (
+                "\nFaits vérifiés (catalogue ivoire.ai):\n"
+                + "\n".join(f"- {fact}" for fact in facts)
+                + "\nRésume uniquement ces faits, sans en ajouter ; s'ils ne répondent pas "
+                "à la demande, indique-le dans summary.\n"
+            )
+        
+        if self.output_mode != "text":
+            focus = f"\nL'utilisateur recherche des informations spécifiques sur: {user_query}\n" if user_query else ""
+            return f"""
+{base_info}{focus}
+Réponds uniquement par un objet JSON de la forme:
+{MEDICINAL_SCHEMA}
+evidence_level: traditionnel, preliminaire ou clinique. Phrases concises, au plus 5 éléments par liste.
 """
         
         if user_query:
@@ -186,34 +458,54 @@ Génère une réponse structurée en JSON avec toutes les informations médicina
         return prompt
     
     def _parse_llm_response(self, content: str, plant_info: Dict) -> Dict[str, Any]:
-        """Parse la réponse du LLM en JSON structuré"""
+        """
+        Parse la réponse du LLM en JSON structuré
+        
+        Le premier objet JSON est extrait du texte (bloc ```json, phrase
+        d'introduction) et réparé s'il a été tronqué par max_tokens : les
+        valeurs complètes sont gardées plutôt que de basculer sur le mock.
+        """
         try:
-            # Essayer d'extraire le JSON de la réponse
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group())
-            else:
+            data = parse_tolerant(content)
+            if data is None:
                 # Fallback: créer une structure basique
                 data = {
                     "summary": content[:200],
                     "formatted_response": content
                 }
             
-            return {
-                "summary": data.get("summary", ""),
-                "properties": data.get("properties", []),
-                "traditional_uses": data.get("traditional_uses", []),
-                "diseases_treated": data.get("diseases_treated", []),
-                "preparation_methods": data.get("preparation_methods", []),
-                "precautions": data.get("precautions", []),
-                "warnings": data.get("warnings", []),
-                "formatted_response": data.get("formatted_response", content)
+            info = {
+                "summary": _text(data.get("summary")),
+                "properties": _objects(data.get("properties"), MedicinalProperty),
+                "traditional_uses": _objects(data.get("traditional_uses"), TraditionalUse),
+                "diseases_treated": _strings(data.get("diseases_treated")),
+                "preparation_methods": _strings(data.get("preparation_methods")),
+                "precautions": _strings(data.get("precautions")),
+                "warnings": _strings(data.get("warnings")),
             }
+            formatted = data.get("formatted_response")
+            if not isinstance(formatted, str) or not formatted.strip():
+                formatted = self._format_response(info, plant_info)
+            info["formatted_response"] = formatted
+            return info
         except Exception as e:
             logger.error(f"Erreur lors du parsing de la réponse LLM: {e}")
             return self._generate_mock_info(plant_info, None)
     
+    def _format_response(self, info: Dict[str, Any], plant_info: Dict) -> str:
+        """Réponse rédigée localement à partir des champs (modes JSON)"""
+        sections = [f"{plant_info.get('scientific_name', 'Cette plante')} : {info['summary']}".strip()]
+        if info["traditional_uses"]:
+            uses = [
+                f"- {use['indication']} : {use['preparation']}" + (f" ({use['recipe']})" if use.get("recipe") else "")
+                for use in info["traditional_uses"]
+            ]
+            sections.append("Usages traditionnels :\n" + "\n".join(uses))
+        for title, field in (("Précautions", "precautions"), ("Avertissements", "warnings")):
+            if info[field]:
+                sections.append(f"{title} :\n" + "\n".join(f"- {item}" for item in info[field]))
+        return "\n\n".join(sections)
+    
     def _generate_mock_info(self, plant_info: Dict, user_query: Optional[str]) -> Dict[str, Any]:
         """Génère des informations mock pour le développement"""
         return {
@@ -243,3 +535,32 @@ Génère une réponse structurée en JSON avec toutes les informations médicina
             )
         }
 
+
+def _text(value: Any) -> str:
+    return value.strip() if isinstance(value, str) else ""
+
+
+def _strings(value: Any) -> List[str]:
+    """Liste de chaînes (une chaîne seule est acceptée)"""
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    return [str(item) for item in value if isinstance(item, (str, int, float)) and str(item).strip()]
+
+
+def _objects(value: Any, model: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """Objets complets (tous les champs requis de model), un objet tronqué est écarté"""
+    if not isinstance(value, list):
+        return []
+    required = [name for name, field in model.model_fields.items() if field.is_required()]
+    objects = []
+    for item in value:
+        if not isinstance(item, dict) or not all(isinstance(item.get(name), str) for name in required):
+            continue
+        objects.append({
+            name: item[name]
+            for name in model.model_fields
+            if isinstance(item.get(name), str)
+        })
+    return objects
@@ -0,0 +1,158 @@
+"""
+Fiches médicinales pré-générées pour le catalogue
+
+La plupart des demandes d'informations médicinales portent sur la fiche par
+défaut (sans question de l'utilisateur) d'un petit nombre de plantes.
+pregenerate_medicinal.py génère hors ligne cette fiche pour chaque plante
+du catalogue et l'écrit dans un fichier JSON versionné
+(MEDICINAL_STORE_PATH) ; LLMService la sert sans appeler le LLM.
+
+Chaque fiche garde l'empreinte du prompt qui l'a produite (fiche plante et
+mode de sortie) : une plante modifiée dans l'admin Django, ou un autre
+LLM_OUTPUT_MODE, rend sa fiche périmée et la génération repasse par le LLM.
+Le fichier est relu quand il est remplacé, sans redémarrer l'API, dans un
+thread : la boucle d'événements n'attend pas le décodage JSON.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Version du format du fichier (un fichier d'un autre format est ignoré)
+STORE_FORMAT = 1
+
+
+def prompt_fingerprint(prompt: str) -> str:
+    """Empreinte du prompt qui a produit une fiche"""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class MedicinalStore:
+    """Fichier des fiches médicinales pré-générées, indexé par plant_id"""
+
+    def __init__(self, path: Optional[str] = None, check_interval: Optional[float] = None):
+        """
+        Args:
+            path: Fichier JSON des fiches (MEDICINAL_STORE_PATH, vide = désactivé)
+            check_interval: Intervalle (secondes) de vérification d'un nouveau fichier
+        """
+        self.path = path if path is not None else os.getenv(
+            "MEDICINAL_STORE_PATH",
+            "data/medicinal_store.json"
+        )
+        self.check_interval = check_interval if check_interval is not None else float(
+            os.getenv("MEDICINAL_STORE_CHECK_INTERVAL", "5")
+        )
+        self.version = 0
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._mtime: Optional[float] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        if self.path:
+            self.load()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def load(self) -> bool:
+        """
+        (Re)charge le fichier s'il a changé
+
+        Returns:
+            True si des fiches ont été chargées
+        """
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            # Pas encore généré (ou supprimé) : plus aucune fiche servie
+            self.entries, self._mtime = {}, None
+            return False
+        if mtime == self._mtime:
+            return False
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Fiches médicinales illisibles ({self.path}): {e}")
+            return False
+        self._mtime = mtime
+        if data.get("format") != STORE_FORMAT:
+            logger.warning(f"Format de {self.path} non pris en charge: {data.get('format')}")
+            self.entries = {}
+            return False
+
+        # Remplacement atomique : les requêtes en cours gardent l'ancien dictionnaire
+        self.entries = data.get("entries", {})
+        self.version = data.get("version", 0)
+        logger.info(f"Fiches médicinales chargées: {len(self.entries)} plantes (version {self.version})")
+        return True
+
+    def _maybe_reload(self):
+        """Lance la relecture en arrière-plan ; get() sert les anciennes fiches d'ici là"""
+        now = time.monotonic()
+        if now - self._checked < self.check_interval or not self._lock.acquire(blocking=False):
+            return
+        self._checked = now
+        try:
+            threading.Thread(target=self._reload, name="medicinal-store-reload", daemon=True).start()
+        except BaseException:
+            self._lock.release()
+            raise
+
+    def _reload(self):
+        try:
+            self.load()
+        except Exception as e:
+            logger.error(f"Relecture des fiches médicinales impossible: {e}")
+        finally:
+            self._lock.release()
+
+    def get(self, plant_id: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Fiche pré-générée d'une plante, None si absente ou périmée"""
+        if not self.enabled:
+            return None
+        self._maybe_reload()
+        entry = self.entries.get(plant_id)
+        if entry is None or entry.get("fingerprint") != fingerprint:
+            return None
+        return entry["info"]
+
+    def is_fresh(self, plant_id: str, fingerprint: str) -> bool:
+        """La fiche de la plante existe et correspond au prompt actuel"""
+        entry = self.entries.get(plant_id)
+        return entry is not None and entry.get("fingerprint") == fingerprint
+
+    def put(self, plant_id: str, fingerprint: str, info: Dict[str, Any], route: str):
+        """Ajoute ou remplace la fiche d'une plante (écrite par save())"""
+        self.entries = {
+            **self.entries,
+            plant_id: {
+                "fingerprint": fingerprint,
+                "route": route,
+                "generated_at": datetime.now().isoformat(timespec="seconds"),
+                "info": info,
+            }
+        }
+
+    def save(self):
+        """Écrit le fichier (nouvelle version), remplacé d'un bloc pour les lecteurs"""
+        self.version += 1
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"format": STORE_FORMAT, "version": self.version, "entries": self.entries},
+                f, ensure_ascii=False, indent=1
+            )
+        os.replace(tmp_path, self.path)
+        self._mtime = os.path.getmtime(self.path)
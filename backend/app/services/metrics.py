@@ -0,0 +1,367 @@
+"""
+Métriques de l'API au format texte Prometheus
+Compteurs, histogrammes et jauges en mémoire : l'enregistrement coûte un
+verrou et quelques additions, le rendu texte n'a lieu qu'au scrape de /metrics
+"""
+
+import os
+import math
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.services.slow_requests import current_trace
+
+# Désactive tout enregistrement (les métriques restent exposées, à zéro)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() not in ("0", "false", "no")
+
+# Bornes (secondes) adaptées à des étapes allant du lookup mémoire à l'appel LLM
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric:
+    """Base commune : nom, aide et étiquettes d'une famille de métriques"""
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key))
+        if extra is not None:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}"
+        ] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Compteur monotone"""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in values]
+
+
+class Gauge(_Metric):
+    """Jauge : valeur fixée par le code ou lue au moment du scrape"""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels: str):
+        """Évalue `function` à chaque scrape (ex: profondeur d'une file)"""
+        with self._lock:
+            self._functions[self._key(labels)] = function
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, function in functions.items():
+            try:
+                values[key] = float(function())
+            except Exception:
+                continue
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """Histogramme à bornes fixes (comptes par seau, somme et total)"""
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Par jeu d'étiquettes : [comptes par seau (+Inf en dernier), somme]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Mesure la durée du bloc, exceptions comprises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Ensemble des métriques exposées sur /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrique déjà enregistrée: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> bytes:
+        """Rendu au format texte Prometheus 0.0.4"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "ivoire_http_requests_total",
+    "Requêtes HTTP traitées",
+    ["method", "route", "status"]
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "ivoire_http_request_duration_seconds",
+    "Durée des requêtes HTTP",
+    ["method", "route"]
+)
+HTTP_IN_PROGRESS = REGISTRY.gauge(
+    "ivoire_http_requests_in_progress",
+    "Requêtes HTTP en cours"
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "ivoire_stage_duration_seconds",
+    "Durée des étapes du traitement (upload_read, decode, predict, plant_lookup, llm, serialize)",
+    ["stage"]
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "ivoire_stage_errors_total",
+    "Exceptions levées pendant une étape du traitement",
+    ["stage"]
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "ivoire_cache_requests_total",
+    "Accès aux caches (result: hit ou miss)",
+    ["cache", "result"]
+)
+LLM_REQUESTS = REGISTRY.counter(
+    "ivoire_llm_requests_total",
+    "Générations d'informations médicinales (outcome: success, error ou mock)",
+    ["provider", "outcome"]
+)
+LLM_HEDGES = REGISTRY.counter(
+    "ivoire_llm_hedges_total",
+    "Requêtes LLM couvertes (outcome: sent, won, lost ou failover)",
+    ["outcome"]
+)
+LLM_TOKENS = REGISTRY.counter(
+    "ivoire_llm_tokens_total",
+    "Tokens consommés par les générations LLM (kind: prompt ou completion)",
+    ["provider", "tier", "kind"]
+)
+LLM_ROUTED = REGISTRY.counter(
+    "ivoire_llm_routed_requests_total",
+    "Demandes LLM par type (kind: none, keyword ou question) et niveau de modèle (tier: fast ou large)",
+    ["kind", "tier"]
+)
+LLM_TIER_SECONDS = REGISTRY.histogram(
+    "ivoire_llm_tier_duration_seconds",
+    "Durée des générations LLM réussies par niveau de modèle",
+    ["tier"]
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "ivoire_queue_depth",
+    "Éléments en attente dans les files internes",
+    ["queue"]
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Mesure une étape du traitement d'une requête
+
+    Usage:
+        with metrics.stage("decode"):
+            ...
+    """
+    trace = current_trace()
+    if not METRICS_ENABLED and trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_SECONDS.observe(duration, stage=name)
+        # Détail par étape pour la capture des requêtes lentes
+        if trace is not None:
+            trace.add_stage(name, duration)
+
+
+def cache_access(cache: str, hit: bool):
+    """Enregistre un accès à un cache"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI comptant les requêtes HTTP et leur durée par route
+
+    Les routes sont étiquetées par leur modèle (/api/jobs/{job_id}) pour
+    borner la cardinalité ; les chemins sans route sont regroupés.
+    """
+
+    def __init__(self, app, excluded_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.excluded_paths = set(excluded_paths)
+
+    async def __call__(self, scope, receive, send):
+        if not METRICS_ENABLED or scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            HTTP_IN_PROGRESS.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method=method, route=route_path, status=str(status["code"]))
+            HTTP_REQUEST_SECONDS.observe(duration, method=method, route=route_path)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    """Valeur au format texte Prometheus (+Inf, -Inf et NaN compris)"""
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
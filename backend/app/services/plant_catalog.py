@@ -0,0 +1,202 @@
+"""
+Cache en mémoire du catalogue des plantes
+Chargé en bloc depuis la base SQLite de l'admin Django (plants.Plant,
+MedicinalProperty, TraditionalUse) et rafraîchi en arrière-plan quand la
+version du catalogue (plants.CatalogVersion) change
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PlantCatalog:
+    """Cache de lecture du catalogue Django, rafraîchi sans bloquer les requêtes"""
+
+    def __init__(self, db_path: Optional[str] = None, refresh_interval: Optional[float] = None):
+        """
+        Initialise le cache du catalogue
+
+        Args:
+            db_path: Chemin de la base SQLite Django
+            refresh_interval: Intervalle (secondes) de vérification de la version
+        """
+        self.db_path = db_path or os.getenv(
+            "CATALOG_DB_PATH",
+            "django_project/db.sqlite3"
+        )
+        self.refresh_interval = refresh_interval or float(os.getenv("CATALOG_REFRESH_INTERVAL", "5"))
+        self.plants: Dict[str, Dict[str, Any]] = {}
+        self.version: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Le catalogue Django est disponible"""
+        return os.path.exists(self.db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Lecture seule : l'API ne modifie jamais le catalogue
+        return sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+
+    def _read_version(self, conn: sqlite3.Connection) -> int:
+        try:
+            row = conn.execute("SELECT version FROM plants_catalogversion WHERE id = 1").fetchone()
+        except sqlite3.OperationalError:
+            # Migration plants.0002 non appliquée
+            return 0
+        return row[0] if row else 0
+
+    def get(self, plant_id: str) -> Optional[Dict[str, Any]]:
+        """Récupère une plante depuis le cache (jamais d'accès à la base)"""
+        return self.plants.get(plant_id)
+
+    def load(self) -> bool:
+        """
+        Charge tout le catalogue en trois requêtes et remplace le cache
+
+        Returns:
+            True si le catalogue a été chargé
+        """
+        if not self.enabled:
+            return False
+
+        try:
+            conn = self._connect()
+            try:
+                # Transaction de lecture : version et données cohérentes
+                conn.execute("BEGIN")
+                version = self._read_version(conn)
+                plants = self._load_plants(conn)
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lors du chargement du catalogue Django: {e}")
+            return False
+
+        # Remplacement atomique : les requêtes en cours gardent l'ancien dictionnaire
+        self.plants = plants
+        self.version = version
+        logger.info(f"Catalogue Django chargé: {len(plants)} plantes (version {version})")
+        return True
+
+    def _load_plants(self, conn: sqlite3.Connection) -> Dict[str, Dict[str, Any]]:
+        plants: Dict[str, Dict[str, Any]] = {}
+        by_pk: Dict[int, Dict[str, Any]] = {}
+
+        rows = conn.execute(
+            "SELECT id, plant_id, scientific_name, common_name_fr, common_names_local, "
+            "family, genus, species, description, plant_type, parts_used, regions, images "
+            "FROM plants_plant WHERE is_active = 1"
+        )
+        for (pk, plant_id, scientific_name, common_name_fr, common_names_local, family,
+             genus, species, description, plant_type, parts_used, regions, images) in rows:
+            plant = {
+                "id": plant_id,
+                "scientific_name": scientific_name,
+                "common_names": {
+                    "fr": common_name_fr,
+                    "local": _json_list(common_names_local)
+                },
+                "family": family,
+                "genus": genus,
+                "species": species,
+                "description": description,
+                "plant_type": plant_type,
+                "parts_used": _json_list(parts_used),
+                "region": _json_list(regions),
+                "images": _json_list(images),
+                "medicinal_properties": [],
+                "traditional_uses": []
+            }
+            plants[plant_id] = plant
+            by_pk[pk] = plant
+
+        for plant_pk, property_type, description, evidence_level in conn.execute(
+            "SELECT plant_id, property_type, description, evidence_level "
+            "FROM plants_medicinalproperty ORDER BY property_type"
+        ):
+            if plant_pk in by_pk:
+                by_pk[plant_pk]["medicinal_properties"].append({
+                    "type": property_type,
+                    "description": description,
+                    "evidence_level": evidence_level
+                })
+
+        for plant_pk, indication, preparation, recipe, region in conn.execute(
+            "SELECT plant_id, indication, preparation, recipe, region "
+            "FROM plants_traditionaluse ORDER BY indication"
+        ):
+            if plant_pk in by_pk:
+                by_pk[plant_pk]["traditional_uses"].append({
+                    "preparation": preparation,
+                    "indication": indication,
+                    "recipe": recipe or None,
+                    "region": region or None
+                })
+
+        return plants
+
+    def refresh(self) -> bool:
+        """
+        Recharge le catalogue si sa version a changé
+
+        Returns:
+            True si le cache a été rechargé
+        """
+        if not self.enabled:
+            return False
+        try:
+            conn = self._connect()
+            try:
+                version = self._read_version(conn)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Version du catalogue illisible: {e}")
+            return False
+
+        if version == self.version:
+            return False
+        logger.info(f"Catalogue modifié (version {self.version} -> {version}), rechargement")
+        return self.load()
+
+    def start(self):
+        """Démarre le rafraîchissement en arrière-plan"""
+        if self._thread is not None or not self.enabled:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, name="plant-catalog-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrête le rafraîchissement en arrière-plan"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.refresh_interval)
+            self._thread = None
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Erreur lors du rafraîchissement du catalogue: {e}")
+
+
+def _json_list(value: Optional[str]) -> list:
+    """Décode un JSONField Django stocké en texte"""
+    if not value:
+        return []
+    try:
+        data = json.loads(value)
+    except (TypeError, ValueError):
+        return []
+    return data if isinstance(data, list) else []
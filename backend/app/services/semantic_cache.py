@@ -0,0 +1,205 @@
+"""
+Cache sémantique des questions médicinales des utilisateurs
+
+Les utilisateurs formulent la même demande de plusieurs façons (« fievre »,
+« fièvre », « Fièvre ? ») : un cache exact du prompt ne sert presque
+jamais. Chaque question est représentée localement par un vecteur TF-IDF de
+n-grammes de caractères (minuscules, sans accents, sans mots vides, mots
+tronqués à leur racine), sans service externe. Une réponse déjà générée
+pour la même plante est servie quand la similarité cosinus dépasse
+SEMANTIC_CACHE_THRESHOLD.
+
+Les n-grammes ignorent les mots courts et l'ordre des mots : « donner aux
+enfants » et « ne pas donner aux enfants » se ressemblent. Les mots de
+négation et de sécurité (GUARD_WORDS : ne, pas, sans, enceinte, bébé,
+dose...) doivent donc être exactement les mêmes dans les deux questions,
+sinon la réponse en cache n'est pas servie.
+
+Les réponses sont gardées en mémoire par worker, au plus
+SEMANTIC_CACHE_PER_PLANT questions pour SEMANTIC_CACHE_MAX_PLANTS plantes,
+pendant SEMANTIC_CACHE_TTL_SECONDS. Le contexte de la plante (empreinte de
+sa fiche et des faits vérifiés) accompagne chaque entrée : une plante
+modifiée dans le catalogue vide ses réponses.
+
+Le résultat est partagé entre les requêtes : il ne doit pas être modifié.
+"""
+
+import os
+import re
+import math
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from app.services.curated_facts import normalize, terms
+from app.services import metrics
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+NGRAM_SIZES = (3, 4)
+
+# Mots qui changent le sens ou le public d'une question (sans accents, au singulier)
+GUARD_WORDS = {
+    # Négation et interdiction
+    "ne", "n", "pas", "non", "sans", "jamais", "aucun", "aucune", "ni", "rien",
+    "eviter", "interdit", "deconseille", "deconseillee",
+    # Publics à risque
+    "enfant", "bebe", "nourrisson", "enceinte", "grossesse", "allaitement",
+    "allaitante", "allaiter", "agee", "vieillard", "adulte", "adolescent",
+    # Dose et danger
+    "dose", "dosage", "surdose", "toxique", "toxicite", "danger", "dangereux",
+    "dangereuse", "mortel", "mortelle", "risque", "interaction", "medicament",
+}
+
+# Question gardée : (n-grammes, mots de garde, instant, réponse)
+Entry = Tuple[Counter, FrozenSet[str], float, Dict[str, Any]]
+
+SEMANTIC_CACHE_SIZE = metrics.REGISTRY.gauge(
+    "ivoire_semantic_cache_entries",
+    "Questions gardées par le cache sémantique du worker"
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def guards(text: str) -> FrozenSet[str]:
+    """Mots de négation et de sécurité d'une question (pluriels ramenés au singulier)"""
+    words = set()
+    for word in _WORD.findall(normalize(text)):
+        if word not in GUARD_WORDS and len(word) > 3 and word[-1] in "sx":
+            word = word[:-1]
+        if word in GUARD_WORDS:
+            words.add(word)
+    return frozenset(words)
+
+
+def ngrams(text: str) -> Counter:
+    """N-grammes de caractères des termes d'une question (racines, bornées par des espaces)"""
+    grams: Counter = Counter()
+    for word in terms(text):
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            grams.update(padded[i:i + size] for i in range(max(1, len(padded) - size + 1)))
+    return grams
+
+
+class SemanticCache:
+    """Réponses par plante, retrouvées par similarité des questions"""
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        per_plant: Optional[int] = None,
+        max_plants: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        enabled: bool = SEMANTIC_CACHE_ENABLED
+    ):
+        """
+        Args:
+            threshold: Similarité cosinus minimale (SEMANTIC_CACHE_THRESHOLD)
+            per_plant: Questions gardées par plante (SEMANTIC_CACHE_PER_PLANT)
+            max_plants: Plantes gardées, les moins récentes oubliées (SEMANTIC_CACHE_MAX_PLANTS)
+            ttl_seconds: Durée de vie d'une réponse (SEMANTIC_CACHE_TTL_SECONDS)
+            enabled: Désactivé, aucune réponse n'est gardée
+        """
+        self.threshold = threshold if threshold is not None else float(
+            os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")
+        )
+        self.per_plant = per_plant or int(os.getenv("SEMANTIC_CACHE_PER_PLANT", "32"))
+        self.max_plants = max_plants or int(os.getenv("SEMANTIC_CACHE_MAX_PLANTS", "1000"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+        self.enabled = enabled
+        # plant_id -> (contexte, [(n-grammes, mots de garde, instant, réponse)])
+        self._plants: "OrderedDict[str, Tuple[str, List[Entry]]]" = OrderedDict()
+        # Nombre de questions gardées contenant chaque n-gramme (IDF)
+        self._document_frequency: Counter = Counter()
+        self._documents = 0
+        SEMANTIC_CACHE_SIZE.set_function(lambda: self._documents)
+
+    def get(self, plant_id: str, context: str, query: str) -> Optional[Dict[str, Any]]:
+        """Réponse à la question la plus proche pour la plante, None sous le seuil"""
+        if not self.enabled:
+            return None
+        entries = self._entries(plant_id, context)
+        if not entries:
+            return None
+        self._plants.move_to_end(plant_id)
+
+        vector = self._vector(ngrams(query))
+        query_guards = guards(query)
+        best, best_score = None, 0.0
+        for grams, entry_guards, _, info in entries:
+            if entry_guards != query_guards:
+                # Négation ou public différent : autre question, même si les mots se ressemblent
+                continue
+            score = _cosine(vector, self._vector(grams))
+            if score > best_score:
+                best, best_score = info, score
+        if best_score >= self.threshold:
+            return best
+        return None
+
+    def put(self, plant_id: str, context: str, query: str, info: Dict[str, Any]):
+        """Garde la réponse générée pour une question"""
+        if not self.enabled:
+            return
+        grams = ngrams(query)
+        if not grams:
+            return
+        entries = self._entries(plant_id, context)
+        if entries is None:
+            entries = []
+            self._plants[plant_id] = (context, entries)
+        self._plants.move_to_end(plant_id)
+
+        entries.append((grams, guards(query), time.monotonic(), info))
+        self._count(grams, 1)
+        if len(entries) > self.per_plant:
+            self._count(entries.pop(0)[0], -1)
+        while len(self._plants) > self.max_plants:
+            _, (_, evicted) = self._plants.popitem(last=False)
+            self._drop(evicted)
+
+    def _entries(self, plant_id: str, context: str) -> Optional[List[Entry]]:
+        """Réponses encore valides de la plante (contexte identique, non expirées)"""
+        stored = self._plants.get(plant_id)
+        if stored is None:
+            return None
+        stored_context, entries = stored
+        if stored_context != context:
+            # Plante modifiée dans le catalogue : réponses périmées
+            del self._plants[plant_id]
+            self._drop(entries)
+            return None
+        deadline = time.monotonic() - self.ttl_seconds
+        while entries and entries[0][2] < deadline:
+            self._count(entries.pop(0)[0], -1)
+        return entries
+
+    def _drop(self, entries: List[Entry]):
+        for grams, _, _, _ in entries:
+            self._count(grams, -1)
+
+    def _count(self, grams: Counter, delta: int):
+        self._documents += delta
+        for gram in grams:
+            self._document_frequency[gram] += delta
+            if self._document_frequency[gram] <= 0:
+                del self._document_frequency[gram]
+
+    def _vector(self, grams: Counter) -> Dict[str, float]:
+        """Poids TF-IDF (IDF lissé sur les questions gardées)"""
+        documents = self._documents
+        return {
+            gram: count * (math.log((1 + documents) / (1 + self._document_frequency.get(gram, 0))) + 1)
+            for gram, count in grams.items()
+        }
+
+
+def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(weight * b[gram] for gram, weight in a.items() if gram in b)
+    if not dot:
+        return 0.0
+    norm = math.sqrt(sum(w * w for w in a.values())) * math.sqrt(sum(w * w for w in b.values()))
+    return dot / norm
@@ -0,0 +1,128 @@
+"""
+Sérialisation rapide des réponses d'identification
+Les fiches plantes sont validées et sérialisées une seule fois par version du
+catalogue, puis assemblées en bytes dans la réponse (orjson si disponible)
+"""
+
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi.responses import Response
+
+from app.models.schemas import PlantInfo, MedicinalInfo
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+    logger.warning("orjson non disponible, sérialisation avec json (pip install orjson)")
+
+
+def dumps(obj: Any) -> bytes:
+    """Sérialise en JSON compact UTF-8 (orjson si disponible)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """Réponse JSON dont le contenu est déjà sérialisé en bytes, ou un objet sérialisé via dumps()"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+class IdentificationSerializer:
+    """
+    Assemble les réponses d'identification à partir de fragments pré-sérialisés
+
+    Les fiches plantes proviennent du catalogue interne : elles sont validées
+    par PlantInfo à la création du fragment puis réutilisées telles quelles
+    jusqu'au changement de version du catalogue.
+    """
+
+    def __init__(self):
+        self._fragments: Dict[str, bytes] = {}
+        self._version: Any = None
+
+    def plant_fragment(self, plant: Dict[str, Any], catalog_version: Any = None) -> bytes:
+        """
+        Fragment JSON d'une fiche plante (format PlantInfo)
+
+        Args:
+            plant: Fiche plante du catalogue
+            catalog_version: Version du catalogue ; un changement vide le cache
+        """
+        if catalog_version != self._version:
+            self._fragments = {}
+            self._version = catalog_version
+
+        fragment = self._fragments.get(plant["id"])
+        metrics.cache_access("plant_fragment", fragment is not None)
+        if fragment is None:
+            fragment = dumps(PlantInfo(**plant).model_dump())
+            self._fragments[plant["id"]] = fragment
+        return fragment
+
+    def render(
+        self,
+        result: Dict[str, Any],
+        catalog_version: Any = None,
+        extra: Optional[Dict[str, Any]] = None
+    ) -> bytes:
+        """
+        Sérialise une réponse au format IdentificationResponse
+
+        Args:
+            result: plant, confidence, alternatives, medicinal_info, user_intent
+            catalog_version: Version du catalogue (invalidation des fragments)
+            extra: Champs supplémentaires ajoutés à la fin de l'objet
+        """
+        parts = [
+            b'{"plant":', self.plant_fragment(result["plant"], catalog_version),
+            b',"confidence":', dumps(_clamp_confidence(result["confidence"])),
+            b',"alternatives":'
+        ]
+
+        alternatives = result.get("alternatives")
+        if alternatives:
+            parts.append(b"[")
+            for i, alt in enumerate(alternatives):
+                if i:
+                    parts.append(b",")
+                parts += [
+                    b'{"plant":', self.plant_fragment(alt["plant"], catalog_version),
+                    b',"confidence":', dumps(_clamp_confidence(alt["confidence"])), b"}"
+                ]
+            parts.append(b"]")
+        else:
+            parts.append(b"null")
+
+        # Les informations médicinales viennent du LLM : elles restent validées
+        medicinal_info = result.get("medicinal_info")
+        if medicinal_info is not None:
+            medicinal_info = MedicinalInfo.model_validate(medicinal_info).model_dump()
+        parts += [
+            b',"medicinal_info":', dumps(medicinal_info),
+            b',"user_intent":', dumps(result.get("user_intent"))
+        ]
+
+        for key, value in (extra or {}).items():
+            parts += [b",", dumps(key), b":", dumps(value)]
+
+        parts.append(b"}")
+        return b"".join(parts)
+
+
+def _clamp_confidence(confidence: float) -> float:
+    # Les arrondis float32 du softmax peuvent dépasser 100 de quelques ulp
+    return min(max(float(confidence), 0.0), 100.0)
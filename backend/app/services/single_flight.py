@@ -0,0 +1,78 @@
+"""
+Regroupement des traitements identiques en cours (single-flight)
+
+Quand une photo populaire circule, de nombreux clients envoient les mêmes
+octets en même temps ; /api/medicinal-info reçoit des rafales pour la même
+plante et la même question. Le premier appel d'une clé exécute le
+traitement, les appels concurrents de même clé attendent son résultat (ou
+son exception) au lieu de le recalculer. Rien n'est conservé après la fin
+du traitement : ce n'est pas un cache.
+
+Le résultat est partagé entre les requêtes : il ne doit pas être modifié.
+"""
+
+import os
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, TypeVar
+
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() not in ("0", "false", "no")
+
+SINGLE_FLIGHT_CALLS = metrics.REGISTRY.counter(
+    "ivoire_single_flight_calls_total",
+    "Appels regroupés par clé (result: executed ou coalesced)",
+    ["flight", "result"]
+)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Exécute une seule fois les appels concurrents de même clé"""
+
+    def __init__(self, name: str, enabled: bool = SINGLE_FLIGHT_ENABLED):
+        """
+        Args:
+            name: Nom du regroupement (étiquette flight des métriques)
+            enabled: Désactivé, chaque appel s'exécute
+        """
+        self.name = name
+        self.enabled = enabled
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Clés en cours d'exécution"""
+        return len(self._calls)
+
+    async def do(self, key: str, function: Callable[[], Awaitable[T]]) -> T:
+        """
+        Résultat de function() pour key, partagé avec les appels concurrents
+
+        L'exécution est protégée de l'annulation d'un appelant (client
+        déconnecté) : les autres appelants reçoivent quand même le résultat.
+        """
+        if not self.enabled:
+            return await function()
+
+        future = self._calls.get(key)
+        if future is not None:
+            SINGLE_FLIGHT_CALLS.inc(flight=self.name, result="coalesced")
+            return await asyncio.shield(future)
+
+        SINGLE_FLIGHT_CALLS.inc(flight=self.name, result="executed")
+        future = asyncio.ensure_future(function())
+        self._calls[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(future)
+
+    def _forget(self, key: str, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Exception consommée même si tous les appelants ont été annulés
+        if not future.cancelled():
+            future.exception()
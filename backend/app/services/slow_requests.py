@@ -0,0 +1,199 @@
+"""
+Capture des requêtes lentes
+Chaque requête porte une trace (contextvars) où les étapes mesurées par
+metrics.stage() et les annotations des services (image, modèle, LLM) sont
+enregistrées ; au-delà du seuil, la trace est conservée dans un tampon
+circulaire consultable par les administrateurs
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTrace:
+    """Durées par étape et annotations d'une requête en cours"""
+
+    __slots__ = ("method", "path", "started_at", "stages", "annotations", "images")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        # étape -> [durée cumulée, nombre d'appels]
+        self.stages: Dict[str, List[float]] = {}
+        self.annotations: Dict[str, Any] = {}
+        # Références aux images reçues : hachées seulement si la requête est lente
+        self.images: List[bytes] = []
+
+    def add_stage(self, name: str, duration: float):
+        entry = self.stages.get(name)
+        if entry is None:
+            self.stages[name] = [duration, 1]
+        else:
+            entry[0] += duration
+            entry[1] += 1
+
+    def to_dict(self, duration: float, status: int) -> Dict[str, Any]:
+        return {
+            "timestamp": datetime.fromtimestamp(self.started_at).isoformat(),
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "duration_ms": round(duration * 1000, 2),
+            "stages": {
+                name: {"duration_ms": round(total * 1000, 2), "calls": int(calls)}
+                for name, (total, calls) in self.stages.items()
+            },
+            "images": [
+                {"hash": hashlib.sha256(image).hexdigest(), "size": len(image)}
+                for image in self.images
+            ],
+            **self.annotations
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """Trace de la requête en cours (None hors requête)"""
+    return _current_trace.get()
+
+
+def annotate(**fields: Any):
+    """Ajoute des champs à la trace de la requête en cours"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.annotations.update(fields)
+
+
+def add_tokens(prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+    """Cumule les tokens LLM consommés par la requête en cours"""
+    trace = _current_trace.get()
+    if trace is not None:
+        annotations = trace.annotations
+        annotations["prompt_tokens"] = annotations.get("prompt_tokens", 0) + (prompt_tokens or 0)
+        annotations["completion_tokens"] = annotations.get("completion_tokens", 0) + (completion_tokens or 0)
+
+
+def attach_image(image_bytes: bytes):
+    """Associe une image reçue à la requête en cours"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.images.append(image_bytes)
+
+
+class SlowRequestRecorder:
+    """Tampon circulaire des requêtes dépassant le seuil de lenteur"""
+
+    def __init__(
+        self,
+        threshold_ms: Optional[float] = None,
+        capacity: Optional[int] = None,
+        log_path: Optional[str] = None
+    ):
+        """
+        Initialise l'enregistreur
+
+        Args:
+            threshold_ms: Durée au-delà de laquelle une requête est conservée
+            capacity: Nombre maximal de requêtes conservées (les plus anciennes sont écartées)
+            log_path: Fichier JSONL où ajouter chaque requête lente (optionnel)
+        """
+        self.threshold_ms = threshold_ms if threshold_ms is not None else float(
+            os.getenv("SLOW_REQUEST_THRESHOLD_MS", "2000")
+        )
+        self.capacity = capacity or int(os.getenv("SLOW_REQUEST_BUFFER_SIZE", "200"))
+        self.log_path = log_path or os.getenv("SLOW_REQUEST_LOG_PATH")
+        self._entries: deque = deque(maxlen=self.capacity)
+        self._lock = threading.Lock()
+
+    def record(self, trace: RequestTrace, duration: float, status: int) -> bool:
+        """
+        Conserve la trace si la requête a dépassé le seuil
+
+        Returns:
+            True si la requête a été enregistrée
+        """
+        if duration * 1000 < self.threshold_ms:
+            return False
+
+        entry = trace.to_dict(duration, status)
+        with self._lock:
+            self._entries.append(entry)
+        breakdown = ", ".join(
+            f"{name}={stage['duration_ms']}" for name, stage in entry["stages"].items()
+        )
+        logger.warning(
+            f"Requête lente: {trace.method} {trace.path} {entry['duration_ms']} ms ({breakdown})"
+        )
+        if self.log_path:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            except OSError as e:
+                logger.error(f"Impossible d'écrire la requête lente dans {self.log_path}: {e}")
+        return True
+
+    def entries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Requêtes lentes conservées, de la plus récente à la plus ancienne"""
+        with self._lock:
+            entries = list(self._entries)
+        entries.reverse()
+        return entries[:limit] if limit else entries
+
+    def to_jsonl(self) -> str:
+        """Export JSONL (une requête par ligne, ordre chronologique)"""
+        with self._lock:
+            entries = list(self._entries)
+        return "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+
+    def clear(self) -> int:
+        """Vide le tampon, retourne le nombre de requêtes supprimées"""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+        return count
+
+
+class SlowRequestMiddleware:
+    """
+    Middleware ASGI ouvrant une trace par requête HTTP et transmettant les
+    requêtes lentes à l'enregistreur
+    """
+
+    def __init__(self, app, recorder: SlowRequestRecorder, excluded_prefixes: Sequence[str] = ("/metrics", "/api/admin")):
+        self.app = app
+        self.recorder = recorder
+        self.excluded_prefixes = tuple(excluded_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.excluded_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        trace = RequestTrace(scope["method"], scope["path"])
+        token = _current_trace.set(trace)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            self.recorder.record(trace, time.perf_counter() - start, status["code"])
@@ -0,0 +1,215 @@
+"""
+Sortie JSON structurée des LLM
+
+- compact_schema / strict_json_schema : schéma d'un modèle pydantic, en une
+  ligne pour le prompt ou au format response_format=json_schema du
+  fournisseur (propriétés toutes requises, additionalProperties false) ;
+- TolerantJSONParser : parseur incrémental qui ignore le texte autour de
+  l'objet (phrase d'introduction, bloc ```json) et répare une réponse
+  tronquée par max_tokens en gardant les valeurs complètes.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+
+_DECODER = json.JSONDecoder()
+_JSON_TYPES = {"string": "str", "integer": "int", "number": "float", "boolean": "bool"}
+
+
+def compact_schema(model: Type[BaseModel], exclude: Sequence[str] = ()) -> str:
+    """
+    Schéma d'un modèle en une ligne, pour le prompt
+
+    Exemple : {"summary":str,"properties":[{"type":str,...}],"recipe":str?}
+    """
+    schema = model.model_json_schema()
+    return _compact(schema, schema.get("$defs", {}), exclude)
+
+
+def _compact(schema: Dict[str, Any], defs: Dict[str, Any], exclude: Sequence[str] = ()) -> str:
+    schema = _resolve(schema, defs)
+    if "anyOf" in schema:
+        types = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return _compact(types[0], defs) + "?" if types else "null"
+    if schema.get("type") == "object" and "properties" in schema:
+        fields = [
+            f'"{name}":{_compact(field, defs)}'
+            for name, field in schema["properties"].items()
+            if name not in exclude
+        ]
+        return "{" + ",".join(fields) + "}"
+    if schema.get("type") == "array":
+        return "[" + _compact(schema.get("items", {}), defs) + "]"
+    return _JSON_TYPES.get(schema.get("type"), "any")
+
+
+def strict_json_schema(model: Type[BaseModel], exclude: Sequence[str] = ()) -> Dict[str, Any]:
+    """Schéma JSON autonome (sans $ref) au format strict des sorties structurées"""
+    schema = model.model_json_schema()
+    return _strict(schema, schema.get("$defs", {}), exclude)
+
+
+def _strict(schema: Dict[str, Any], defs: Dict[str, Any], exclude: Sequence[str] = ()) -> Dict[str, Any]:
+    schema = _resolve(schema, defs)
+    if "anyOf" in schema:
+        return {"anyOf": [_strict(option, defs) for option in schema["anyOf"]]}
+    if schema.get("type") == "object" and "properties" in schema:
+        properties = {
+            name: _strict(field, defs)
+            for name, field in schema["properties"].items()
+            if name not in exclude
+        }
+        return {
+            "type": "object",
+            "properties": properties,
+            "required": list(properties),
+            "additionalProperties": False
+        }
+    if schema.get("type") == "array":
+        return {"type": "array", "items": _strict(schema.get("items", {}), defs)}
+    return {"type": schema["type"]} if "type" in schema else {}
+
+
+def _resolve(schema: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    ref = schema.get("$ref")
+    if ref:
+        return defs[ref.rsplit("/", 1)[-1]]
+    return schema
+
+
+class TolerantJSONParser:
+    """
+    Parseur incrémental du premier objet JSON d'un texte
+
+    Les fragments sont passés à feed() au fil de l'eau (ou la réponse entière
+    en une fois) ; chaque caractère n'est examiné qu'une fois. result()
+    retourne l'objet complet, ou, si la réponse a été coupée, l'objet réparé :
+    chaîne en cours refermée, valeurs incomplètes retirées, conteneurs
+    ouverts refermés.
+    """
+
+    def __init__(self):
+        self.buffer: List[str] = []
+        self.length = 0
+        self.started = False
+        self.done = False
+        self._stack: List[str] = []
+        # Pour chaque objet ouvert : la prochaine chaîne est-elle une clé ?
+        self._expect_key: List[bool] = []
+        self._in_string = False
+        self._string_is_key = False
+        self._escape = False
+        # Dernière coupure sûre : (position, conteneurs ouverts à cette position)
+        self._safe: Optional[Tuple[int, Tuple[str, ...]]] = None
+
+    @property
+    def complete(self) -> bool:
+        """L'objet a été entièrement reçu"""
+        return self.done
+
+    def feed(self, chunk: str):
+        """Ajoute un fragment de la réponse"""
+        for char in chunk:
+            if self.done:
+                return
+            if not self.started:
+                if char != "{":
+                    continue
+                self.started = True
+            self.buffer.append(char)
+            self.length += 1
+            self._scan(char)
+
+    def _scan(self, char: str):
+        position = self.length
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if not self._string_is_key:
+                    self._mark(position)
+            return
+
+        if char == '"':
+            self._in_string = True
+            self._string_is_key = bool(self._expect_key) and self._stack[-1] == "{" and self._expect_key[-1]
+        elif char in "{[":
+            self._stack.append(char)
+            self._expect_key.append(char == "{")
+            self._mark(position)
+        elif char in "}]":
+            if self._stack:
+                self._stack.pop()
+                self._expect_key.pop()
+            if not self._stack:
+                self.done = True
+            self._mark(position)
+        elif char == ":":
+            if self._expect_key:
+                self._expect_key[-1] = False
+        elif char == ",":
+            # Fin d'une valeur (y compris nombres et littéraux) : coupure avant la virgule
+            self._mark(position - 1)
+            if self._stack and self._stack[-1] == "{":
+                self._expect_key[-1] = True
+
+    def _mark(self, position: int):
+        self._safe = (position, tuple(self._stack))
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """Objet reçu (réparé s'il est incomplet), None si rien n'est exploitable"""
+        if not self.started:
+            return None
+        text = "".join(self.buffer)
+        if self.done:
+            try:
+                return json.loads(text)
+            except ValueError:
+                pass
+
+        candidates = []
+        if self._in_string and not self._string_is_key:
+            # Chaîne coupée : gardée jusqu'au dernier caractère complet
+            partial = text.rstrip("\\")
+            escape = partial.rfind("\\u")
+            if escape != -1 and len(partial) - escape < 6:
+                partial = partial[:escape]
+            candidates.append(partial + '"' + _closing(self._stack))
+        if self._safe is not None:
+            position, stack = self._safe
+            candidates.append(text[:position].rstrip().rstrip(",") + _closing(stack))
+
+        for candidate in candidates:
+            try:
+                value = json.loads(candidate)
+            except ValueError:
+                continue
+            if isinstance(value, dict):
+                return value
+        return None
+
+
+def _closing(stack: Sequence[str]) -> str:
+    return "".join("}" if opener == "{" else "]" for opener in reversed(stack))
+
+
+def parse_tolerant(text: str) -> Optional[Dict[str, Any]]:
+    """Premier objet JSON d'un texte, réparé s'il est tronqué"""
+    start = text.find("{")
+    if start == -1:
+        return None
+    try:
+        # Cas courant (réponse complète) : décodeur C, texte suivant ignoré
+        value, _ = _DECODER.raw_decode(text, start)
+        if isinstance(value, dict):
+            return value
+    except ValueError:
+        pass
+    parser = TolerantJSONParser()
+    parser.feed(text)
+    return parser.result()
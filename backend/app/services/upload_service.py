@@ -0,0 +1,216 @@
+"""
+Service de lecture et validation des images envoyées
+Lecture par blocs avec taille maximale, détection du format par signature
+et rejet des images surdimensionnées avant décodage complet. La taille des
+corps est bornée pendant leur réception (RequestSizeLimitMiddleware)
+"""
+
+import io
+import os
+import logging
+from typing import Dict, Optional
+
+from PIL import Image
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+from app.services import metrics, slow_requests
+
+logger = logging.getLogger(__name__)
+
+# Signatures (magic bytes) des formats acceptés
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"GIF87a", "GIF"),
+    (b"GIF89a", "GIF"),
+    (b"BM", "BMP"),
+    (b"II*\x00", "TIFF"),
+    (b"MM\x00*", "TIFF"),
+]
+
+# Octets nécessaires pour identifier le format
+SNIFF_BYTES = 12
+
+
+class UploadRejected(HTTPException):
+    """Fichier envoyé refusé (taille, format ou dimensions)"""
+
+
+def sniff_image_format(header: bytes) -> Optional[str]:
+    """
+    Identifie le format d'une image à partir de ses premiers octets
+
+    Args:
+        header: Premiers octets du fichier (au moins SNIFF_BYTES)
+
+    Returns:
+        Nom du format PIL ('JPEG', 'PNG', ...) ou None si inconnu
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "WEBP"
+    for signature, image_format in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    return None
+
+
+class UploadService:
+    """Service de lecture sécurisée des fichiers envoyés"""
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        max_pixels: Optional[int] = None,
+        chunk_size: Optional[int] = None
+    ):
+        """
+        Initialise le service d'upload
+
+        Args:
+            max_bytes: Taille maximale d'une image
+            max_pixels: Nombre maximal de pixels (largeur x hauteur)
+            chunk_size: Taille des blocs de lecture
+        """
+        self.max_bytes = max_bytes or int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+        self.max_pixels = max_pixels or int(os.getenv("MAX_IMAGE_PIXELS", str(40_000_000)))
+        self.chunk_size = chunk_size or int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+
+    async def read_image(self, upload: UploadFile, max_bytes: Optional[int] = None) -> bytes:
+        """
+        Lit une image par blocs et la valide avant tout décodage complet
+
+        Le format est vérifié sur les premiers octets, la lecture s'arrête dès
+        que la taille maximale est dépassée et l'en-tête est analysé pour
+        rejeter les dimensions excessives.
+
+        Args:
+            upload: Fichier envoyé
+            max_bytes: Taille maximale (par défaut self.max_bytes)
+
+        Returns:
+            Contenu de l'image
+
+        Raises:
+            UploadRejected: 413 (trop volumineux), 415 (format non supporté)
+                ou 400 (en-tête illisible)
+        """
+        with metrics.stage("upload_read"):
+            max_bytes = max_bytes or self.max_bytes
+
+            if upload.size is not None and upload.size > max_bytes:
+                raise UploadRejected(
+                    status_code=413,
+                    detail=f"Image trop volumineuse (maximum {max_bytes} octets)"
+                )
+
+            header = await upload.read(self.chunk_size)
+            if not sniff_image_format(header[:SNIFF_BYTES]):
+                raise UploadRejected(status_code=415, detail="Format d'image non supporté")
+
+            chunks = [header]
+            total = len(header)
+            while chunk := await upload.read(self.chunk_size):
+                total += len(chunk)
+                if total > max_bytes:
+                    raise UploadRejected(
+                        status_code=413,
+                        detail=f"Image trop volumineuse (maximum {max_bytes} octets)"
+                    )
+                chunks.append(chunk)
+
+            image_bytes = b"".join(chunks)
+            self.inspect_image(image_bytes)
+            slow_requests.attach_image(image_bytes)
+            return image_bytes
+
+    def inspect_image(self, image_bytes: bytes) -> Dict:
+        """
+        Lit l'en-tête d'une image (format, dimensions) sans décoder les pixels
+
+        Args:
+            image_bytes: Contenu de l'image
+
+        Returns:
+            Dictionnaire avec format, width et height
+
+        Raises:
+            UploadRejected: si l'en-tête est illisible ou l'image trop grande
+        """
+        try:
+            # Image.open ne lit que l'en-tête ; le décodage est différé
+            with Image.open(io.BytesIO(image_bytes)) as image:
+                image_format = image.format
+                width, height = image.size
+        except Image.DecompressionBombError:
+            raise UploadRejected(status_code=413, detail="Dimensions de l'image trop grandes")
+        except Exception:
+            raise UploadRejected(status_code=400, detail="Image illisible ou corrompue")
+
+        if width * height > self.max_pixels:
+            logger.warning(f"Image rejetée: {width}x{height} pixels ({image_format})")
+            raise UploadRejected(
+                status_code=413,
+                detail=(
+                    f"Dimensions de l'image trop grandes ({width}x{height}, "
+                    f"maximum {self.max_pixels} pixels)"
+                )
+            )
+
+        return {"format": image_format, "width": width, "height": height}
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Middleware ASGI rejetant (413) les requêtes dont le corps dépasse la
+    limite de la route
+
+    Un Content-Length trop grand est refusé avant toute lecture. Sinon
+    (corps chunked ou sans en-tête), les octets sont comptés à mesure
+    qu'ils arrivent : Starlette ne met jamais plus que la limite en mémoire
+    ou sur disque.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        """
+        Args:
+            app: Application ASGI
+            limits: Taille maximale du corps par chemin exact
+        """
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] in ("POST", "PUT"):
+            limit = self.limits.get(scope["path"])
+            if limit is not None:
+                content_length = dict(scope["headers"]).get(b"content-length")
+                if content_length and content_length.isdigit() and int(content_length) > limit:
+                    response = JSONResponse(
+                        status_code=413,
+                        content={"detail": f"Requête trop volumineuse (maximum {limit} octets)"}
+                    )
+                    await response(scope, receive, send)
+                    return
+                receive = self._limited_receive(receive, limit)
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _limited_receive(receive, limit: int):
+        """Lecture du corps interrompue (413) dès que la limite est dépassée"""
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # HTTPException : relancée par FastAPI pendant la lecture du formulaire
+                    raise UploadRejected(
+                        status_code=413,
+                        detail=f"Requête trop volumineuse (maximum {limit} octets)"
+                    )
+            return message
+
+        return limited_receive
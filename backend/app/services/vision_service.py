@@ -4,43 +4,115 @@ Utilise MobileNetV2 fine-tuned pour la reconnaissance de feuilles médicinales
 """
 
 import numpy as np
-from PIL import Image
-import io
 import os
 import json
-from typing import List, Dict, Optional
+import asyncio
+import hashlib
+import threading
+import importlib.util
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
 import logging
 
+from app.services import metrics, slow_requests
+from app.services.embedding_index import EmbeddingIndex
+from app.services.image_preprocessing import PreprocessPool, preprocess
+from app.services.inference_batcher import InferenceBatcher, InferenceThread
+from app.services.inference_config import inference_setting, load_inference_config
+from app.services.plant_catalog import PlantCatalog
+from app.services.single_flight import SingleFlight
+
 logger = logging.getLogger(__name__)
 
-try:
-    import tensorflow as tf
-    TENSORFLOW_AVAILABLE = True
-except ImportError:
-    TENSORFLOW_AVAILABLE = False
-    tf = None
+# Import différé : TensorFlow (plusieurs secondes, centaines de Mo) n'est
+# chargé qu'avec le modèle, jamais par les services qui ne l'utilisent pas
+TENSORFLOW_AVAILABLE = importlib.util.find_spec("tensorflow") is not None
+tf = None
+if not TENSORFLOW_AVAILABLE:
     logger.warning("TensorFlow n'est pas installé. Le service fonctionnera en mode mock.")
 
 
+def import_tensorflow():
+    """Importe TensorFlow au premier appel (None s'il n'est pas installé)"""
+    global tf, TENSORFLOW_AVAILABLE
+    if tf is None and TENSORFLOW_AVAILABLE:
+        try:
+            import tensorflow
+            tf = tensorflow
+        except ImportError as e:
+            TENSORFLOW_AVAILABLE = False
+            logger.warning(f"Import de TensorFlow impossible ({e}). Le service fonctionnera en mode mock.")
+    return tf
+
+
 class VisionService:
     """Service de reconnaissance de plantes par vision"""
     
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, defer_model_load: bool = False):
         """
         Initialise le service de vision
         
         Args:
             model_path: Chemin vers le modèle TensorFlow sauvegardé
+            defer_model_load: Ne charger le modèle (et TensorFlow) qu'à
+                l'appel de ensure_model()
         """
         self.model = None
         self.model_path = model_path or os.getenv(
             "MODEL_PATH",
             "models/plant_recognition_model.h5"
         )
+        self.model_version = "mock"
         self.class_names = []
         self.plant_database = {}
-        self.load_model()
+        # Catalogue de l'admin Django (prioritaire sur le JSON statique)
+        self.catalog = PlantCatalog()
+        
+        # Mode d'identification: 'softmax' (défaut), 'knn' ou 'hybrid'
+        self.identification_mode = os.getenv("IDENTIFICATION_MODE", "softmax")
+        self.embedding_index_path = os.getenv(
+            "EMBEDDING_INDEX_PATH",
+            "models/embedding_index.npz"
+        )
+        self.knn_k = int(os.getenv("KNN_K", "10"))
+        self.knn_weight = float(os.getenv("KNN_WEIGHT", "0.5"))
+        # Voisins moins similaires ignorés ; aucun au-dessus : tête softmax seule
+        self.knn_min_similarity = float(os.getenv("KNN_MIN_SIMILARITY", "0.5"))
+        self.embedding_model = None
+        self.embedding_index: Optional[EmbeddingIndex] = None
+        
+        # Pool de processus pour le décodage des images (0 = dans le processus)
+        self.preprocess_workers = int(os.getenv("PREPROCESS_WORKERS", "0"))
+        self.preprocess_pool: Optional[PreprocessPool] = None
+        
+        # Threads TensorFlow et fenêtre de regroupement : variables
+        # d'environnement, puis models/inference_config.json (plan_inference.py)
+        inference_config = load_inference_config()
+        self.intra_op_threads = int(inference_setting(inference_config, "intra_op_threads", 0))
+        self.inter_op_threads = int(inference_setting(inference_config, "inter_op_threads", 0))
+        self.batch_window_ms = inference_setting(inference_config, "batch_window_ms", 0)
+        self.max_batch_size = int(inference_setting(inference_config, "max_batch_size", 32))
+        # Passes avant du worker une par une (identify, lots, multi-vues, travaux)
+        self.inference_thread = InferenceThread()
+        self.batcher: Optional[InferenceBatcher] = None
+        if self.batch_window_ms > 0:
+            self.batcher = InferenceBatcher(
+                self.predict_batch, self.batch_window_ms, self.max_batch_size, self.inference_thread
+            )
+        
+        # Images identiques soumises en même temps : une seule identification
+        self.identify_flight = SingleFlight("identify")
+        
+        # Chargement différé (API) : au préchauffage ou à la première
+        # identification, après le fork des workers de serve.py
+        self.defer_model_load = defer_model_load
+        self._model_lock = threading.Lock()
+        if not self.defer_model_load:
+            self.load_model()
         self.load_plant_database()
+        self.catalog.load()
+        if self.identification_mode != "softmax":
+            self.load_embedding_index()
     
     def load_model(self):
         """Charge le modèle TensorFlow"""
@@ -55,8 +127,13 @@ class VisionService:
         try:
             if os.path.exists(self.model_path):
                 logger.info(f"Chargement du modèle depuis {self.model_path}")
+                import_tensorflow()
+                self.configure_threads()
                 self.model = tf.keras.models.load_model(self.model_path)
-                logger.info("Modèle chargé avec succès")
+                self.model_version = os.getenv("MODEL_VERSION") or _file_version(self.model_path)
+                logger.info(f"Modèle chargé avec succès (version {self.model_version})")
+                if self.identification_mode != "softmax":
+                    self.build_embedding_model()
             else:
                 logger.warning(
                     f"Modèle non trouvé à {self.model_path}. "
@@ -67,6 +144,70 @@ class VisionService:
             logger.error(f"Erreur lors du chargement du modèle: {e}")
             self.model = None
     
+    def configure_threads(self):
+        """
+        Applique les tailles des pools de threads TensorFlow (0 = défaut TF)
+        
+        Doit précéder la première opération TensorFlow du processus : ensuite
+        le runtime est initialisé et les pools ne peuvent plus changer.
+        """
+        try:
+            if self.intra_op_threads > 0:
+                tf.config.threading.set_intra_op_parallelism_threads(self.intra_op_threads)
+            if self.inter_op_threads > 0:
+                tf.config.threading.set_inter_op_parallelism_threads(self.inter_op_threads)
+        except RuntimeError as e:
+            logger.warning(f"Threads TensorFlow déjà initialisés, configuration ignorée: {e}")
+            return
+        logger.info(
+            f"Threads TensorFlow: intra-op={tf.config.threading.get_intra_op_parallelism_threads()}, "
+            f"inter-op={tf.config.threading.get_inter_op_parallelism_threads()}"
+        )
+    
+    @property
+    def model_pending(self) -> bool:
+        """Le chargement du modèle a été différé et n'a pas encore eu lieu"""
+        return self.defer_model_load
+    
+    def ensure_model(self):
+        """Charge le modèle s'il a été différé (préchauffage ou première requête)"""
+        if not self.defer_model_load:
+            return
+        with self._model_lock:
+            if self.defer_model_load:
+                self.load_model()
+                self.defer_model_load = False
+    
+    def build_embedding_model(self):
+        """
+        Construit un modèle à deux sorties (embedding de l'avant-dernière
+        couche, probabilités softmax) pour obtenir les deux en une seule passe
+        """
+        try:
+            self.embedding_model = tf.keras.Model(
+                inputs=self.model.inputs,
+                outputs=[self.model.layers[-1].input, self.model.output]
+            )
+            logger.info("Modèle d'embedding construit (avant-dernière couche)")
+        except Exception as e:
+            logger.error(f"Impossible de construire le modèle d'embedding: {e}")
+            self.embedding_model = None
+    
+    def load_embedding_index(self):
+        """Charge l'index kNN des embeddings de référence"""
+        try:
+            if os.path.exists(self.embedding_index_path):
+                self.embedding_index = EmbeddingIndex.load(self.embedding_index_path)
+            else:
+                logger.warning(
+                    f"Index d'embeddings non trouvé à {self.embedding_index_path}. "
+                    "Identification softmax uniquement."
+                )
+                self.embedding_index = EmbeddingIndex()
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement de l'index d'embeddings: {e}")
+            self.embedding_index = EmbeddingIndex()
+    
     def load_plant_database(self):
         """Charge la base de données des plantes"""
         db_path = os.getenv(
@@ -99,26 +240,120 @@ class VisionService:
         Returns:
             Image prétraitée (224x224, normalisée)
         """
-        # Charger l'image
-        image = Image.open(io.BytesIO(image_bytes))
+        return preprocess(image_bytes)
+    
+    def start_preprocess_pool(self):
+        """Démarre le pool de processus de prétraitement si configuré"""
+        if self.preprocess_workers > 0 and self.preprocess_pool is None:
+            self.preprocess_pool = PreprocessPool(self.preprocess_workers)
+            pool = self.preprocess_pool
+            metrics.QUEUE_DEPTH.set_function(lambda: pool.pending, queue="preprocess")
+    
+    def decode_images(self, images: List[bytes]) -> List[Optional[np.ndarray]]:
+        """
+        Prétraite des images (pool de processus si configuré)
+        
+        Returns:
+            Liste alignée sur images ; None pour les images illisibles
+        """
+        with metrics.stage("decode"):
+            if self.preprocess_pool is not None:
+                return self.preprocess_pool.preprocess_batch(images)
+            return [self._try_preprocess(image_bytes) for image_bytes in images]
+    
+    async def decode_images_async(self, images: List[bytes]) -> List[Optional[np.ndarray]]:
+        """
+        Prétraite des images sans bloquer la boucle d'événements
+        
+        Avec un pool de processus, le décodage échappe au GIL du processus
+        principal ; sinon les images sont décodées en parallèle dans des threads.
+        """
+        with metrics.stage("decode"):
+            if self.preprocess_pool is not None:
+                return await self.preprocess_pool.preprocess_batch_async(images)
+            
+            loop = asyncio.get_running_loop()
+            return await asyncio.gather(*(
+                loop.run_in_executor(None, self._try_preprocess, image_bytes)
+                for image_bytes in images
+            ))
+    
+    def predict_batch(self, batch: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Passe avant unique du modèle sur un batch d'images prétraitées
         
-        # Convertir en RGB si nécessaire
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
+        Args:
+            batch: Images prétraitées (n, 224, 224, 3)
+        
+        Returns:
+            (probabilités softmax, embeddings ou None hors mode kNN)
+        """
+        with metrics.stage("predict"):
+            if self.embedding_model is not None and self.embedding_index is not None:
+                embeddings, predictions = self.embedding_model.predict(batch, verbose=0)
+                return predictions, embeddings
+            return self.model.predict(batch, verbose=0), None
+    
+    def rank_predictions(
+        self,
+        probabilities: np.ndarray,
+        embedding: Optional[np.ndarray] = None,
+        top_k: int = 5
+    ) -> List[Dict]:
+        """
+        Extrait les top_k plantes d'une ligne de prédiction
         
-        # Redimensionner à 224x224 (taille d'entrée de MobileNetV2)
-        image = image.resize((224, 224))
+        Args:
+            probabilities: Sortie softmax d'une image (n_classes,)
+            embedding: Embedding de l'image (mode kNN/hybride)
+            top_k: Nombre de résultats à retourner
         
-        # Convertir en array numpy
-        img_array = np.array(image)
+        Returns:
+            Liste de résultats avec plant_id et confidence
+        """
+        if embedding is not None:
+            scores = self._combine_scores(probabilities, embedding)
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            return [
+                {'plant_id': plant_id, 'confidence': float(score * 100)}
+                for plant_id, score in ranked[:top_k]
+            ]
         
-        # Normaliser les valeurs entre 0 et 1
-        img_array = img_array.astype('float32') / 255.0
+        # Obtenir les top_k prédictions
+        top_indices = np.argsort(probabilities)[-top_k:][::-1]
         
-        # Ajouter la dimension batch
-        img_array = np.expand_dims(img_array, axis=0)
+        results = []
+        for idx in top_indices:
+            confidence = float(probabilities[idx] * 100)
+            if idx < len(self.class_names):
+                plant_id = self.class_names[idx]
+                results.append({
+                    'plant_id': plant_id,
+                    'confidence': confidence
+                })
         
-        return img_array
+        return results
+    
+    def identify_arrays(self, batch: np.ndarray, top_k: int = 5) -> List[List[Dict]]:
+        """
+        Identifie un batch d'images prétraitées en une seule passe avant
+        
+        Args:
+            batch: Images prétraitées (n, 224, 224, 3)
+            top_k: Nombre de résultats par image
+        
+        Returns:
+            Liste (une entrée par image) de résultats classés
+        """
+        predictions, embeddings = self.predict_batch(batch)
+        return [
+            self.rank_predictions(
+                predictions[i],
+                embeddings[i] if embeddings is not None else None,
+                top_k
+            )
+            for i in range(len(batch))
+        ]
     
     async def identify(self, image_bytes: bytes, top_k: int = 5) -> List[Dict]:
         """
@@ -135,32 +370,240 @@ class VisionService:
             # Mode mock pour le développement
             return self._mock_identification()
         
+        key = f"{hashlib.sha256(image_bytes).hexdigest()}:{top_k}"
+        return await self.identify_flight.do(key, lambda: self._identify(image_bytes, top_k))
+    
+    async def _identify(self, image_bytes: bytes, top_k: int) -> List[Dict]:
+        """Décode, prédit et classe une image (exécuté une fois par image en cours)"""
         try:
             # Prétraiter l'image
-            processed_image = self.preprocess_image(image_bytes)
-            
-            # Faire la prédiction
-            predictions = self.model.predict(processed_image, verbose=0)
+            processed_image = (await self.decode_images_async([image_bytes]))[0]
+            if processed_image is None:
+                raise ValueError("Image illisible")
             
-            # Obtenir les top_k prédictions
-            top_indices = np.argsort(predictions[0])[-top_k:][::-1]
-            
-            results = []
-            for idx in top_indices:
-                confidence = float(predictions[0][idx] * 100)
-                if idx < len(self.class_names):
-                    plant_id = self.class_names[idx]
-                    results.append({
-                        'plant_id': plant_id,
-                        'confidence': confidence
-                    })
-            
-            return results
+            # Faire la prédiction dans le thread d'inférence, hors de la boucle
+            slow_requests.annotate(model_version=self.model_version)
+            if self.batcher is not None:
+                # Regroupée avec les identifications concurrentes de la fenêtre
+                probabilities, embedding = await self.batcher.submit(processed_image)
+                return self.rank_predictions(probabilities, embedding, top_k)
+            return (await self.inference_thread.run(self.identify_arrays, processed_image, top_k))[0]
             
         except Exception as e:
             logger.error(f"Erreur lors de l'identification: {e}")
             return self._mock_identification()
     
+    def _try_preprocess(self, image_bytes: bytes) -> Optional[np.ndarray]:
+        """Prétraite une image, retourne None si elle ne peut pas être décodée"""
+        try:
+            return self.preprocess_image(image_bytes)
+        except Exception as e:
+            logger.warning(f"Image illisible ignorée: {e}")
+            return None
+    
+    async def identify_batch(self, images: List[bytes], top_k: int = 5) -> List[Optional[List[Dict]]]:
+        """
+        Identifie plusieurs images : décodage concurrent puis une seule passe avant
+        
+        Args:
+            images: Images en bytes
+            top_k: Nombre de résultats par image
+        
+        Returns:
+            Liste alignée sur images ; None pour les images illisibles
+        """
+        if not TENSORFLOW_AVAILABLE or self.model is None:
+            return [self._mock_identification() for _ in images]
+        
+        decoded = await self.decode_images_async(images)
+        slow_requests.annotate(model_version=self.model_version)
+        return await self.inference_thread.run(self._identify_decoded, decoded, top_k)
+    
+    def identify_batch_sync(self, images: List[bytes], top_k: int = 5) -> List[Optional[List[Dict]]]:
+        """
+        Version synchrone de identify_batch pour les workers en arrière-plan
+        
+        Args:
+            images: Images en bytes
+            top_k: Nombre de résultats par image
+        
+        Returns:
+            Liste alignée sur images ; None pour les images illisibles
+        """
+        if not TENSORFLOW_AVAILABLE or self.model is None:
+            return [self._mock_identification() for _ in images]
+        
+        # Décodage dans le thread du travail, passe avant dans le thread d'inférence
+        return self.inference_thread.run_sync(self._identify_decoded, self.decode_images(images), top_k)
+    
+    def _identify_decoded(
+        self,
+        decoded: List[Optional[np.ndarray]],
+        top_k: int
+    ) -> List[Optional[List[Dict]]]:
+        """Identifie en une passe les images décodées (None = image illisible)"""
+        results: List[Optional[List[Dict]]] = [None] * len(decoded)
+        valid = [i for i, array in enumerate(decoded) if array is not None]
+        if not valid:
+            return results
+        
+        try:
+            batch = np.concatenate([decoded[i] for i in valid])
+            ranked = self.identify_arrays(batch, top_k)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'identification par batch: {e}")
+            ranked = [self._mock_identification() for _ in valid]
+        
+        for i, image_results in zip(valid, ranked):
+            results[i] = image_results
+        return results
+    
+    async def identify_fused(self, images: List[bytes], top_k: int = 5) -> Tuple[List[Dict], int]:
+        """
+        Identifie un même spécimen à partir de plusieurs vues (feuille, fleur, fruit)
+        
+        Les images passent dans le modèle en un seul batch et leurs
+        distributions sont fusionnées par moyenne des log-probabilités.
+        
+        Args:
+            images: Images en bytes d'un même spécimen
+            top_k: Nombre de résultats à retourner
+        
+        Returns:
+            (résultats classés de la fusion, nombre d'images utilisées)
+        """
+        if not TENSORFLOW_AVAILABLE or self.model is None:
+            return self._mock_identification(), len(images)
+        
+        decoded = await self.decode_images_async(images)
+        valid = [array for array in decoded if array is not None]
+        if not valid:
+            return [], 0
+        
+        try:
+            slow_requests.annotate(model_version=self.model_version)
+            predictions, embeddings = await self.inference_thread.run(self.predict_batch, np.concatenate(valid))
+        except Exception as e:
+            logger.error(f"Erreur lors de l'identification multi-vues: {e}")
+            return self._mock_identification(), len(valid)
+        
+        per_image = []
+        for i in range(len(valid)):
+            if embeddings is not None:
+                per_image.append(self._combine_scores(predictions[i], embeddings[i]))
+            else:
+                per_image.append({
+                    self.class_names[idx]: float(prob)
+                    for idx, prob in enumerate(predictions[i])
+                    if idx < len(self.class_names)
+                })
+        
+        fused = self.fuse_scores(per_image)
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+        return [
+            {'plant_id': plant_id, 'confidence': float(score * 100)}
+            for plant_id, score in ranked[:top_k]
+        ], len(valid)
+    
+    @staticmethod
+    def fuse_scores(per_image: List[Dict[str, float]], floor: float = 1e-6) -> Dict[str, float]:
+        """
+        Fusionne plusieurs distributions par moyenne des log-probabilités
+        
+        Équivaut à une moyenne géométrique renormalisée : une plante doit être
+        plausible sur toutes les vues pour obtenir un score élevé. Les
+        probabilités absentes ou nulles sont planchées à `floor`.
+        
+        Args:
+            per_image: Distributions plant_id -> probabilité, une par image
+            floor: Probabilité minimale avant passage au logarithme
+        
+        Returns:
+            Distribution fusionnée plant_id -> probabilité (somme à 1)
+        """
+        plant_ids = sorted({plant_id for scores in per_image for plant_id in scores})
+        if not plant_ids:
+            return {}
+        
+        matrix = np.array([
+            [scores.get(plant_id, 0.0) for plant_id in plant_ids]
+            for scores in per_image
+        ], dtype=np.float64)
+        log_mean = np.log(np.maximum(matrix, floor)).mean(axis=0)
+        fused = np.exp(log_mean - log_mean.max())
+        fused /= fused.sum()
+        return dict(zip(plant_ids, fused.tolist()))
+    
+    def _combine_scores(self, probabilities: np.ndarray, embedding: np.ndarray) -> Dict[str, float]:
+        """
+        Combine les probabilités softmax et les votes kNN par plante
+        
+        Les plantes absentes de la tête softmax (ajoutées après l'entraînement)
+        ne reçoivent que la part kNN du score. Si aucun voisin n'atteint
+        KNN_MIN_SIMILARITY (image hors de l'index), seule la tête softmax
+        compte, y compris en mode `knn`.
+        
+        Args:
+            probabilities: Sortie softmax (n_classes,)
+            embedding: Embedding de l'image (dim,)
+        
+        Returns:
+            Dictionnaire plant_id -> score entre 0 et 1
+        """
+        knn_scores = {}
+        if len(self.embedding_index):
+            with metrics.stage("knn_vote"):
+                knn_scores = self.embedding_index.vote(embedding, self.knn_k, self.knn_min_similarity)
+        if not knn_scores:
+            weight = 0.0
+        elif self.identification_mode == "knn":
+            weight = 1.0
+        else:
+            weight = self.knn_weight
+        
+        scores: Dict[str, float] = {}
+        if weight < 1.0:
+            for idx, prob in enumerate(probabilities):
+                if idx < len(self.class_names):
+                    scores[self.class_names[idx]] = (1 - weight) * float(prob)
+        for plant_id, score in knn_scores.items():
+            scores[plant_id] = scores.get(plant_id, 0.0) + weight * score
+        return scores
+    
+    def extract_embeddings(self, images: List[bytes]) -> np.ndarray:
+        """
+        Extrait les embeddings (avant-dernière couche) d'une liste d'images
+        
+        Args:
+            images: Images en bytes
+        
+        Returns:
+            Matrice (n, dim) d'embeddings
+        """
+        if self.embedding_model is None:
+            if self.model is None:
+                raise RuntimeError("Modèle de vision non chargé")
+            self.build_embedding_model()
+        batch = np.concatenate([self.preprocess_image(image) for image in images])
+        embeddings, _ = self.embedding_model.predict(batch, verbose=0)
+        return embeddings
+    
+    def add_reference_images(self, plant_id: str, images: List[bytes]) -> int:
+        """
+        Indexe des images de référence pour une plante, sans réentraînement
+        
+        Args:
+            plant_id: ID de la plante (doit exister dans la base de données)
+            images: Images de référence en bytes
+        
+        Returns:
+            Nombre de vecteurs dans l'index après ajout
+        """
+        if self.embedding_index is None:
+            self.load_embedding_index()
+        self.embedding_index.add(plant_id, self.extract_embeddings(images))
+        return len(self.embedding_index)
+    
     def _mock_identification(self) -> List[Dict]:
         """Mode mock pour le développement"""
         if not self.plant_database:
@@ -188,5 +631,24 @@ class VisionService:
         Returns:
             Dictionnaire avec les informations de la plante
         """
+        plant = self.lookup_plant(plant_id)
+        if self.catalog.version is not None:
+            metrics.cache_access("plant_catalog", plant is not None)
+        return plant
+    
+    def lookup_plant(self, plant_id: str) -> Optional[Dict]:
+        """
+        Fiche d'une plante : catalogue Django s'il est chargé, sinon base JSON
+        
+        Le catalogue ne contient que les plantes actives : une plante
+        désactivée dans l'admin n'est pas servie depuis la base JSON.
+        """
+        if self.catalog.version is not None:
+            return self.catalog.get(plant_id)
         return self.plant_database.get(plant_id)
 
+
+def _file_version(path: str) -> str:
+    """Version d'un fichier de modèle : nom et date de modification"""
+    modified = datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y%m%d%H%M%S")
+    return f"{os.path.basename(path)}@{modified}"
@@ -0,0 +1,184 @@
+"""
+Préchauffage au démarrage et état de disponibilité du worker
+
+TensorFlow trace le graphe d'inférence à la première prédiction (puis à
+chaque nouvelle forme de batch) : sans préchauffage, les premières requêtes
+d'un worker fraîchement démarré paient plusieurs secondes. Le préchauffage
+décode une image synthétique (démarre les processus du pool de prétraitement),
+exécute une inférence par taille de batch et remplit le cache des fiches
+plantes, puis marque le worker prêt (GET /api/health/ready). Sous serve.py,
+le chargement du modèle (différé après le fork) fait partie de cette phase.
+"""
+
+import io
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+from app.services import metrics
+from app.services.image_preprocessing import TENSOR_SHAPE
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() not in ("0", "false", "no")
+# Tailles de batch servies : 1 (identify), multi-vues, lots et travaux (32)
+DEFAULT_BATCH_SIZES = "1,2,4,8,16,32"
+
+WARMUP_SECONDS = metrics.REGISTRY.gauge(
+    "ivoire_warmup_duration_seconds",
+    "Durée des étapes du préchauffage au démarrage",
+    ["step"]
+)
+READY = metrics.REGISTRY.gauge(
+    "ivoire_ready",
+    "1 si le worker a terminé son préchauffage et accepte du trafic"
+)
+READY.set(0)
+
+
+def parse_batch_sizes(value: str) -> List[int]:
+    """Parse '1,8,32' en tailles de batch triées et dédoublonnées"""
+    return sorted({int(size) for size in value.split(",") if size.strip() and int(size) > 0})
+
+
+def make_warmup_image(width: int = 640, height: int = 480) -> bytes:
+    """Photo JPEG synthétique (bruit texturé, coût de décodage réaliste)"""
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    image = Image.fromarray(pixels).resize((width, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+class StartupWarmup:
+    """
+    Préchauffe les services en arrière-plan et expose l'état de disponibilité
+
+    Le préchauffage tourne dans un thread : la boucle d'événements reste libre
+    et /api/health/live répond pendant toute sa durée.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(
+        self,
+        vision_service,
+        serializer=None,
+        batch_sizes: Optional[List[int]] = None,
+        enabled: Optional[bool] = None
+    ):
+        """
+        Initialise le préchauffage
+
+        Args:
+            vision_service: VisionService à préchauffer
+            serializer: IdentificationSerializer dont le cache de fiches est rempli
+            batch_sizes: Tailles de batch (WARMUP_BATCH_SIZES, défaut: 1,2,4,8,16,32)
+            enabled: Préchauffage actif (WARMUP_ENABLED, défaut: true)
+        """
+        self.vision_service = vision_service
+        self.serializer = serializer
+        self.batch_sizes = batch_sizes or parse_batch_sizes(
+            os.getenv("WARMUP_BATCH_SIZES", DEFAULT_BATCH_SIZES)
+        )
+        self.enabled = WARMUP_ENABLED if enabled is None else enabled
+        self.status = self.PENDING
+        self.error: Optional[str] = None
+        self.steps: Dict[str, float] = {}
+        self.started_at: Optional[float] = None
+        self.duration: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == self.READY
+
+    def start(self) -> asyncio.Task:
+        """Lance le préchauffage en tâche de fond (à appeler au démarrage)"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(asyncio.to_thread(self.run))
+        return self._task
+
+    def run(self):
+        """Exécute toutes les étapes ; une erreur laisse le worker non prêt"""
+        self.status = self.RUNNING
+        self.started_at = time.time()
+        start = time.perf_counter()
+        try:
+            self._step("model", self.vision_service.ensure_model)
+            if self.enabled:
+                self._step("decode", self.warm_decode)
+                self._step("predict", self.warm_predict)
+                self._step("plant_fragments", self.warm_plant_fragments)
+            self.duration = time.perf_counter() - start
+            self.status = self.READY
+            READY.set(1)
+            logger.info(f"Préchauffage terminé en {self.duration:.2f}s, worker prêt")
+        except Exception as e:
+            self.duration = time.perf_counter() - start
+            self.error = f"{type(e).__name__}: {e}"
+            self.status = self.FAILED
+            logger.error(f"Échec du préchauffage: {self.error}")
+
+    def _step(self, name: str, func):
+        start = time.perf_counter()
+        func()
+        self.steps[name] = round(time.perf_counter() - start, 4)
+        WARMUP_SECONDS.set(self.steps[name], step=name)
+        logger.info(f"Préchauffage '{name}': {self.steps[name]:.2f}s")
+
+    def warm_decode(self):
+        """Décode une image par worker du pool (démarrage des processus 'spawn')"""
+        pool = self.vision_service.preprocess_pool
+        copies = pool.workers if pool is not None else 1
+        decoded = self.vision_service.decode_images([make_warmup_image()] * copies)
+        if any(tensor is None for tensor in decoded):
+            raise RuntimeError("Image de préchauffage non décodée")
+
+    def warm_predict(self):
+        """Une inférence par taille de batch (trace des graphes TensorFlow)"""
+        if self.vision_service.model is None:
+            logger.info("Pas de modèle chargé (mode mock) : inférence non préchauffée")
+            return
+        for size in self.batch_sizes:
+            batch = np.zeros((size,) + TENSOR_SHAPE, dtype=np.float32)
+            start = time.perf_counter()
+            # Dans le thread d'inférence, comme les requêtes qui arrivent déjà
+            self.vision_service.inference_thread.run_sync(self.vision_service.identify_arrays, batch, 5)
+            WARMUP_SECONDS.set(round(time.perf_counter() - start, 4), step=f"predict_batch_{size}")
+
+    def warm_plant_fragments(self):
+        """Sérialise à l'avance la fiche de chaque plante connue du modèle"""
+        if self.serializer is None:
+            return
+        vision = self.vision_service
+        plant_ids = vision.class_names or list(vision.plant_database)
+        for plant_id in plant_ids:
+            plant = vision.lookup_plant(plant_id)
+            if plant is None:
+                continue
+            try:
+                self.serializer.plant_fragment(plant, vision.catalog.version)
+            except ValueError as e:
+                # Fiche invalide : l'erreur se reproduira à la requête, pas au démarrage
+                logger.warning(f"Fiche de la plante {plant_id} non préchauffée: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """État du préchauffage pour les endpoints de santé"""
+        return {
+            "status": self.status,
+            "enabled": self.enabled,
+            "batch_sizes": self.batch_sizes,
+            "steps": self.steps,
+            "duration_seconds": round(self.duration, 4) if self.duration is not None else None,
+            "error": self.error
+        }
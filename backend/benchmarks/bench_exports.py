@@ -0,0 +1,69 @@
+"""
+Micro-benchmarks des exports de l'admin Django (django_project/export_utils.py)
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+from conftest import BACKEND_DIR
+
+django = pytest.importorskip("django")
+
+DJANGO_DIR = os.path.join(BACKEND_DIR, "django_project")
+sys.path.insert(0, DJANGO_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_project.settings")
+django.setup()
+
+import export_utils  # noqa: E402
+from plants.models import Plant  # noqa: E402
+
+FIELDS = ['plant_id', 'scientific_name', 'common_name_fr', 'family', 'genus', 'species',
+          'plant_type', 'description', 'parts_used', 'regions', 'is_active', 'created_at']
+
+
+class PlantList(list):
+    """Liste d'instances se comportant comme un queryset pour les exports"""
+    model = Plant
+
+
+def make_plants(count: int) -> PlantList:
+    plants = PlantList()
+    for i in range(count):
+        plants.append(Plant(
+            plant_id=f"plante-{i}",
+            scientific_name=f"Genus species{i}",
+            common_name_fr=f"Plante {i}",
+            common_names_local=["nom baoulé", "nom dioula"],
+            family="Fabaceae",
+            genus="Genus",
+            species=f"species{i}",
+            description="Arbuste des savanes utilisé en médecine traditionnelle. " * 4,
+            plant_type="shrub",
+            parts_used=["feuilles", "écorce"],
+            regions=["Côte d'Ivoire", "Ghana"],
+            is_active=True,
+            created_at=datetime(2024, 1, 1)
+        ))
+    return plants
+
+
+EXPORTERS = {
+    "csv": export_utils.export_to_csv,
+    "json": export_utils.export_to_json,
+    "excel": export_utils.export_to_excel,
+    "pdf": export_utils.export_to_pdf,
+}
+OPTIONAL_MODULES = {"excel": "openpyxl", "pdf": "reportlab"}
+
+
+@pytest.mark.parametrize("count", [1_000, 10_000], ids=["1k", "10k"])
+@pytest.mark.parametrize("exporter", list(EXPORTERS))
+def bench_export(benchmark, exporter, count):
+    if exporter in OPTIONAL_MODULES:
+        pytest.importorskip(OPTIONAL_MODULES[exporter])
+    queryset = make_plants(count)
+    response = benchmark(EXPORTERS[exporter], None, None, queryset, FIELDS, "plantes")
+    assert response.status_code == 200
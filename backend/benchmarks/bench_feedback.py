@@ -0,0 +1,34 @@
+"""
+Micro-benchmarks du service de feedback sur 10k/100k/1M feedbacks synthétiques
+(tailles choisies avec --bench-sizes)
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.models.feedback_schemas import FeedbackQuery, FeedbackStatus, FeedbackType
+
+QUERIES = {
+    "all": FeedbackQuery(limit=100),
+    "status_plant": FeedbackQuery(status=FeedbackStatus.APPROVED, plant_id="42", limit=100),
+    "rating_range": FeedbackQuery(min_rating=4, feedback_type=FeedbackType.RATING, limit=100),
+    "date_window": FeedbackQuery(start_date=datetime(2024, 1, 2), end_date=datetime(2024, 1, 3), limit=100),
+    "deep_page": FeedbackQuery(limit=100, offset=900),
+}
+
+
+@pytest.mark.parametrize("query_name", list(QUERIES))
+def bench_query_feedbacks(benchmark, feedback_service, query_name):
+    results = benchmark(feedback_service.query_feedbacks, QUERIES[query_name])
+    assert len(results) <= 100
+
+
+def bench_get_stats(benchmark, feedback_service):
+    stats = benchmark(feedback_service.get_stats)
+    assert stats.total_feedbacks == len(feedback_service.feedbacks)
+
+
+def bench_prepare_training_dataset(benchmark, feedback_service):
+    entries = benchmark(feedback_service.prepare_training_dataset)
+    assert entries
@@ -0,0 +1,58 @@
+"""
+Micro-benchmarks du parsing des réponses LLM
+"""
+
+import json
+
+import pytest
+
+from app.services.llm_service import LLMService
+
+PLANT = {"scientific_name": "Moringa oleifera", "common_names": {"fr": "Moringa"}}
+
+
+def make_completion(target_chars: int) -> str:
+    """Réponse LLM réaliste : texte d'introduction, JSON volumineux, conclusion"""
+    uses = []
+    i = 0
+    while len(json.dumps(uses, ensure_ascii=False)) < target_chars:
+        uses.append({
+            "preparation": "décoction",
+            "indication": f"indication traditionnelle n°{i}",
+            "recipe": "Faire bouillir une poignée de feuilles dans un litre d'eau pendant dix minutes. " * 2
+        })
+        i += 1
+    data = {
+        "summary": "Plante aux nombreuses propriétés médicinales.",
+        "properties": [{"type": "antioxydant", "description": "…", "evidence_level": "modéré"}],
+        "traditional_uses": uses,
+        "diseases_treated": ["fièvre", "diabète"],
+        "preparation_methods": ["décoction"],
+        "precautions": ["Consulter un médecin"],
+        "warnings": ["Déconseillé pendant la grossesse"],
+        "formatted_response": "Réponse détaillée. " * 50
+    }
+    return (
+        "Voici les informations demandées au format JSON :\n\n```json\n"
+        + json.dumps(data, ensure_ascii=False, indent=2)
+        + "\n```\n\nN'hésitez pas à consulter un professionnel de santé."
+    )
+
+
+@pytest.fixture(scope="module")
+def llm_service():
+    return LLMService()
+
+
+@pytest.mark.parametrize("size", [2_000, 50_000, 500_000], ids=["2KB", "50KB", "500KB"])
+def bench_parse_llm_response(benchmark, llm_service, size):
+    completion = make_completion(size)
+    result = benchmark(llm_service._parse_llm_response, completion, PLANT)
+    assert result["traditional_uses"]
+
+
+def bench_parse_llm_response_plain_text(benchmark, llm_service):
+    # Réponse sans JSON : chemin de repli
+    completion = "La plante est utilisée en décoction contre la fièvre. " * 2000
+    result = benchmark(llm_service._parse_llm_response, completion, PLANT)
+    assert result["formatted_response"] == completion
@@ -0,0 +1,50 @@
+"""
+Micro-benchmarks du service de vision : prétraitement et extraction du top-k
+"""
+
+import numpy as np
+import pytest
+
+from conftest import make_image
+
+from app.services.vision_service import VisionService
+
+IMAGE_SIZES = [(320, 240), (1024, 768), (4032, 3024)]
+IMAGE_FORMATS = ["JPEG", "PNG", "WEBP"]
+
+
+@pytest.fixture(scope="module")
+def vision_service():
+    # Sans chargement du modèle ni des bases : seules les méthodes mesurées sont utilisées
+    service = VisionService.__new__(VisionService)
+    service.class_names = [str(i) for i in range(1000)]
+    service.embedding_index = None
+    return service
+
+
+@pytest.mark.parametrize("image_format", IMAGE_FORMATS)
+@pytest.mark.parametrize("size", IMAGE_SIZES, ids=[f"{w}x{h}" for w, h in IMAGE_SIZES])
+def bench_preprocess_image(benchmark, vision_service, size, image_format):
+    image_bytes = make_image(size[0], size[1], image_format)
+    result = benchmark(vision_service.preprocess_image, image_bytes)
+    assert result.shape == (1, 224, 224, 3)
+
+
+@pytest.mark.parametrize("num_classes", [4, 100, 1000])
+def bench_rank_predictions(benchmark, vision_service, num_classes):
+    rng = np.random.default_rng(0)
+    logits = rng.normal(size=num_classes).astype(np.float32)
+    probabilities = np.exp(logits) / np.exp(logits).sum()
+    vision_service.class_names = [str(i) for i in range(num_classes)]
+    results = benchmark(vision_service.rank_predictions, probabilities, None, 5)
+    assert len(results) == min(5, num_classes)
+
+
+def bench_fuse_scores(benchmark):
+    rng = np.random.default_rng(0)
+    per_image = []
+    for _ in range(8):
+        probabilities = rng.dirichlet(np.ones(1000))
+        per_image.append({str(i): float(p) for i, p in enumerate(probabilities)})
+    fused = benchmark(VisionService.fuse_scores, per_image)
+    assert len(fused) == 1000
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compare deux exécutions sauvegardées des micro-benchmarks et signale les régressions
+
+Les exécutions sont les fichiers JSON écrits par --benchmark-save dans
+benchmarks/.benchmarks (nom complet, chemin ou préfixe numérique "0001") ;
+la référence versionnée est benchmarks/baseline.json.
+
+Usage (depuis backend/):
+    python benchmarks/compare.py benchmarks/baseline.json candidate --threshold 10
+    python benchmarks/compare.py 0001 0002 --threshold 10
+    python benchmarks/compare.py baseline latest --stat mean
+
+Code de sortie 1 si un benchmark a ralenti de plus de --threshold %.
+"""
+
+import os
+import sys
+import json
+import glob
+import argparse
+from typing import Dict
+
+STORAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".benchmarks")
+
+
+def find_run(name: str) -> str:
+    """Résout un nom d'exécution en fichier JSON ('latest' = la plus récente)"""
+    if os.path.isfile(name):
+        return name
+    runs = sorted(glob.glob(os.path.join(STORAGE_DIR, "*", "*.json")), key=os.path.basename)
+    if not runs:
+        raise FileNotFoundError(f"Aucune exécution sauvegardée dans {STORAGE_DIR}")
+    if name == "latest":
+        return runs[-1]
+    # Fichiers "0001_<nom>.json" : numéro ou nom exact, sinon sous-chaîne
+    matches = []
+    for run in runs:
+        stem = os.path.basename(run)[:-len(".json")]
+        number, _, label = stem.partition("_")
+        if name in (stem, number, label):
+            matches.append(run)
+    if not matches:
+        matches = [run for run in runs if name in os.path.basename(run)]
+    if not matches:
+        raise FileNotFoundError(f"Exécution introuvable: {name}")
+    return matches[-1]
+
+
+def load_stats(path: str, stat: str) -> Dict[str, float]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {bench["fullname"]: bench["stats"][stat] for bench in data["benchmarks"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparaison de deux exécutions des micro-benchmarks")
+    parser.add_argument('baseline', help="Exécution de référence")
+    parser.add_argument('current', nargs='?', default="latest", help="Exécution à comparer (défaut: latest)")
+    parser.add_argument('--stat', default="median", choices=["min", "median", "mean", "max"])
+    parser.add_argument('--threshold', type=float, default=10.0, help="Ralentissement toléré en %%")
+    args = parser.parse_args()
+
+    baseline_path = find_run(args.baseline)
+    current_path = find_run(args.current)
+    baseline = load_stats(baseline_path, args.stat)
+    current = load_stats(current_path, args.stat)
+
+    print(f"Référence: {os.path.basename(baseline_path)}")
+    print(f"Actuel:    {os.path.basename(current_path)}")
+    print(f"Statistique: {args.stat}, seuil de régression: +{args.threshold}%\n")
+
+    regressions = []
+    for name in sorted(set(baseline) | set(current)):
+        if name not in baseline or name not in current:
+            state = "nouveau" if name not in baseline else "supprimé"
+            print(f"  {'':>10}  {state:<10} {name}")
+            continue
+        before, after = baseline[name], current[name]
+        delta = (after - before) / before * 100 if before else 0.0
+        if delta > args.threshold:
+            flag = "RÉGRESSION"
+            regressions.append(name)
+        elif delta < -args.threshold:
+            flag = "amélioré"
+        else:
+            flag = ""
+        print(f"  {delta:>+9.1f}%  {flag:<10} {name} ({before * 1e3:.3f} ms -> {after * 1e3:.3f} ms)")
+
+    if regressions:
+        print(f"\n{len(regressions)} régression(s) au-delà de {args.threshold}%")
+        sys.exit(1)
+    print("\nAucune régression")
+
+
+if __name__ == "__main__":
+    main()
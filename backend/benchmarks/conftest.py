@@ -0,0 +1,59 @@
+"""
+Données synthétiques partagées par les micro-benchmarks
+"""
+
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from generate_fixtures import generate_feedbacks
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--bench-sizes",
+        default="10000,100000",
+        help="Nombres de feedbacks synthétiques (ex: 10000,100000,1000000)"
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "feedback_count" in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption("--bench-sizes").split(",")]
+        metafunc.parametrize(
+            "feedback_count", sizes,
+            ids=[f"{size // 1000}k" if size < 1_000_000 else f"{size // 1_000_000}M" for size in sizes],
+            scope="session"
+        )
+
+
+def make_image(width: int, height: int, image_format: str, seed: int = 0) -> bytes:
+    """Photo synthétique texturée (coût de décodage proche d'une vraie photo)"""
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (max(1, height // 8), max(1, width // 8), 3), dtype=np.uint8)
+    image = Image.fromarray(pixels).resize((width, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+PLANT_IDS = [str(i) for i in range(1, 201)]
+# Pool d'images fictif : prepare_training_dataset ne lit pas les fichiers
+IMAGE_HASHES = [f"{i:064x}" for i in range(500)]
+
+
+@pytest.fixture(scope="session")
+def feedback_service(feedback_count, tmp_path_factory):
+    """FeedbackService chargé avec `feedback_count` feedbacks en mémoire"""
+    from app.services.feedback_service import FeedbackService
+
+    service = FeedbackService(storage_path=str(tmp_path_factory.mktemp(f"feedbacks_{feedback_count}")))
+    service.feedbacks = list(generate_feedbacks(feedback_count, PLANT_IDS, image_hashes=IMAGE_HASHES))
+    return service
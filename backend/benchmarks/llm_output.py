@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Rapport tokens et latence par appel LLM selon le mode de sortie
+
+Compare LLM_OUTPUT_MODE=text (JSON demandé en texte libre, 2000 tokens de
+budget, formatted_response générée par le LLM) aux modes structurés (mode
+JSON du fournisseur, schéma compact, budget réduit) : tokens du prompt et de
+la réponse, latence, réponses tronquées et réponses non exploitables, pour
+chaque appel puis par mode. --rag on off compare aussi les prompts sans et
+avec les faits vérifiés du catalogue (LLM_RAG) : les fiches de
+data/plants_database.json n'en ont pas, celles de generate_fixtures.py
+(--plants-db data/synthetic/plants_database.json) ou du catalogue Django
+si. --model mesure un autre modèle, par exemple un modèle plus petit avec
+les faits vérifiés.
+
+Appelle le fournisseur configuré (GROQ_API_KEY / OPENAI_API_KEY, LLM_MODEL),
+ou le serveur factice des tests de charge avec --stub.
+
+Usage:
+    python benchmarks/llm_output.py --plants 5 --modes text json
+    python benchmarks/llm_output.py --stub --modes text json json_schema
+    python benchmarks/llm_output.py --plants-db data/synthetic/plants_database.json \
+        --rag off on --model llama-3.1-8b-instant
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from loadtest.stub_llm import start_stub_llm
+
+PLANTS_DB = os.path.join(BACKEND_DIR, "data", "plants_database.json")
+
+
+async def measure_mode(mode: str, rag: str, plants: List[Dict], args) -> List[Dict]:
+    """Un appel par plante (et par répétition) dans un mode de sortie, avec ou sans faits vérifiés"""
+    from app.models.schemas import MedicinalInfo
+    from app.services.llm_service import LLMService
+    from app.services.structured_output import parse_tolerant
+
+    service = LLMService()
+    service.output_mode = mode
+    service.max_tokens = args.max_tokens
+    service.rag_enabled = rag == "on"
+    # Latence du modèle principal : pas de requête couverte (la bascule reste active)
+    service.hedge_enabled = False
+    if service.client is None:
+        raise SystemExit("Aucun client LLM : définir GROQ_API_KEY (ou OPENAI_API_KEY) ou utiliser --stub")
+
+    variant = mode if len(args.rag) == 1 else f"{mode}/rag-{rag}"
+    calls = []
+    for _ in range(args.repeat):
+        for plant in plants:
+            prompt = service._build_prompt(plant, args.query)
+            start = time.perf_counter()
+            try:
+                route, response = await service._complete(prompt)
+            except Exception as e:
+                calls.append({"mode": variant, "plant": plant["id"], "error": str(e)})
+                continue
+            latency = time.perf_counter() - start
+            choice = response.choices[0]
+            content = choice.message.content or ""
+            info = service._parse_llm_response(content, plant)
+            try:
+                MedicinalInfo(**info)
+                valid = parse_tolerant(content) is not None and bool(info["summary"])
+            except ValueError:
+                valid = False
+            usage = response.usage
+            calls.append({
+                "mode": variant,
+                "plant": plant["id"],
+                "route": route.name,
+                "prompt_tokens": usage.prompt_tokens if usage else None,
+                "completion_tokens": usage.completion_tokens if usage else None,
+                "latency_ms": round(latency * 1000, 1),
+                "truncated": choice.finish_reason == "length",
+                "valid": valid,
+            })
+    return calls
+
+
+def summarize(calls: List[Dict]) -> Dict:
+    ok = [call for call in calls if "error" not in call]
+    latencies = sorted(call["latency_ms"] for call in ok)
+
+    def mean(field: str) -> float:
+        values = [call[field] for call in ok if call[field] is not None]
+        return round(sum(values) / len(values), 1) if values else 0.0
+
+    return {
+        "calls": len(calls),
+        "errors": len(calls) - len(ok),
+        "prompt_tokens": mean("prompt_tokens"),
+        "completion_tokens": mean("completion_tokens"),
+        "p50_ms": latencies[len(latencies) // 2] if latencies else 0.0,
+        "max_ms": latencies[-1] if latencies else 0.0,
+        "truncated": sum(1 for call in ok if call["truncated"]),
+        "invalid": sum(1 for call in ok if not call["valid"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokens et latence par appel LLM selon LLM_OUTPUT_MODE")
+    parser.add_argument('--modes', nargs='+', default=["text", "json"], choices=["text", "json", "json_schema"])
+    parser.add_argument('--plants', type=int, default=5, help="Plantes de --plants-db")
+    parser.add_argument('--plants-db', default=PLANTS_DB, help="Base des plantes (format data/plants_database.json)")
+    parser.add_argument('--rag', nargs='+', default=["on"], choices=["on", "off"], help="Faits vérifiés dans le prompt")
+    parser.add_argument('--model', help="Modèle de la route principale (défaut: LLM_MODEL)")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--query', help="Question de l'utilisateur (ex: fièvre)")
+    parser.add_argument('--max-tokens', type=int, default=0, help="LLM_MAX_TOKENS (0 = selon le mode)")
+    parser.add_argument('--stub', action='store_true', help="Serveur LLM factice local")
+    parser.add_argument('--stub-latency-ms', type=float, default=300)
+    parser.add_argument('--output', help="Rapport JSON")
+    args = parser.parse_args()
+
+    stub = None
+    if args.stub:
+        stub = start_stub_llm(latency_ms=args.stub_latency_ms)
+        os.environ.update({
+            "LLM_PROVIDER": "groq",
+            "GROQ_API_KEY": "stub",
+            "GROQ_BASE_URL": f"http://127.0.0.1:{stub.server_address[1]}",
+        })
+
+    if args.model:
+        os.environ["LLM_MODEL"] = args.model
+
+    with open(args.plants_db, encoding="utf-8") as f:
+        plants = json.load(f)["plants"][:args.plants]
+
+    calls: List[Dict] = []
+    try:
+        for mode in args.modes:
+            for rag in args.rag:
+                calls.extend(asyncio.run(measure_mode(mode, rag, plants, args)))
+    finally:
+        if stub is not None:
+            stub.shutdown()
+
+    print(f"{'mode':<20} {'plante':<28} {'route':<36} {'prompt':>7} {'réponse':>8} {'latence':>10}  état")
+    for call in calls:
+        if "error" in call:
+            print(f"{call['mode']:<20} {call['plant']:<28} erreur: {call['error']}")
+            continue
+        state = "tronquée" if call["truncated"] else ("ok" if call["valid"] else "inexploitable")
+        print(
+            f"{call['mode']:<20} {call['plant']:<28} {call['route']:<36} {call['prompt_tokens'] or '-':>7} "
+            f"{call['completion_tokens'] or '-':>8} {call['latency_ms']:>8.0f}ms  {state}"
+        )
+
+    variants = list(dict.fromkeys(call["mode"] for call in calls))
+    summary = {variant: summarize([call for call in calls if call["mode"] == variant]) for variant in variants}
+    print(f"\n{'mode':<20} {'appels':>6} {'prompt':>8} {'réponse':>8} {'p50':>9} {'max':>9} {'tronquées':>10} {'inexploitables':>15}")
+    for mode, row in summary.items():
+        print(
+            f"{mode:<20} {row['calls']:>6} {row['prompt_tokens']:>8} {row['completion_tokens']:>8} "
+            f"{row['p50_ms']:>7.0f}ms {row['max_ms']:>7.0f}ms {row['truncated']:>10} {row['invalid']:>15}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "calls": calls}, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
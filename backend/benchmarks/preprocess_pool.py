@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark du pool de prétraitement : identifications par seconde selon le
+nombre de processus workers, sous charge concurrente
+
+Usage:
+    python benchmarks/preprocess_pool.py --workers 0 1 2 4 --concurrency 16
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import asyncio
+import argparse
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.vision_service import VisionService
+from app.services.image_preprocessing import PreprocessPool
+
+
+def make_images(count: int, width: int, height: int, seed: int = 0):
+    """Génère des photos JPEG synthétiques (bruit texturé, coût de décodage réaliste)"""
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        pixels = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+        image = Image.fromarray(pixels).resize((width, height), Image.BILINEAR)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=90)
+        images.append(buffer.getvalue())
+    return images
+
+
+async def run_load(vision_service: VisionService, images, requests: int, concurrency: int) -> float:
+    """
+    Envoie `requests` identifications avec `concurrency` requêtes simultanées
+
+    Sans modèle chargé, seule l'étape de prétraitement est mesurée.
+
+    Returns:
+        Durée totale en secondes
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    with_model = vision_service.model is not None
+
+    async def one(i: int):
+        async with semaphore:
+            image_bytes = images[i % len(images)]
+            if with_model:
+                await vision_service.identify(image_bytes)
+            else:
+                await vision_service.decode_images_async([image_bytes])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du pool de prétraitement")
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4],
+                        help='Nombres de processus à tester (0 = threads du processus principal)')
+    parser.add_argument('--requests', type=int, default=200, help='Identifications par mesure')
+    parser.add_argument('--concurrency', type=int, default=16, help='Requêtes simultanées')
+    parser.add_argument('--width', type=int, default=1600, help='Largeur des images')
+    parser.add_argument('--height', type=int, default=1200, help='Hauteur des images')
+    parser.add_argument('--output', type=str, help='Fichier JSON de rapport')
+    args = parser.parse_args()
+
+    images = make_images(16, args.width, args.height)
+    vision_service = VisionService()
+    stage = "identify" if vision_service.model is not None else "preprocess"
+
+    print("=" * 50)
+    print(f"Benchmark prétraitement ({stage}), {args.width}x{args.height}, "
+          f"{args.concurrency} requêtes simultanées")
+    print("=" * 50)
+
+    results = []
+    for workers in args.workers:
+        vision_service.preprocess_pool = PreprocessPool(workers) if workers > 0 else None
+        try:
+            # Échauffement (démarrage des processus)
+            asyncio.run(run_load(vision_service, images, args.concurrency, args.concurrency))
+            duration = asyncio.run(run_load(vision_service, images, args.requests, args.concurrency))
+        finally:
+            if vision_service.preprocess_pool is not None:
+                vision_service.preprocess_pool.shutdown()
+
+        throughput = args.requests / duration
+        results.append({"workers": workers, "requests_per_second": round(throughput, 2)})
+        print(f"  workers={workers:<3} {throughput:8.1f} {stage}/s")
+
+    report = {
+        "stage": stage,
+        "image_size": [args.width, args.height],
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "cpu_count": os.cpu_count(),
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nRapport: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
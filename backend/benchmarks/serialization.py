@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark de sérialisation d'une réponse /api/identify
+
+Compare le chemin pydantic (IdentificationResponse + revalidation et
+encodage JSON de FastAPI) aux fragments pré-sérialisés assemblés en bytes.
+
+Usage:
+    python benchmarks/serialization.py --iterations 20000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models.schemas import IdentificationResponse
+from app.services.serialization import IdentificationSerializer, ORJSON_AVAILABLE
+from app.services.llm_service import LLMService
+
+PLANTS_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "plants_database.json")
+
+
+def make_result(with_medicinal_info: bool):
+    """Réponse type : meilleure plante + trois alternatives"""
+    with open(PLANTS_DB, encoding="utf-8") as f:
+        plants = json.load(f)["plants"]
+    medicinal_info = LLMService()._generate_mock_info(plants[0], None) if with_medicinal_info else None
+    return {
+        "plant": plants[0],
+        "confidence": 91.25,
+        "alternatives": [
+            {"plant": plant, "confidence": 8.0 / (i + 1)}
+            for i, plant in enumerate(plants[1:4])
+        ],
+        "medicinal_info": medicinal_info,
+        "user_intent": "medecine" if with_medicinal_info else None
+    }
+
+
+def pydantic_path(result) -> bytes:
+    # Équivalent du traitement FastAPI avec response_model
+    response = IdentificationResponse(**result)
+    validated = IdentificationResponse.model_validate(response.model_dump())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def fragment_path(serializer: IdentificationSerializer, result) -> bytes:
+    return serializer.render(result, catalog_version=1)
+
+
+def measure(func, iterations: int) -> float:
+    """Temps moyen par appel en microsecondes"""
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de sérialisation /api/identify")
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    serializer = IdentificationSerializer()
+    print("=" * 50)
+    print(f"Sérialisation d'une réponse /api/identify (orjson: {ORJSON_AVAILABLE})")
+    print("=" * 50)
+
+    for with_medicinal_info in (False, True):
+        result = make_result(with_medicinal_info)
+        assert json.loads(pydantic_path(result)) == json.loads(fragment_path(serializer, result))
+        slow = measure(lambda: pydantic_path(result), args.iterations)
+        fast = measure(lambda: fragment_path(serializer, result), args.iterations)
+        label = "avec infos médicinales" if with_medicinal_info else "sans infos médicinales"
+        print(f"  {label:<24} pydantic: {slow:7.1f} µs   fragments: {fast:7.1f} µs   (x{slow / fast:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Script de construction de l'index d'embeddings pour l'identification kNN
+Permet de rendre une nouvelle espèce reconnaissable sans réentraînement
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+
+from app.services.vision_service import VisionService
+from app.services.embedding_index import EmbeddingIndex
+
+REFERENCE_DIR = "data/reference_images"
+INDEX_PATH = "models/embedding_index.npz"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+BATCH_SIZE = 32
+
+
+def index_plant(vision_service: VisionService, plant_id: str, plant_dir: Path) -> int:
+    """
+    Indexe toutes les images de référence d'une plante
+
+    Args:
+        vision_service: Service de vision (modèle chargé)
+        plant_id: ID de la plante
+        plant_dir: Répertoire contenant les images de référence
+
+    Returns:
+        Nombre d'images indexées
+    """
+    paths = sorted(p for p in plant_dir.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    for start in range(0, len(paths), BATCH_SIZE):
+        images = [p.read_bytes() for p in paths[start:start + BATCH_SIZE]]
+        vision_service.add_reference_images(plant_id, images)
+    return len(paths)
+
+
+def build_index(reference_dir: str, index_path: str, plant_ids=None, rebuild: bool = False):
+    """Construit ou complète l'index d'embeddings"""
+    print("=" * 50)
+    print("Construction de l'index d'embeddings")
+    print("=" * 50)
+
+    vision_service = VisionService()
+    if vision_service.model is None:
+        print("❌ Erreur: modèle de vision non chargé (vérifiez MODEL_PATH)")
+        sys.exit(1)
+
+    if rebuild or not os.path.exists(index_path):
+        vision_service.embedding_index = EmbeddingIndex()
+    else:
+        vision_service.embedding_index = EmbeddingIndex.load(index_path)
+
+    root = Path(reference_dir)
+    if not root.exists():
+        print(f"❌ Erreur: répertoire {reference_dir} introuvable")
+        sys.exit(1)
+
+    plant_dirs = sorted(d for d in root.iterdir() if d.is_dir())
+    if plant_ids:
+        plant_dirs = [d for d in plant_dirs if d.name in plant_ids]
+
+    for plant_dir in plant_dirs:
+        if plant_dir.name not in vision_service.plant_database:
+            print(f"⚠️  {plant_dir.name} absente de la base de données, ignorée")
+            continue
+        count = index_plant(vision_service, plant_dir.name, plant_dir)
+        print(f"   ✅ {plant_dir.name}: {count} images indexées")
+
+    index = vision_service.embedding_index
+    index.build()
+    index.save(index_path)
+    print(f"\nIndex sauvegardé: {index_path}")
+    print(f"   {len(index)} vecteurs, {len(index.plant_ids)} plantes, dimension {index.dim}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construire l'index d'embeddings kNN")
+    parser.add_argument(
+        '--reference-dir',
+        type=str,
+        default=REFERENCE_DIR,
+        help='Répertoire des images de référence (un sous-dossier par plant_id)'
+    )
+    parser.add_argument(
+        '--index-path',
+        type=str,
+        default=os.getenv("EMBEDDING_INDEX_PATH", INDEX_PATH),
+        help='Chemin du fichier d\'index'
+    )
+    parser.add_argument(
+        '--plant-id',
+        action='append',
+        help='N\'indexer que ces plantes (ajout incrémental à l\'index existant)'
+    )
+    parser.add_argument(
+        '--rebuild',
+        action='store_true',
+        help='Reconstruire l\'index depuis zéro'
+    )
+
+    args = parser.parse_args()
+
+    build_index(
+        reference_dir=args.reference_dir,
+        index_path=args.index_path,
+        plant_ids=args.plant_id,
+        rebuild=args.rebuild
+    )
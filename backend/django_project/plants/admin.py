@@ -5,7 +5,7 @@ from django.utils.safestring import mark_safe
 from django.urls import path
 from django.shortcuts import redirect
 from django.db.models import Count, Q
-from .models import Plant, MedicinalProperty, TraditionalUse
+from .models import Plant, MedicinalProperty, TraditionalUse, CatalogVersion
 import export_utils
 
 
@@ -140,11 +140,13 @@ class PlantAdmin(admin.ModelAdmin):
     
     def activate_plants(self, request, queryset):
         updated = queryset.update(is_active=True)
+        CatalogVersion.bump()  # update() ne déclenche pas les signaux
         self.message_user(request, f"{updated} plante(s) activée(s).", level='success')
     activate_plants.short_description = "✓ Activer les plantes sélectionnées"
     
     def deactivate_plants(self, request, queryset):
         updated = queryset.update(is_active=False)
+        CatalogVersion.bump()  # update() ne déclenche pas les signaux
         self.message_user(request, f"{updated} plante(s) désactivée(s).", level='warning')
     deactivate_plants.short_description = "✗ Désactiver les plantes sélectionnées"
     
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
 
 
@@ -92,3 +93,32 @@ class TraditionalUse(models.Model):
     def __str__(self):
         return f"{self.plant.scientific_name} - {self.indication}"
 
+
+
+class CatalogVersion(models.Model):
+    """
+    Version du catalogue des plantes (ligne unique)
+    
+    Incrémentée à chaque modification d'une plante, propriété ou usage :
+    l'API FastAPI la surveille pour rafraîchir son cache du catalogue.
+    """
+    
+    version = models.BigIntegerField(default=0, verbose_name="Version")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
+    
+    class Meta:
+        verbose_name = "Version du catalogue"
+        verbose_name_plural = "Version du catalogue"
+    
+    def __str__(self):
+        return f"Catalogue v{self.version}"
+    
+    @classmethod
+    def bump(cls):
+        """Incrémente atomiquement la version du catalogue"""
+        updated = cls.objects.filter(pk=1).update(
+            version=models.F('version') + 1,
+            updated_at=timezone.now()
+        )
+        if not updated:
+            cls.objects.get_or_create(pk=1, defaults={'version': 1})
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Plant, MedicinalProperty, TraditionalUse, CatalogVersion
+
+
+@receiver(post_save, sender=Plant)
+@receiver(post_delete, sender=Plant)
+@receiver(post_save, sender=MedicinalProperty)
+@receiver(post_delete, sender=MedicinalProperty)
+@receiver(post_save, sender=TraditionalUse)
+@receiver(post_delete, sender=TraditionalUse)
+def bump_catalog_version(sender, **kwargs):
+    """Invalide le cache du catalogue de l'API après toute modification"""
+    CatalogVersion.bump()
@@ -0,0 +1,490 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Générateur de données synthétiques à grande échelle
+
+Produit, de façon déterministe à partir d'une graine :
+- un catalogue de plantes (format data/plants_database.json) avec noms
+  locaux, régions et images de référence (reference_images/<plant_id>/)
+- des feedbacks au format FeedbackService (feedbacks/feedbacks.json) avec
+  des distributions réalistes de types, statuts et notes, et les images
+  correspondantes (feedbacks/images/<sha256>.jpg)
+- des fixtures Django (django/plants.json, django/feedbacks.json) pour
+  `manage.py loaddata`
+
+Les fichiers JSON sont écrits en flux : des millions de feedbacks tiennent
+en mémoire constante.
+
+Usage:
+    python generate_fixtures.py --plants 2000 --feedbacks 1000000 --output data/synthetic
+    FEEDBACK_STORAGE_PATH=data/synthetic/feedbacks PLANT_DB_PATH=data/synthetic/plants_database.json \\
+        python -m uvicorn app.main:app
+    cd django_project && python manage.py loaddata ../data/synthetic/django/plants.json
+"""
+
+import io
+import os
+import json
+import random
+import hashlib
+import argparse
+from bisect import bisect
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Tuple
+
+FAMILIES = {
+    "Fabaceae": ["Parkia", "Acacia", "Cassia", "Tamarindus", "Erythrina", "Mimosa"],
+    "Euphorbiaceae": ["Jatropha", "Euphorbia", "Alchornea", "Ricinus", "Manihot"],
+    "Rubiaceae": ["Morinda", "Nauclea", "Mitragyna", "Sarcocephalus", "Crossopteryx"],
+    "Asteraceae": ["Vernonia", "Ageratum", "Bidens", "Chromolaena", "Aspilia"],
+    "Lamiaceae": ["Ocimum", "Hyptis", "Leucas", "Vitex", "Plectranthus"],
+    "Meliaceae": ["Azadirachta", "Khaya", "Trichilia", "Carapa", "Ekebergia"],
+    "Moraceae": ["Ficus", "Milicia", "Antiaris", "Treculia"],
+    "Apocynaceae": ["Rauvolfia", "Strophanthus", "Alstonia", "Voacanga", "Holarrhena"],
+    "Annonaceae": ["Annona", "Xylopia", "Monodora", "Uvaria"],
+    "Combretaceae": ["Combretum", "Terminalia", "Guiera", "Anogeissus"],
+    "Zingiberaceae": ["Zingiber", "Aframomum", "Costus", "Curcuma"],
+    "Moringaceae": ["Moringa"],
+    "Asphodelaceae": ["Aloe", "Bulbine"],
+    "Malvaceae": ["Hibiscus", "Adansonia", "Sida", "Cola", "Ceiba"],
+    "Poaceae": ["Cymbopogon", "Imperata", "Sorghum"],
+}
+EPITHETS = [
+    "africana", "guineensis", "nilotica", "occidentalis", "sieberiana", "lucida",
+    "senegalensis", "latifolia", "macrophylla", "indica", "amygdalina", "biglobosa",
+    "cordifolia", "integrifolia", "tomentosa", "glabra", "procera", "vulgaris",
+    "officinalis", "ivorensis", "gabonensis", "grandiflora", "parviflora", "spinosa",
+]
+LOCAL_SYLLABLES = ["ba", "ko", "ni", "dou", "fa", "sé", "gbo", "kou", "lé", "ma", "wa", "zo", "yé", "to", "dji", "an"]
+REGIONS = [
+    "Abidjan", "Bouaké", "Korhogo", "Man", "Daloa", "San-Pédro", "Yamoussoukro",
+    "Odienné", "Bondoukou", "Gagnoa", "Ghana", "Burkina Faso", "Mali", "Guinée",
+    "Libéria", "Sénégal", "Nigeria", "Bénin", "Togo", "Cameroun",
+]
+PLANT_TYPES = ["arbre", "arbuste", "herbe", "liane", "autre"]
+PARTS = ["feuilles", "écorce", "racines", "fruits", "graines", "fleurs", "tiges", "sève", "bulbe"]
+PROPERTIES = [
+    "antipaludique", "anti-inflammatoire", "antiseptique", "antidiabétique", "antioxydant",
+    "antidiarrhéique", "vermifuge", "hypotenseur", "cicatrisant", "antalgique", "diurétique",
+]
+EVIDENCE_LEVELS = ["traditionnel", "preliminaire", "clinique"]
+INDICATIONS = [
+    "fièvre", "paludisme", "diarrhée", "toux", "plaies", "maux de ventre", "hypertension",
+    "diabète", "douleurs articulaires", "vers intestinaux", "fatigue", "infections cutanées",
+]
+PREPARATIONS = ["décoction", "infusion", "macération", "cataplasme", "poudre", "jus", "inhalation"]
+COMMENTS = [
+    "Très bonne identification", "Ce n'est pas la bonne plante", "Photo prise au marché",
+    "Feuille abîmée, identification correcte quand même", "Confusion fréquente avec une espèce voisine",
+    "Résultat rapide", "Plante de mon jardin", "",
+]
+DEVICES = [
+    {"platform": "android", "app": "web"},
+    {"platform": "ios", "app": "web"},
+    {"platform": "desktop", "app": "web"},
+]
+
+# Distributions des feedbacks
+FEEDBACK_TYPE_WEIGHTS = {"rating": 45, "confirmation": 30, "correction": 15, "comment": 10}
+STATUS_WEIGHTS = {"pending": 55, "approved": 30, "rejected": 10, "used": 5}
+RATING_WEIGHTS = [5, 7, 13, 35, 40]
+
+START_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _weighted(rng: random.Random, cum_weights: List[float], values: List):
+    """Tirage pondéré à partir de poids cumulés (plus rapide que rng.choices)"""
+    return values[bisect(cum_weights, rng.random() * cum_weights[-1])]
+
+
+def _local_name(rng: random.Random) -> str:
+    return "".join(rng.choice(LOCAL_SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def generate_plants(count: int, seed: int = 0, images_per_plant: int = 2) -> Iterator[Dict]:
+    """
+    Génère les fiches plantes (format plants_database.json)
+
+    Les identifiants suivent la base existante ("1", "2"...) : l'ordre est
+    celui des classes du modèle.
+    """
+    rng = random.Random(f"plants-{seed}")
+    families = list(FAMILIES)
+    used_names = set()
+    for i in range(1, count + 1):
+        family = rng.choice(families)
+        genus = rng.choice(FAMILIES[family])
+        epithet = rng.choice(EPITHETS)
+        scientific_name = f"{genus} {epithet}"
+        # Variétés pour garder des noms scientifiques uniques
+        if scientific_name in used_names:
+            scientific_name = f"{scientific_name} var. {_local_name(rng).lower()}"
+        used_names.add(scientific_name)
+
+        local_names = [_local_name(rng) for _ in range(rng.randint(1, 4))]
+        plant_id = str(i)
+        yield {
+            "id": plant_id,
+            "scientific_name": scientific_name,
+            "common_names": {
+                "fr": f"{local_names[0]} ({genus.lower()})",
+                "local": local_names
+            },
+            "family": family,
+            "genus": genus,
+            "species": scientific_name,
+            "description": (
+                f"{rng.choice(PLANT_TYPES).capitalize()} de la famille des {family}, "
+                f"utilisé en médecine traditionnelle contre {rng.choice(INDICATIONS)} "
+                f"et {rng.choice(INDICATIONS)}."
+            ),
+            "plant_type": rng.choice(PLANT_TYPES),
+            "parts_used": rng.sample(PARTS, rng.randint(1, 3)),
+            "region": rng.sample(REGIONS, rng.randint(1, 4)),
+            "images": [f"reference_images/{plant_id}/{n}.jpg" for n in range(images_per_plant)],
+            "medicinal_properties": [
+                {
+                    "type": prop,
+                    "description": f"Propriété {prop} rapportée par les tradipraticiens",
+                    "evidence_level": rng.choices(EVIDENCE_LEVELS, [70, 20, 10])[0]
+                }
+                for prop in rng.sample(PROPERTIES, rng.randint(1, 3))
+            ],
+            "traditional_uses": [
+                {
+                    "preparation": rng.choice(PREPARATIONS),
+                    "indication": indication,
+                    "recipe": f"{rng.choice(PREPARATIONS).capitalize()} de {rng.choice(PARTS)}, deux fois par jour",
+                    "region": rng.choice(REGIONS)
+                }
+                for indication in rng.sample(INDICATIONS, rng.randint(1, 3))
+            ]
+        }
+
+
+def make_jpeg(rng: random.Random, width: int, height: int, base_color: Tuple[int, int, int]) -> bytes:
+    """Image JPEG texturée autour d'une couleur (déterministe pour un rng donné)"""
+    import numpy as np
+    from PIL import Image
+
+    np_rng = np.random.default_rng(rng.getrandbits(32))
+    noise = np_rng.integers(-60, 60, (max(1, height // 8), max(1, width // 8), 3))
+    pixels = np.clip(np.array(base_color) + noise, 0, 255).astype(np.uint8)
+    image = Image.fromarray(pixels).resize((width, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def plant_color(plant_id: str) -> Tuple[int, int, int]:
+    """Teinte dominante (verte) propre à une plante"""
+    rng = random.Random(f"color-{plant_id}")
+    return (rng.randint(20, 120), rng.randint(90, 200), rng.randint(20, 100))
+
+
+def generate_feedback_images(
+    count: int,
+    plant_ids: List[str],
+    seed: int = 0,
+    size: Tuple[int, int] = (320, 240)
+) -> Iterator[Tuple[str, str, bytes]]:
+    """
+    Génère le pool d'images des feedbacks
+
+    Yields:
+        (sha256, plant_id représenté, bytes JPEG)
+    """
+    rng = random.Random(f"feedback-images-{seed}")
+    for _ in range(count):
+        plant_id = rng.choice(plant_ids)
+        image_bytes = make_jpeg(rng, size[0], size[1], plant_color(plant_id))
+        yield hashlib.sha256(image_bytes).hexdigest(), plant_id, image_bytes
+
+
+def generate_feedbacks(
+    count: int,
+    plant_ids: List[str],
+    seed: int = 0,
+    image_hashes: Optional[List[str]] = None,
+    days: int = 365
+) -> Iterator[Dict]:
+    """
+    Génère des feedbacks au format FeedbackService
+
+    Popularité des plantes en loi de Zipf, confiance plus élevée pour les
+    confirmations que pour les corrections, statuts de curation posés sur
+    les feedbacks les plus anciens en priorité.
+
+    Args:
+        count: Nombre de feedbacks
+        plant_ids: Plantes du catalogue
+        seed: Graine
+        image_hashes: Pool d'images (70 % des feedbacks y font référence) ;
+            sans pool, des hashes fictifs sont utilisés
+        days: Période couverte à partir du 1er janvier 2024
+    """
+    rng = random.Random(f"feedbacks-{seed}")
+    popularity = list(accumulate(1.0 / (rank + 1) ** 0.8 for rank in range(len(plant_ids))))
+    shuffled_ids = plant_ids[:]
+    random.Random(f"popularity-{seed}").shuffle(shuffled_ids)
+
+    types = list(FEEDBACK_TYPE_WEIGHTS)
+    type_weights = list(accumulate(FEEDBACK_TYPE_WEIGHTS.values()))
+    statuses = list(STATUS_WEIGHTS)
+    status_weights = list(accumulate(STATUS_WEIGHTS.values()))
+    ratings = [1, 2, 3, 4, 5]
+    rating_weights = list(accumulate(RATING_WEIGHTS))
+    step = days * 86400 / max(count, 1)
+
+    for i in range(count):
+        timestamp = START_DATE + timedelta(seconds=i * step + rng.random() * step)
+        feedback_type = _weighted(rng, type_weights, types)
+        predicted = _weighted(rng, popularity, shuffled_ids)
+
+        if feedback_type == "confirmation":
+            confidence = rng.betavariate(6, 1.5) * 100
+            is_correct, correct_plant_id = True, None
+        elif feedback_type == "correction":
+            confidence = rng.betavariate(2, 2.5) * 100
+            is_correct = False
+            correct_plant_id = _weighted(rng, popularity, shuffled_ids)
+            if correct_plant_id == predicted:
+                correct_plant_id = shuffled_ids[(shuffled_ids.index(predicted) + 1) % len(shuffled_ids)]
+        else:
+            confidence = rng.betavariate(4, 2) * 100
+            is_correct, correct_plant_id = None, None
+
+        rating = None
+        if feedback_type == "rating" or (feedback_type == "confirmation" and rng.random() < 0.3):
+            rating = _weighted(rng, rating_weights, ratings)
+
+        # Les feedbacks anciens ont plus de chances d'avoir été curés
+        age = 1 - i / max(count, 1)
+        status = _weighted(rng, status_weights, statuses) if rng.random() < 0.3 + 0.7 * age else "pending"
+        curated = status != "pending"
+
+        image_hash = None
+        image_path = None
+        if image_hashes and rng.random() < 0.7:
+            image_hash = rng.choice(image_hashes)
+            image_path = f"images/{image_hash}.jpg"
+        if image_hash is None:
+            image_hash = f"{rng.getrandbits(256):064x}"
+
+        yield {
+            "id": f"fb_{timestamp.strftime('%Y%m%d_%H%M%S')}_{i}",
+            "session_id": f"session_{rng.randrange(max(count // 5, 1)):08d}",
+            "user_id": None,
+            "image_hash": image_hash,
+            "image_path": image_path,
+            "predicted_plant_id": predicted,
+            "predicted_confidence": round(confidence, 2),
+            "alternatives": None,
+            "feedback_type": feedback_type,
+            "rating": rating,
+            "correct_plant_id": correct_plant_id,
+            "comment": rng.choice(COMMENTS) if feedback_type == "comment" or rng.random() < 0.1 else None,
+            "is_correct": is_correct,
+            "timestamp": timestamp.replace(tzinfo=None).isoformat(),
+            "user_intent": rng.choice(["medecine", "agriculture", None]),
+            "device_info": rng.choice(DEVICES),
+            "status": status,
+            "curator_notes": "Vérifié sur photo" if curated and rng.random() < 0.5 else None,
+            "curated_by": f"curateur_{rng.randint(1, 5)}" if curated else None,
+            "curated_at": (timestamp + timedelta(days=rng.randint(1, 30))).replace(tzinfo=None).isoformat() if curated else None
+        }
+
+
+def django_plant_fixtures(plants: List[Dict]) -> Iterator[Dict]:
+    """Objets de fixture Django pour plants.Plant, MedicinalProperty et TraditionalUse"""
+    created_at = START_DATE.isoformat().replace("+00:00", "Z")
+    property_pk = 0
+    use_pk = 0
+    for plant in plants:
+        pk = int(plant["id"])
+        yield {
+            "model": "plants.plant",
+            "pk": pk,
+            "fields": {
+                "plant_id": plant["id"],
+                "scientific_name": plant["scientific_name"],
+                "common_name_fr": plant["common_names"]["fr"],
+                "common_names_local": plant["common_names"]["local"],
+                "family": plant["family"],
+                "genus": plant["genus"],
+                "species": plant["species"],
+                "description": plant["description"],
+                "plant_type": plant["plant_type"],
+                "parts_used": plant["parts_used"],
+                "regions": plant["region"],
+                "images": plant["images"],
+                "created_at": created_at,
+                "updated_at": created_at,
+                "is_active": True
+            }
+        }
+        for prop in plant["medicinal_properties"]:
+            property_pk += 1
+            yield {
+                "model": "plants.medicinalproperty",
+                "pk": property_pk,
+                "fields": {
+                    "plant": pk,
+                    "property_type": prop["type"],
+                    "description": prop["description"],
+                    "evidence_level": prop["evidence_level"]
+                }
+            }
+        for use in plant["traditional_uses"]:
+            use_pk += 1
+            yield {
+                "model": "plants.traditionaluse",
+                "pk": use_pk,
+                "fields": {
+                    "plant": pk,
+                    "indication": use["indication"],
+                    "preparation": use["preparation"],
+                    "recipe": use["recipe"],
+                    "region": use["region"]
+                }
+            }
+
+
+def django_feedback_fixture(pk: int, feedback: Dict) -> Dict:
+    """Objet de fixture Django pour feedback.PredictionFeedback"""
+    def aware(value: Optional[str]) -> Optional[str]:
+        return f"{value}Z" if value else None
+
+    return {
+        "model": "feedback.predictionfeedback",
+        "pk": pk,
+        "fields": {
+            "session_id": feedback["session_id"],
+            "user": None,
+            "image_hash": feedback["image_hash"],
+            "image_path": feedback["image_path"],
+            "predicted_plant": int(feedback["predicted_plant_id"]),
+            "predicted_confidence": feedback["predicted_confidence"],
+            "alternatives": [],
+            "feedback_type": feedback["feedback_type"],
+            "rating": feedback["rating"],
+            "correct_plant": int(feedback["correct_plant_id"]) if feedback["correct_plant_id"] else None,
+            "comment": feedback["comment"] or "",
+            "is_correct": feedback["is_correct"],
+            "timestamp": aware(feedback["timestamp"]),
+            "user_intent": feedback["user_intent"],
+            "device_info": feedback["device_info"] or {},
+            "status": feedback["status"],
+            "curator_notes": feedback["curator_notes"] or "",
+            "curated_by": None,
+            "curated_at": aware(feedback["curated_at"])
+        }
+    }
+
+
+class JSONArrayWriter:
+    """Écrit un tableau JSON élément par élément (mémoire constante)"""
+
+    def __init__(self, path: str, indent: Optional[int] = None):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(path, "w", encoding="utf-8")
+        self.indent = indent
+        self.count = 0
+        self.file.write("[")
+
+    def write(self, obj: Dict):
+        self.file.write(",\n" if self.count else "\n")
+        self.file.write(json.dumps(obj, ensure_ascii=False, indent=self.indent))
+        self.count += 1
+
+    def close(self):
+        self.file.write("\n]\n")
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère des données synthétiques déterministes")
+    parser.add_argument('--output', type=str, default="data/synthetic", help="Répertoire de sortie")
+    parser.add_argument('--plants', type=int, default=2000)
+    parser.add_argument('--feedbacks', type=int, default=100000)
+    parser.add_argument('--feedback-images', type=int, default=500, help="Images distinctes partagées par les feedbacks")
+    parser.add_argument('--images-per-plant', type=int, default=2, help="Images de référence par plante")
+    parser.add_argument('--image-size', type=int, nargs=2, default=[320, 240], metavar=("W", "H"))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-django', action='store_true', help="Ne pas écrire les fixtures Django")
+    args = parser.parse_args()
+
+    out = args.output
+    size = tuple(args.image_size)
+    os.makedirs(out, exist_ok=True)
+
+    # Catalogue et images de référence
+    plants = list(generate_plants(args.plants, args.seed, args.images_per_plant))
+    plant_ids = [plant["id"] for plant in plants]
+    with open(os.path.join(out, "plants_database.json"), "w", encoding="utf-8") as f:
+        json.dump({"plants": plants}, f, ensure_ascii=False, indent=2)
+    print(f"Catalogue: {len(plants)} plantes")
+
+    image_rng = random.Random(f"reference-images-{args.seed}")
+    for plant in plants:
+        for relative_path in plant["images"]:
+            path = os.path.join(out, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(make_jpeg(image_rng, size[0], size[1], plant_color(plant["id"])))
+    print(f"Images de référence: {len(plants) * args.images_per_plant}")
+
+    # Images des feedbacks (stockage FeedbackService : images/<hash>.jpg)
+    images_dir = os.path.join(out, "feedbacks", "images")
+    os.makedirs(images_dir, exist_ok=True)
+    image_hashes = []
+    for image_hash, _, image_bytes in generate_feedback_images(args.feedback_images, plant_ids, args.seed, size):
+        with open(os.path.join(images_dir, f"{image_hash}.jpg"), "wb") as f:
+            f.write(image_bytes)
+        image_hashes.append(image_hash)
+    print(f"Images de feedbacks: {len(set(image_hashes))}")
+
+    # Feedbacks (format FeedbackService) et fixtures Django en un seul passage
+    django_dir = os.path.join(out, "django")
+    feedback_writer = JSONArrayWriter(os.path.join(out, "feedbacks", "feedbacks.json"))
+    django_writer = None if args.no_django else JSONArrayWriter(os.path.join(django_dir, "feedbacks.json"))
+    try:
+        for pk, feedback in enumerate(generate_feedbacks(args.feedbacks, plant_ids, args.seed, image_hashes), start=1):
+            feedback_writer.write(feedback)
+            if django_writer is not None:
+                django_writer.write(django_feedback_fixture(pk, feedback))
+            if pk % 100000 == 0:
+                print(f"  {pk} feedbacks...")
+    finally:
+        feedback_writer.close()
+        if django_writer is not None:
+            django_writer.close()
+    print(f"Feedbacks: {feedback_writer.count}")
+
+    if not args.no_django:
+        with JSONArrayWriter(os.path.join(django_dir, "plants.json")) as writer:
+            for obj in django_plant_fixtures(plants):
+                writer.write(obj)
+        print(f"Fixtures Django: {django_dir}/plants.json, {django_dir}/feedbacks.json")
+
+    with open(os.path.join(out, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "seed": args.seed,
+            "plants": args.plants,
+            "feedbacks": args.feedbacks,
+            "feedback_images": args.feedback_images,
+            "images_per_plant": args.images_per_plant,
+            "image_size": list(size)
+        }, f, indent=2)
+    print(f"\nDonnées écrites dans {out}")
+
+
+if __name__ == "__main__":
+    main()
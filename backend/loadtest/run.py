@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Test de charge des APIs d'identification et de feedback
+
+Lance l'API (uvicorn) avec un modèle déterministe et un serveur LLM factice,
+envoie un mélange de requêtes /api/identify, /api/feedback et
+/api/feedback/query avec une concurrence donnée, puis écrit un rapport JSON
+(requêtes/s, p50/p95/p99, taux d'erreur par endpoint) comparable d'un
+commit à l'autre.
+
+Usage:
+    python loadtest/run.py --concurrency 16 --duration 30 --output loadtest/report.json
+    python loadtest/run.py --mix identify=8,feedback=1,feedback_query=1 --compare loadtest/baseline.json
+    python loadtest/run.py --url http://localhost:8000   # serveur déjà lancé
+    python loadtest/run.py --fixtures data/synthetic     # catalogue et feedbacks de generate_fixtures.py
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+from PIL import Image
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from loadtest.stub_llm import start_stub_llm
+from loadtest.tiny_model import build_tiny_model, count_plants, DEFAULT_PLANT_DB
+
+SCENARIOS = ("identify", "feedback", "feedback_query")
+DEFAULT_MIX = "identify=6,feedback=2,feedback_query=2"
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse 'identify=6,feedback=2' en poids par scénario"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Scénario inconnu: {name} (disponibles: {', '.join(SCENARIOS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def make_images(count: int, width: int, height: int, seed: int) -> List[bytes]:
+    """Photos JPEG synthétiques reproductibles"""
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        pixels = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+        image = Image.fromarray(pixels).resize((width, height), Image.BILINEAR)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=90)
+        images.append(buffer.getvalue())
+    return images
+
+
+class LoadGenerator:
+    """Envoie les requêtes et collecte les latences par scénario"""
+
+    def __init__(self, base_url: str, weights: Dict[str, float], images: List[bytes], plant_ids: List[str], seed: int):
+        self.base_url = base_url
+        self.scenarios = list(weights)
+        self.weights = [weights[name] for name in self.scenarios]
+        self.images = images
+        self.plant_ids = plant_ids
+        self.rng = random.Random(seed)
+        self.samples: Dict[str, List[Tuple[float, bool]]] = {name: [] for name in SCENARIOS}
+        self.statuses: Dict[str, Dict[str, int]] = {name: {} for name in SCENARIOS}
+
+    async def request(self, client: httpx.AsyncClient, scenario: str, i: int) -> httpx.Response:
+        image = self.images[i % len(self.images)]
+        if scenario == "identify":
+            return await client.post(
+                "/api/identify",
+                files={"file": (f"plant_{i}.jpg", image, "image/jpeg")},
+                data={"user_intent": "medecine", "include_medicinal_info": "true"}
+            )
+        if scenario == "feedback":
+            feedback = {
+                "image_hash": f"loadtest-{i}",
+                "predicted_plant_id": self.plant_ids[i % len(self.plant_ids)],
+                "predicted_confidence": 50 + (i % 50),
+                "feedback_type": "rating",
+                "rating": 1 + i % 5,
+                "comment": "Test de charge"
+            }
+            return await client.post("/api/feedback", data={"feedback": json.dumps(feedback)})
+        return await client.post("/api/feedback/query", json={"limit": 50})
+
+    async def worker(self, client: httpx.AsyncClient, counter: List[int], deadline: float, max_requests: Optional[int]):
+        while time.perf_counter() < deadline:
+            if max_requests is not None and counter[0] >= max_requests:
+                return
+            i = counter[0]
+            counter[0] += 1
+            scenario = self.rng.choices(self.scenarios, self.weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await self.request(client, scenario, i)
+                status = str(response.status_code)
+                ok = response.status_code < 400
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+                ok = False
+            self.samples[scenario].append((time.perf_counter() - start, ok))
+            self.statuses[scenario][status] = self.statuses[scenario].get(status, 0) + 1
+
+    async def run(self, concurrency: int, duration: float, max_requests: Optional[int], timeout: float) -> float:
+        counter = [0]
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=timeout, limits=limits) as client:
+            start = time.perf_counter()
+            deadline = start + duration if duration else float("inf")
+            await asyncio.gather(*(
+                self.worker(client, counter, deadline, max_requests)
+                for _ in range(concurrency)
+            ))
+            return time.perf_counter() - start
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Percentile (rang le plus proche) d'une liste triée"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(np.ceil(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples: List[Tuple[float, bool]], statuses: Dict[str, int], elapsed: float) -> Dict:
+    latencies = sorted(latency for latency, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "statuses": statuses
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_api(port: int, env: Dict[str, str], log_path: str) -> subprocess.Popen:
+    """Lance uvicorn dans un sous-processus (répertoire backend)"""
+    log = open(log_path, "w")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+def wait_ready(base_url: str, process: Optional[subprocess.Popen], timeout: float = 120):
+    """Attend la fin du préchauffage (les mesures ne comptent pas le démarrage à froid)"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"L'API s'est arrêtée au démarrage (code {process.returncode})")
+        try:
+            if httpx.get(f"{base_url}/api/health/ready", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"L'API ne répond pas sur {base_url}")
+
+
+def compare(report: Dict, baseline: Dict):
+    """Affiche l'écart avec un rapport de référence"""
+    print(f"\nComparaison avec {baseline.get('commit') or 'la référence'}:")
+    for name, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous or not current["requests"]:
+            continue
+        parts = []
+        for key in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+            if previous[key]:
+                delta = (current[key] - previous[key]) / previous[key] * 100
+                parts.append(f"{key} {previous[key]} -> {current[key]} ({delta:+.1f}%)")
+        parts.append(f"erreurs {previous['error_rate']:.2%} -> {current['error_rate']:.2%}")
+        print(f"  {name:<15} " + ", ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge des APIs d'identification et de feedback")
+    parser.add_argument('--url', type=str, help="API déjà lancée (sinon démarrée avec modèle et LLM factices)")
+    parser.add_argument('--port', type=int, default=8765, help="Port de l'API démarrée par le script")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30, help="Durée de la mesure en secondes")
+    parser.add_argument('--requests', type=int, help="Nombre de requêtes (arrêt avant la fin de la durée)")
+    parser.add_argument('--warmup', type=int, default=10, help="Requêtes d'échauffement non mesurées")
+    parser.add_argument('--mix', type=str, default=DEFAULT_MIX, help="Poids des scénarios")
+    parser.add_argument('--image-size', type=int, nargs=2, default=[1024, 768], metavar=("W", "H"))
+    parser.add_argument('--llm-latency-ms', type=float, default=300)
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--fixtures', type=str, help="Répertoire produit par generate_fixtures.py")
+    parser.add_argument('--output', type=str, help="Fichier JSON du rapport")
+    parser.add_argument('--compare', type=str, help="Rapport de référence à comparer")
+    args = parser.parse_args()
+
+    weights = parse_mix(args.mix)
+    plant_db = os.path.abspath(os.path.join(args.fixtures, "plants_database.json")) if args.fixtures else DEFAULT_PLANT_DB
+    with open(plant_db, encoding="utf-8") as f:
+        plant_ids = [plant["id"] for plant in json.load(f)["plants"]]
+    images = make_images(8, args.image_size[0], args.image_size[1], args.seed)
+
+    workdir = tempfile.mkdtemp(prefix="ivoire-loadtest-")
+    process = None
+    stub = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            num_classes = count_plants(plant_db)
+            model_path = os.path.join(BACKEND_DIR, "loadtest", ".cache", f"tiny_model_{num_classes}.h5")
+            if not os.path.exists(model_path):
+                print("Construction du modèle déterministe...")
+                build_tiny_model(model_path, num_classes, seed=args.seed)
+            # Copie des feedbacks existants : le test de charge les modifie
+            feedback_dir = os.path.join(workdir, "feedbacks")
+            if args.fixtures:
+                shutil.copytree(os.path.join(args.fixtures, "feedbacks"), feedback_dir)
+            stub = start_stub_llm(latency_ms=args.llm_latency_ms, error_rate=args.llm_error_rate)
+            stub_port = stub.server_address[1]
+            base_url = f"http://127.0.0.1:{args.port}"
+            process = start_api(args.port, {
+                "MODEL_PATH": model_path,
+                "PLANT_DB_PATH": plant_db,
+                "LLM_PROVIDER": "groq",
+                "GROQ_API_KEY": "stub",
+                "GROQ_BASE_URL": f"http://127.0.0.1:{stub_port}",
+                "FEEDBACK_STORAGE_PATH": feedback_dir,
+                "JOB_STORAGE_PATH": os.path.join(workdir, "jobs"),
+                "CATALOG_DB_PATH": os.path.join(workdir, "absent.sqlite3"),
+                # Tous les clients partagent 127.0.0.1 : pas de seau de jetons
+                "RATE_LIMIT_PER_MINUTE": "0",
+                "ENV": "development"
+            }, os.path.join(workdir, "api.log"))
+        print(f"Attente de l'API sur {base_url}...")
+        wait_ready(base_url, process)
+
+        if args.warmup:
+            warmup = LoadGenerator(base_url, weights, images, plant_ids, args.seed + 1)
+            asyncio.run(warmup.run(min(args.concurrency, args.warmup), 0, args.warmup, args.timeout))
+
+        generator = LoadGenerator(base_url, weights, images, plant_ids, args.seed)
+        print(f"Charge: {args.concurrency} clients, mélange {args.mix}, "
+              f"{args.requests or '∞'} requêtes / {args.duration} s")
+        elapsed = asyncio.run(generator.run(args.concurrency, args.duration, args.requests, args.timeout))
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if stub is not None:
+            stub.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    all_samples = [sample for samples in generator.samples.values() for sample in samples]
+    all_statuses: Dict[str, int] = {}
+    for statuses in generator.statuses.values():
+        for status, count in statuses.items():
+            all_statuses[status] = all_statuses.get(status, 0) + count
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "url": args.url,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "requests": args.requests,
+            "mix": weights,
+            "fixtures": args.fixtures,
+            "image_size": args.image_size,
+            "llm_latency_ms": None if args.url else args.llm_latency_ms,
+            "cpu_count": os.cpu_count()
+        },
+        "elapsed_s": round(elapsed, 3),
+        "total": summarize(all_samples, all_statuses, elapsed),
+        "endpoints": {
+            name: summarize(generator.samples[name], generator.statuses[name], elapsed)
+            for name in SCENARIOS if generator.samples[name]
+        }
+    }
+
+    print(f"\n{'scénario':<15} {'req':>6} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'erreurs':>8}")
+    for name, stats in list(report["endpoints"].items()) + [("total", report["total"])]:
+        print(f"{name:<15} {stats['requests']:>6} {stats['rps']:>8} {stats['p50_ms']:>7}ms "
+              f"{stats['p95_ms']:>7}ms {stats['p99_ms']:>7}ms {stats['error_rate']:>8.2%}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nRapport: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
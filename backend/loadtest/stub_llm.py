@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Serveur LLM factice compatible avec l'API chat completions (Groq/OpenAI)
+
+Répond à POST /openai/v1/chat/completions (Groq) et /v1/chat/completions
+(OpenAI) avec un JSON d'informations médicinales déterministe, après une
+latence configurable : les tests de charge tournent hors ligne, sans quota.
+
+Usage:
+    python loadtest/stub_llm.py --port 8089 --latency-ms 300
+    GROQ_API_KEY=stub GROQ_BASE_URL=http://127.0.0.1:8089 uvicorn app.main:app
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+COMPLETION_PATHS = ("/openai/v1/chat/completions", "/v1/chat/completions")
+
+MEDICINAL_INFO = {
+    "summary": "Plante utilisée en médecine traditionnelle (réponse du serveur factice).",
+    "properties": [
+        {"type": "anti-inflammatoire", "description": "Usage traditionnel", "evidence_level": "traditionnel"}
+    ],
+    "traditional_uses": [
+        {"preparation": "décoction", "indication": "fièvre", "recipe": "Faire bouillir les feuilles 10 minutes"}
+    ],
+    "diseases_treated": ["fièvre", "douleurs"],
+    "preparation_methods": ["décoction", "infusion"],
+    "precautions": ["Consulter un médecin avant usage"],
+    "warnings": ["Déconseillé aux femmes enceintes"],
+    "formatted_response": "Réponse générée par le serveur LLM factice pour les tests de charge."
+}
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """Gestionnaire des requêtes chat completions"""
+
+    latency: float = 0.3
+    jitter: float = 0.0
+    error_rate: float = 0.0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+        if self.path not in COMPLETION_PATHS:
+            self._send(404, {"error": {"message": f"Chemin inconnu: {self.path}"}})
+            return
+
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            self._send(400, {"error": {"message": "JSON invalide"}})
+            return
+
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if self.error_rate and random.random() < self.error_rate:
+            self._send(503, {"error": {"message": "Erreur simulée"}})
+            return
+
+        info = MEDICINAL_INFO
+        if "response_format" in request:
+            # Modes JSON : formatted_response est rédigée par l'API
+            info = {key: value for key, value in info.items() if key != "formatted_response"}
+        content = json.dumps(info, ensure_ascii=False)
+        finish_reason = "stop"
+        max_tokens = request.get("max_tokens")
+        if max_tokens and len(content) // 4 > max_tokens:
+            content, finish_reason = content[:max_tokens * 4], "length"
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in request.get("messages", [])) // 4
+        self._send(200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "system_fingerprint": "stub",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason,
+                "logprobs": None
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4
+            }
+        })
+
+    def _send(self, status: int, payload: dict):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Silencieux : des milliers de requêtes par test
+        pass
+
+
+def start_stub_llm(
+    port: int = 0,
+    latency_ms: float = 300,
+    jitter_ms: float = 0,
+    error_rate: float = 0.0,
+    host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """
+    Démarre le serveur factice dans un thread
+
+    Args:
+        port: Port d'écoute (0 = port libre choisi par le système)
+        latency_ms: Latence simulée de chaque réponse
+        jitter_ms: Variation aléatoire de la latence (+/-)
+        error_rate: Proportion de réponses 503
+
+    Returns:
+        Le serveur (server.server_address donne le port effectif)
+    """
+    handler = type("ConfiguredStubLLMHandler", (StubLLMHandler,), {
+        "latency": latency_ms / 1000,
+        "jitter": jitter_ms / 1000,
+        "error_rate": error_rate
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-llm", daemon=True).start()
+    return server
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Serveur LLM factice pour les tests de charge")
+    parser.add_argument('--host', type=str, default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server = start_stub_llm(args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.host)
+    host, port = server.server_address[:2]
+    print(f"Serveur LLM factice sur http://{host}:{port} (latence {args.latency_ms} ms)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Petit modèle Keras déterministe pour les tests de charge
+
+Même entrée (224x224x3) et même sortie (softmax sur les plantes de la base)
+que le vrai modèle, poids fixés par une graine : les résultats sont
+reproductibles et le coût d'inférence reste faible et stable.
+
+Usage:
+    python loadtest/tiny_model.py --output loadtest/.cache/tiny_model.h5
+"""
+
+import os
+import json
+import argparse
+
+DEFAULT_PLANT_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "plants_database.json")
+
+
+def build_tiny_model(output_path: str, num_classes: int, seed: int = 0, filters: int = 8) -> str:
+    """
+    Construit et sauvegarde le modèle
+
+    Args:
+        output_path: Fichier .h5 de sortie
+        num_classes: Nombre de plantes (taille de la sortie softmax)
+        seed: Graine des poids
+        filters: Filtres de la convolution (coût d'inférence)
+
+    Returns:
+        Chemin du modèle
+    """
+    import tensorflow as tf
+
+    tf.keras.utils.set_random_seed(seed)
+    inputs = tf.keras.Input(shape=(224, 224, 3))
+    x = tf.keras.layers.Conv2D(filters, 3, strides=4, activation="relu")(inputs)
+    x = tf.keras.layers.GlobalAveragePooling2D()(x)
+    outputs = tf.keras.layers.Dense(num_classes, activation="softmax")(x)
+    model = tf.keras.Model(inputs, outputs)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    model.save(output_path)
+    return output_path
+
+
+def count_plants(plant_db_path: str = DEFAULT_PLANT_DB) -> int:
+    """Nombre de plantes de la base (classes du modèle)"""
+    with open(plant_db_path, encoding="utf-8") as f:
+        return len(json.load(f).get("plants", []))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Modèle déterministe pour les tests de charge")
+    parser.add_argument('--output', type=str, default="loadtest/.cache/tiny_model.h5")
+    parser.add_argument('--plant-db', type=str, default=DEFAULT_PLANT_DB)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--filters', type=int, default=8)
+    args = parser.parse_args()
+
+    path = build_tiny_model(args.output, count_plants(args.plant_db), args.seed, args.filters)
+    print(f"Modèle sauvegardé: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Planification de l'inférence sur la machine courante
+
+Par défaut, les pools de threads intra-op et inter-op de TensorFlow occupent
+tous les CPU dans chaque processus : plusieurs workers uvicorn se disputent
+alors les cœurs et la latence de queue se dégrade. Ce script mesure, pour le
+modèle MODEL_PATH, les combinaisons nombre de workers x threads intra-op x
+threads inter-op x fenêtre de regroupement (INFERENCE_BATCH_WINDOW_MS), et
+écrit la meilleure dans models/inference_config.json :
+
+- chaque combinaison lance ses workers dans des processus séparés, qui
+  chargent le modèle avec leurs threads puis reçoivent une charge en boucle
+  fermée (--concurrency clients au total, répartis entre les workers) ;
+- la configuration retenue maximise le débit parmi celles dont le p99 tient
+  l'objectif --p99-slo-ms (à défaut, celle au plus faible p99).
+
+Seule la passe avant est mesurée (le décodage des images dépend du trafic).
+VisionService applique les threads et la fenêtre au démarrage, serve.py le
+nombre de workers ; les variables d'environnement restent prioritaires.
+
+Usage:
+    python plan_inference.py                               # combinaisons adaptées aux CPU
+    python plan_inference.py --p99-slo-ms 250 --duration 10
+    python plan_inference.py --workers 1 2 --windows 0 5 --dry-run
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import asyncio
+import logging
+import argparse
+import platform
+import multiprocessing
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services.inference_config import DEFAULT_CONFIG_PATH, available_cpus
+
+logger = logging.getLogger("plan_inference")
+
+DEFAULT_WINDOWS = [0, 2, 5, 10]
+
+
+def candidate_plans(
+    cpus: int,
+    workers: Optional[List[int]] = None,
+    intra: Optional[List[int]] = None,
+    inter: Optional[List[int]] = None
+) -> List[Dict[str, int]]:
+    """
+    Combinaisons (workers, intra-op, inter-op) à mesurer
+
+    Par défaut : puissances de deux de workers jusqu'au nombre de CPU, et
+    pour chacune des threads intra-op qui remplissent (ou moitié-remplissent)
+    la machine sans la dépasser.
+    """
+    if not workers:
+        workers = sorted({w for w in (2 ** i for i in range(cpus.bit_length())) if w <= cpus} | {cpus})
+    plans = []
+    for w in workers:
+        share = max(1, cpus // w)
+        for i in intra or sorted({share, max(1, share // 2)}):
+            for e in inter or ([1, 2] if i >= 2 else [1]):
+                plans.append({"workers": w, "intra_op_threads": i, "inter_op_threads": e})
+    return plans
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Percentile (rang le plus proche) d'une liste triée"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(np.ceil(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+async def closed_loop(vision_service, window_ms: float, max_batch_size: int, clients: int, duration: float) -> List[float]:
+    """Charge en boucle fermée : chaque client attend sa prédiction avant la suivante"""
+    from app.services.inference_batcher import InferenceBatcher
+
+    batcher = InferenceBatcher(vision_service.predict_batch, window_ms, max_batch_size) if window_ms > 0 else None
+    image = np.random.default_rng(0).random((1, 224, 224, 3), dtype=np.float32)
+    latencies: List[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            if batcher is not None:
+                await batcher.submit(image)
+            else:
+                await asyncio.to_thread(vision_service.predict_batch, image)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies
+
+
+def bench_worker(plan: Dict[str, int], args, clients: int, barrier, results):
+    """Processus worker : charge le modèle avec ses threads puis mesure chaque fenêtre"""
+    os.environ.update({
+        "MODEL_PATH": args.model_path,
+        "TF_NUM_INTRAOP_THREADS": str(plan["intra_op_threads"]),
+        "TF_NUM_INTEROP_THREADS": str(plan["inter_op_threads"]),
+        "OMP_NUM_THREADS": str(plan["intra_op_threads"]),
+        "INFERENCE_BATCH_WINDOW_MS": "0",
+        "TF_CPP_MIN_LOG_LEVEL": os.getenv("TF_CPP_MIN_LOG_LEVEL", "2"),
+    })
+    from app.services.vision_service import VisionService
+
+    vision_service = VisionService()
+    if vision_service.model is None:
+        results.put({"error": f"Modèle non chargé depuis {args.model_path}"})
+        barrier.abort()
+        return
+
+    # Graphes tracés pour chaque taille de batch avant la mesure
+    size = 1
+    while size <= args.max_batch_size:
+        vision_service.predict_batch(np.zeros((size, 224, 224, 3), dtype=np.float32))
+        size *= 2
+
+    for window in args.windows:
+        barrier.wait()
+        latencies = asyncio.run(closed_loop(vision_service, window, args.max_batch_size, clients, args.duration))
+        results.put({"window": window, "latencies": latencies})
+
+
+def measure(plan: Dict[str, int], args) -> List[Dict]:
+    """Mesure une combinaison pour toutes les fenêtres ; une ligne par fenêtre"""
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(plan["workers"])
+    results = ctx.Queue()
+    clients = max(1, -(-args.concurrency // plan["workers"]))
+    processes = [
+        ctx.Process(target=bench_worker, args=(plan, args, clients, barrier, results), daemon=True)
+        for _ in range(plan["workers"])
+    ]
+    for process in processes:
+        process.start()
+
+    by_window: Dict[float, List[float]] = {window: [] for window in args.windows}
+    try:
+        for _ in range(plan["workers"] * len(args.windows)):
+            message = results.get(timeout=args.timeout)
+            if "error" in message:
+                raise RuntimeError(message["error"])
+            by_window[message["window"]].extend(message["latencies"])
+    except queue.Empty:
+        raise RuntimeError(f"Pas de résultat après {args.timeout:.0f}s")
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+
+    rows = []
+    for window, latencies in by_window.items():
+        latencies.sort()
+        rows.append({
+            **plan,
+            "batch_window_ms": window,
+            "requests": len(latencies),
+            "rps": round(len(latencies) / args.duration, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        })
+    return rows
+
+
+def recommend(rows: List[Dict], p99_slo_ms: Optional[float]) -> Dict:
+    """Meilleur débit sous l'objectif de p99, sinon plus faible p99"""
+    within = [row for row in rows if p99_slo_ms is None or row["p99_ms"] <= p99_slo_ms]
+    if within:
+        return max(within, key=lambda row: (row["rps"], -row["p99_ms"]))
+    return min(rows, key=lambda row: row["p99_ms"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesure workers x threads TensorFlow x fenêtre de regroupement")
+    parser.add_argument('--model-path', default=os.getenv("MODEL_PATH", "models/plant_recognition_model.h5"))
+    parser.add_argument('--workers', type=int, nargs='+', help="Nombres de workers (défaut: puissances de deux <= CPU)")
+    parser.add_argument('--intra-op', type=int, nargs='+', help="Threads intra-op (défaut: CPU / workers et sa moitié)")
+    parser.add_argument('--inter-op', type=int, nargs='+', help="Threads inter-op (défaut: 1, et 2 si intra-op >= 2)")
+    parser.add_argument('--windows', type=float, nargs='+', default=DEFAULT_WINDOWS,
+                        help="Fenêtres de regroupement en ms (0 = une passe par requête)")
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--concurrency', type=int, default=16, help="Clients simultanés au total")
+    parser.add_argument('--duration', type=float, default=5.0, help="Durée de mesure par fenêtre (s)")
+    parser.add_argument('--p99-slo-ms', type=float, help="Objectif de latence p99")
+    parser.add_argument('--timeout', type=float, default=300.0, help="Attente maximale d'un résultat (s)")
+    parser.add_argument('--output', default=os.getenv("INFERENCE_CONFIG_PATH", DEFAULT_CONFIG_PATH))
+    parser.add_argument('--dry-run', action='store_true', help="Afficher sans écrire la configuration")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not os.path.exists(args.model_path):
+        parser.error(f"Modèle introuvable: {args.model_path}")
+
+    cpus = available_cpus()
+    plans = candidate_plans(cpus, args.workers, args.intra_op, args.inter_op)
+    logger.info(f"{cpus} CPU, {len(plans)} combinaisons x {len(args.windows)} fenêtres, {args.duration:.0f}s chacune")
+
+    rows = []
+    for plan in plans:
+        logger.info(
+            f"- {plan['workers']} workers x {plan['intra_op_threads']} intra-op "
+            f"x {plan['inter_op_threads']} inter-op"
+        )
+        for row in measure(plan, args):
+            logger.info(
+                f"    fenêtre {row['batch_window_ms']:>5g} ms: {row['rps']:>8.1f} req/s, "
+                f"p50 {row['p50_ms']:.1f} ms, p99 {row['p99_ms']:.1f} ms"
+            )
+            rows.append(row)
+
+    best = recommend(rows, args.p99_slo_ms)
+    recommended = {
+        "workers": best["workers"],
+        "intra_op_threads": best["intra_op_threads"],
+        "inter_op_threads": best["inter_op_threads"],
+        "batch_window_ms": best["batch_window_ms"],
+        "max_batch_size": args.max_batch_size,
+    }
+    logger.info(f"Recommandé: {json.dumps(recommended)} ({best['rps']} req/s, p99 {best['p99_ms']} ms)")
+    if args.p99_slo_ms is not None and best["p99_ms"] > args.p99_slo_ms:
+        logger.warning(f"Aucune combinaison ne tient p99 <= {args.p99_slo_ms:g} ms : plus faible p99 retenu")
+
+    if args.dry_run:
+        return
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "host": {"cpus": cpus, "machine": platform.machine(), "python": platform.python_version()},
+        "model_path": args.model_path,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "p99_slo_ms": args.p99_slo_ms,
+        "recommended": recommended,
+        "results": rows,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Configuration écrite dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
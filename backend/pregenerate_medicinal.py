@@ -0,0 +1,152 @@
+"""
+Pré-génération des fiches médicinales de tout le catalogue
+
+Génère hors ligne la fiche par défaut (sans question de l'utilisateur) de
+chaque plante du catalogue (admin Django, à défaut data/plants_database.json)
+et l'écrit dans le fichier des fiches (MEDICINAL_STORE_PATH) : l'API la sert
+ensuite sans appeler le LLM. Seules les plantes sans fiche, ou dont la
+fiche est périmée (plante modifiée, autre LLM_OUTPUT_MODE), sont générées ;
+une exécution interrompue reprend là où elle s'est arrêtée.
+
+Les appels sont bornés en parallèle (--concurrency) et en débit
+(--rate-per-minute, limite du fournisseur). Une réponse tronquée ou non
+exploitable n'est jamais enregistrée : la plante est réessayée puis laissée
+au LLM en ligne.
+
+Usage:
+    python pregenerate_medicinal.py
+    python pregenerate_medicinal.py --concurrency 2 --rate-per-minute 20
+    python pregenerate_medicinal.py --plants moringa_oleifera --force
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+from typing import Any, Dict, List, Optional
+
+from app.services.admission import TokenBucketLimiter
+from app.services.llm_service import LLMService
+from app.services.medicinal_store import MedicinalStore, prompt_fingerprint
+from app.services.structured_output import parse_tolerant
+from app.services.vision_service import VisionService
+
+# Fiches écrites sur disque toutes les N générations (reprise après interruption)
+SAVE_EVERY = 10
+
+
+def load_catalog(plant_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Fiches plantes, de la même source que VisionService.lookup_plant"""
+    # Modèle non chargé : seules les bases des plantes sont lues
+    vision_service = VisionService(defer_model_load=True)
+    if vision_service.catalog.version is not None:
+        # Plantes actives du catalogue Django uniquement
+        plants = dict(vision_service.catalog.plants)
+    else:
+        plants = dict(vision_service.plant_database)
+    if plant_ids:
+        missing = sorted(set(plant_ids) - set(plants))
+        if missing:
+            print(f"⚠️  Plantes absentes du catalogue, ignorées: {', '.join(missing)}")
+        plants = {plant_id: plants[plant_id] for plant_id in plant_ids if plant_id in plants}
+    return plants
+
+
+async def generate_one(service: LLMService, plant: Dict[str, Any], retries: int) -> Optional[Dict[str, Any]]:
+    """
+    Fiche par défaut d'une plante, None si le LLM n'a pas donné de réponse complète
+
+    Contrairement à LLMService.generate_medicinal_info, une erreur ou une
+    réponse réparée n'est pas remplacée par les données fictives.
+    """
+    prompt = service._build_prompt(plant, None)
+    for attempt in range(retries + 1):
+        if attempt:
+            await asyncio.sleep(2 ** attempt)
+        try:
+            route, response = await service._complete(prompt)
+        except Exception as e:
+            print(f"   ⚠️  {plant['id']}: {e}")
+            continue
+        choice = response.choices[0]
+        content = choice.message.content or ""
+        if getattr(choice, "finish_reason", None) == "length" or parse_tolerant(content) is None:
+            print(f"   ⚠️  {plant['id']}: réponse tronquée ou non exploitable")
+            continue
+        info = service._parse_llm_response(content, plant)
+        if info["summary"]:
+            return {"route": route.name, "info": info, "fingerprint": prompt_fingerprint(prompt)}
+    return None
+
+
+async def pregenerate(args) -> int:
+    service = LLMService()
+    if service.client is None:
+        print("❌ Erreur: aucun client LLM (GROQ_API_KEY ou OPENAI_API_KEY)")
+        return 1
+    # Hors ligne, la latence importe peu : pas de requête couverte (coût doublé)
+    service.hedge_enabled = False
+
+    store = MedicinalStore(args.output) if args.output else service.medicinal_store
+    if not store.enabled:
+        print("❌ Erreur: MEDICINAL_STORE_PATH est vide")
+        return 1
+
+    plants = load_catalog(args.plants)
+    todo = [
+        plant for plant in plants.values()
+        if args.force or not store.is_fresh(plant["id"], prompt_fingerprint(service._build_prompt(plant, None)))
+    ]
+    print(f"Fiches médicinales: {len(plants)} plantes, {len(plants) - len(todo)} à jour, {len(todo)} à générer")
+    print(f"   Fichier: {store.path} — mode {service.output_mode}, route {service.routes[0].name}")
+    if args.dry_run or not todo:
+        return 0
+
+    # Seau de jetons sans rafale : appels espacés de 60 / rate-per-minute secondes
+    limiter = TokenBucketLimiter(args.rate_per_minute / 60, 1) if args.rate_per_minute > 0 else None
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failed: List[str] = []
+    generated = 0
+
+    async def run(plant: Dict[str, Any]):
+        nonlocal generated
+        async with semaphore:
+            while limiter is not None and (wait := limiter.acquire("llm")) > 0:
+                await asyncio.sleep(wait)
+            result = await generate_one(service, plant, args.retries)
+        if result is None:
+            failed.append(plant["id"])
+            print(f"   ❌ {plant['id']}")
+            return
+        store.put(plant["id"], result["fingerprint"], result["info"], result["route"])
+        generated += 1
+        print(f"   ✅ {plant['id']} ({result['route']})")
+        if generated % SAVE_EVERY == 0:
+            store.save()
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(run(plant) for plant in todo))
+    finally:
+        if generated:
+            store.save()
+
+    print(f"\n{generated} fiches générées en {time.perf_counter() - start:.0f}s (version {store.version})")
+    if failed:
+        print(f"⚠️  {len(failed)} échecs (servis par le LLM en ligne): {', '.join(sorted(failed))}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-générer les fiches médicinales du catalogue")
+    parser.add_argument('--plants', nargs='+', help="Plantes à générer (défaut: tout le catalogue)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Appels LLM simultanés")
+    parser.add_argument('--rate-per-minute', type=float, default=30, help="Appels LLM par minute (0 = illimité)")
+    parser.add_argument('--retries', type=int, default=2, help="Nouveaux essais par plante")
+    parser.add_argument('--force', action='store_true', help="Régénérer aussi les fiches à jour")
+    parser.add_argument('--output', help="Fichier des fiches (défaut: MEDICINAL_STORE_PATH)")
+    parser.add_argument('--dry-run', action='store_true', help="Compter les fiches à générer sans appeler le LLM")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(pregenerate(args)))
@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Lanceur de production pré-fork de l'API
+
+Le processus maître importe l'application (FastAPI, TensorFlow, catalogue des
+plantes, base JSON, index d'embeddings, selon les routeurs de API_ROUTERS)
+puis forke les workers : ces pages sont partagées en copie sur écriture au
+lieu d'être chargées une fois par worker. Le modèle Keras, lui, est chargé
+dans chaque worker après le fork (préchauffage, GET /api/health/ready) : le
+runtime TensorFlow ne survit pas à un fork une fois initialisé et TensorFlow
+copie de toute façon les poids dans ses propres tampons.
+
+Les workers partagent le socket d'écoute ; le maître les redémarre s'ils
+s'arrêtent et affiche la mémoire unique (USS) de chacun une fois prêts, ou à
+la réception de SIGUSR1.
+
+Usage:
+    python serve.py                                # WEB_CONCURRENCY ou un worker par CPU
+    python serve.py --workers 4 --threads 2 --port 8000
+    kill -USR1 <pid du maître>                     # rapport mémoire à la demande
+"""
+
+import os
+import gc
+import sys
+import time
+import errno
+import select
+import signal
+import socket
+import logging
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services.inference_config import available_cpus, inference_setting, load_inference_config
+
+logger = logging.getLogger("serve")
+
+# Un worker qui meurt plus vite que ce délai est redémarré avec une pause
+MIN_WORKER_LIFETIME = 5.0
+RESTART_BACKOFF = 2.0
+
+
+def plan_workers(cpus: int, workers: Optional[int], threads: Optional[int]) -> Dict[str, int]:
+    """
+    Répartit les CPU entre workers et threads TensorFlow
+
+    Options, puis variables d'environnement, puis configuration mesurée par
+    plan_inference.py (models/inference_config.json). À défaut un worker par
+    CPU, et des threads intra-op qui se partagent les CPU restants pour que
+    workers x threads ne dépasse pas la machine.
+    """
+    config = load_inference_config()
+    workers = workers or int(inference_setting(config, "workers", 0)) or cpus
+    if threads is None and config.get("workers") not in (None, workers):
+        # Threads mesurés pour un autre nombre de workers
+        config = {}
+    intra_op = threads or int(inference_setting(config, "intra_op_threads", 0)) or max(1, cpus // workers)
+    inter_op = int(inference_setting(config, "inter_op_threads", 0)) or (2 if intra_op >= 4 else 1)
+    return {"workers": workers, "intra_op": intra_op, "inter_op": inter_op}
+
+
+def read_memory(pid: int) -> Optional[Dict[str, int]]:
+    """
+    RSS, PSS et USS (pages privées) d'un processus, en octets
+
+    Lit /proc/<pid>/smaps_rollup (Linux 4.14+) ; None si indisponible.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+            fields = {}
+            for line in f:
+                name, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    fields[name] = int(value.split()[0]) * 1024
+    except OSError:
+        return None
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def format_memory_report(master_pid: int, worker_pids: List[int]) -> str:
+    """Tableau de la mémoire du maître et des workers (Mo)"""
+    mb = 1024 * 1024
+    lines = [f"{'processus':<18}{'RSS':>10}{'PSS':>10}{'USS':>10}"]
+    total_rss = 0
+    total_footprint = 0
+    for role, pid in [("maître", master_pid)] + [("worker", pid) for pid in worker_pids]:
+        memory = read_memory(pid)
+        if memory is None:
+            lines.append(f"{role + ' ' + str(pid):<18}{'indisponible':>30}")
+            continue
+        lines.append(
+            f"{role + ' ' + str(pid):<18}{memory['rss'] / mb:>10.1f}"
+            f"{memory['pss'] / mb:>10.1f}{memory['uss'] / mb:>10.1f}"
+        )
+        total_rss += memory["rss"]
+        # Empreinte réelle : le maître en entier, puis la part privée de chaque worker
+        total_footprint += memory["rss"] if pid == master_pid else memory["uss"]
+    lines.append(
+        f"Empreinte: {total_footprint / mb:.1f} Mo (RSS maître + USS workers), "
+        f"somme des RSS: {total_rss / mb:.1f} Mo"
+    )
+    return "\n".join(lines)
+
+
+def register_memory_metrics():
+    """Mémoire du worker dans /metrics (lue à chaque collecte)"""
+    from app.services import metrics
+
+    gauge = metrics.REGISTRY.gauge(
+        "ivoire_process_memory_bytes",
+        "Mémoire du processus (kind: rss, pss ou uss = pages privées)",
+        ["kind"]
+    )
+    for kind in ("rss", "pss", "uss"):
+        gauge.set_function(lambda kind=kind: (read_memory(os.getpid()) or {}).get(kind, 0), kind=kind)
+
+
+def create_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Master:
+    """Processus maître : fork, supervision et arrêt des workers"""
+
+    def __init__(self, app, sock: socket.socket, plan: Dict[str, int], args):
+        self.app = app
+        self.sock = sock
+        self.plan = plan
+        self.args = args
+        self.workers: Dict[int, float] = {}
+        self.ready: set = set()
+        self.stopping = False
+        self.report_requested = False
+        self.reported = False
+        # Les workers y écrivent leur PID une fois le préchauffage terminé
+        self.ready_read, self.ready_write = os.pipe()
+
+    def spawn_worker(self):
+        pid = os.fork()
+        if pid == 0:
+            os.close(self.ready_read)
+            try:
+                run_worker(self.app, self.sock, self.args, self.ready_write)
+            finally:
+                os._exit(0)
+        self.workers[pid] = time.monotonic()
+        logger.info(f"Worker {pid} démarré")
+
+    def handle_signal(self, signum, frame):
+        if signum == signal.SIGUSR1:
+            self.report_requested = True
+        else:
+            self.stopping = True
+
+    def reap_workers(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            self.ready.discard(pid)
+            if started is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if self.stopping:
+                continue
+            logger.warning(f"Worker {pid} arrêté (code {code}), redémarrage")
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(RESTART_BACKOFF)
+            self.spawn_worker()
+
+    def read_ready(self, timeout: float):
+        try:
+            readable, _, _ = select.select([self.ready_read], [], [], timeout)
+        except InterruptedError:
+            return
+        if not readable:
+            return
+        for line in os.read(self.ready_read, 4096).decode().split():
+            pid = int(line)
+            if pid in self.workers:
+                self.ready.add(pid)
+                logger.info(f"Worker {pid} prêt ({len(self.ready)}/{self.plan['workers']})")
+
+    def run(self):
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1):
+            signal.signal(signum, self.handle_signal)
+
+        for _ in range(self.plan["workers"]):
+            self.spawn_worker()
+
+        while not self.stopping:
+            self.read_ready(timeout=1.0)
+            self.reap_workers()
+            all_ready = len(self.ready) == self.plan["workers"]
+            if self.report_requested or (all_ready and not self.reported and self.args.memory_report):
+                self.report_requested = False
+                self.reported = True
+                logger.info("Mémoire par processus (Mo):\n" + format_memory_report(os.getpid(), sorted(self.workers)))
+
+        self.shutdown()
+
+    def shutdown(self):
+        logger.info(f"Arrêt de {len(self.workers)} workers")
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.args.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self.reap_workers()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            logger.warning(f"Worker {pid} tué après {self.args.graceful_timeout}s")
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        while self.workers:
+            try:
+                pid, _ = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            self.workers.pop(pid, None)
+
+
+def run_worker(app, sock: socket.socket, args, ready_fd: int):
+    """
+    Corps d'un worker : serveur uvicorn sur le socket partagé
+
+    Les threads TensorFlow du plan (TF_NUM_INTRAOP_THREADS,
+    TF_NUM_INTEROP_THREADS) sont appliqués par VisionService au chargement
+    du modèle, avant la création du runtime dans le worker.
+    """
+    import uvicorn
+
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1):
+        signal.signal(signum, signal.SIG_DFL)
+
+    from app.main import warmup
+
+    def notify_ready():
+        # Sans routeur d'identification, rien à préchauffer
+        while warmup is not None and warmup.status in (warmup.PENDING, warmup.RUNNING):
+            time.sleep(0.2)
+        if warmup is None or warmup.ready:
+            os.write(ready_fd, f"{os.getpid()}\n".encode())
+
+    threading.Thread(target=notify_ready, name="ready-notifier", daemon=True).start()
+
+    config = uvicorn.Config(
+        app,
+        log_level=args.log_level,
+        access_log=args.access_log,
+        timeout_keep_alive=args.keep_alive
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lanceur de production pré-fork de l'API")
+    parser.add_argument('--host', default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument('--port', type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument('--workers', type=int, help="Processus workers (WEB_CONCURRENCY, défaut: nombre de CPU)")
+    parser.add_argument('--threads', type=int, help="Threads intra-op TensorFlow par worker (défaut: CPU / workers)")
+    parser.add_argument('--backlog', type=int, default=2048)
+    parser.add_argument('--keep-alive', type=int, default=5, help="Délai keep-alive HTTP (s)")
+    parser.add_argument('--graceful-timeout', type=float, default=30.0, help="Délai d'arrêt des workers (s)")
+    parser.add_argument('--log-level', default=os.getenv("LOG_LEVEL", "info"))
+    parser.add_argument('--no-access-log', dest='access_log', action='store_false')
+    parser.add_argument('--no-memory-report', dest='memory_report', action='store_false',
+                        help="Ne pas afficher la mémoire des workers une fois prêts")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)s [%(process)d] %(levelname)s %(name)s: %(message)s"
+    )
+
+    if not hasattr(os, "fork"):
+        import uvicorn
+        logger.warning("fork indisponible sur cette plateforme : un seul processus")
+        uvicorn.run("app.main:app", host=args.host, port=args.port, log_level=args.log_level)
+        return
+
+    cpus = available_cpus()
+    plan = plan_workers(cpus, args.workers, args.threads)
+    logger.info(
+        f"{cpus} CPU: {plan['workers']} workers x {plan['intra_op']} threads intra-op "
+        f"({plan['inter_op']} inter-op)"
+    )
+
+    for name, value in (
+        ("TF_NUM_INTRAOP_THREADS", plan["intra_op"]),
+        ("TF_NUM_INTEROP_THREADS", plan["inter_op"]),
+        ("OMP_NUM_THREADS", plan["intra_op"]),
+    ):
+        os.environ[name] = str(value)
+
+    try:
+        sock = create_socket(args.host, args.port, args.backlog)
+    except OSError as e:
+        if e.errno == errno.EADDRINUSE:
+            logger.error(f"Port {args.port} déjà utilisé")
+            sys.exit(1)
+        raise
+
+    start = time.perf_counter()
+    from app.main import app, warmup
+    if warmup is not None:
+        # Module seul (aucune opération) : partagé par les workers, runtime créé après le fork
+        from app.services.vision_service import import_tensorflow
+        import_tensorflow()
+    register_memory_metrics()
+    logger.info(f"Application préchargée dans le maître en {time.perf_counter() - start:.1f}s")
+
+    # Objets préchargés hors du ramasse-miettes : ses passages ne
+    # réécrivent pas leurs en-têtes dans les workers (pages restées partagées)
+    gc.collect()
+    gc.freeze()
+
+    Master(app, sock, plan, args).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Tests du contrôle d'admission (seaux de jetons en mémoire et SQLite, middleware)
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.services import admission
+from app.services.admission import (
+    AdmissionMiddleware,
+    SQLiteTokenBucketLimiter,
+    TokenBucketLimiter,
+    _acquire_all,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(admission.time, "monotonic", fake)
+    monkeypatch.setattr(admission.time, "time", fake)
+    return fake
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_limiter(request, tmp_path):
+    def factory(rate: float, burst: int):
+        if request.param == "sqlite":
+            return SQLiteTokenBucketLimiter(rate, burst, str(tmp_path / f"buckets_{rate}_{burst}.sqlite3"))
+        return TokenBucketLimiter(rate, burst)
+    return factory
+
+
+def test_rafale_puis_recharge(make_limiter, clock):
+    limiter = make_limiter(1.0, 3)
+    assert [limiter.acquire("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("a") == pytest.approx(1.0)
+    # Un autre client a son propre seau
+    assert limiter.acquire("b") == 0.0
+    clock.now += 1.5
+    assert limiter.acquire("a") == 0.0
+    assert limiter.acquire("a") == pytest.approx(0.5)
+
+
+def test_remboursement_plafonne(make_limiter, clock):
+    limiter = make_limiter(1.0, 2)
+    limiter.acquire("a")
+    limiter.refund("a")
+    limiter.refund("a")
+    assert [limiter.acquire("a") for _ in range(2)] == [0.0, 0.0]
+    assert limiter.acquire("a") > 0
+    # Rembourser un client inconnu ne crée pas de seau
+    limiter.refund("inconnu")
+
+
+def test_refus_ip_ne_debite_pas_la_session(make_limiter, clock):
+    sessions = make_limiter(1.0, 5)
+    ips = make_limiter(1.0, 1)
+    assert _acquire_all([(sessions, "session:s"), (ips, "ip:x")]) == 0.0
+    for _ in range(10):
+        assert _acquire_all([(sessions, "session:s"), (ips, "ip:x")]) > 0
+    # La session a gardé ses 4 jetons restants
+    assert [sessions.acquire("session:s") for _ in range(4)] == [0.0] * 4
+    assert sessions.acquire("session:s") > 0
+
+
+def test_oubli_des_clients_anciens(clock):
+    limiter = TokenBucketLimiter(1.0, 1, max_clients=2)
+    for key in ("a", "b", "c"):
+        limiter.acquire(key)
+    assert list(limiter._buckets) == ["b", "c"]
+
+
+def make_app(**kwargs) -> TestClient:
+    app = FastAPI()
+
+    @app.post("/identify")
+    async def identify():
+        return {"ok": True}
+
+    app.add_middleware(AdmissionMiddleware, rate_limited_paths={"/identify"},
+                       concurrency_limited_paths=set(), max_inflight=0, **kwargs)
+    return TestClient(app)
+
+
+def test_middleware_429(clock):
+    client = make_app(limiter=TokenBucketLimiter(1.0, 2), key="ip")
+    assert [client.post("/identify").status_code for _ in range(2)] == [200, 200]
+    response = client.post("/identify")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    # Les GET ne sont pas limités
+    assert client.get("/identify").status_code == 405
+
+
+def test_middleware_session_et_ip(clock):
+    client = make_app(limiter=TokenBucketLimiter(1.0, 1), key="session",
+                      ip_limiter=TokenBucketLimiter(1.0, 2))
+    assert client.post("/identify", headers={"X-Session-ID": "a"}).status_code == 200
+    assert client.post("/identify", headers={"X-Session-ID": "a"}).status_code == 429
+    # Une nouvelle session ne contourne pas le seau de l'IP
+    assert client.post("/identify", headers={"X-Session-ID": "b"}).status_code == 200
+    assert client.post("/identify", headers={"X-Session-ID": "c"}).status_code == 429
+
+
+def test_cle_inconnue():
+    with pytest.raises(ValueError):
+        AdmissionMiddleware(None, set(), set(), limiter=TokenBucketLimiter(1.0, 1), key="user")
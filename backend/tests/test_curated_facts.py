@@ -0,0 +1,51 @@
+"""
+Tests de l'index des faits médicinaux vérifiés
+"""
+
+from app.services.curated_facts import CuratedFactIndex, normalize, terms
+
+PLANT = {
+    "id": "1",
+    "medicinal_properties": [
+        {"type": "antipyrétique", "description": "Fait baisser la fièvre", "evidence_level": "traditionnel"},
+        {"type": "antipaludique", "description": "Actif contre le paludisme", "evidence_level": "clinique"},
+    ],
+    "traditional_uses": [
+        {"indication": "maux de ventre", "preparation": "décoction", "recipe": "Feuilles bouillies", "region": "Nord"},
+        {"indication": "fièvre", "preparation": "infusion"},
+    ],
+}
+
+
+def test_termes_normalises():
+    assert normalize("Fièvre Élevée") == "fievre elevee"
+    # Mots courts et mots vides ignorés, racine de 6 lettres
+    assert terms("Comment soigner la fièvre avec les feuilles ?") == {"fievre", "feuill"}
+
+
+def test_faits_sans_question():
+    index = CuratedFactIndex(max_facts=10)
+    facts = index.retrieve(PLANT)
+    # Propriétés les mieux établies d'abord, puis usages
+    assert facts[0].startswith("Propriété antipaludique (clinique)")
+    assert facts[2] == "Usage contre maux de ventre : décoction, Feuilles bouillies (Nord)"
+    assert facts[3] == "Usage contre fièvre : infusion"
+    assert index.coverage(PLANT) == 4
+
+
+def test_faits_pertinents_pour_la_question():
+    index = CuratedFactIndex(max_facts=10)
+    facts = index.retrieve(PLANT, "Peut-on l'utiliser contre la fievre ?")
+    assert len(facts) == 2 and all("fièvre" in fact for fact in facts)
+    assert index.coverage(PLANT, "fièvres et paludisme") == 3
+    # Aucun fait commun : les faits les mieux établis
+    assert index.retrieve(PLANT, "toux sèche") == index.retrieve(PLANT)
+    assert index.coverage(PLANT, "toux sèche") == 0
+
+
+def test_limite_et_reconstruction():
+    index = CuratedFactIndex(max_facts=1)
+    assert len(index.retrieve(PLANT)) == 1
+    # Fiche remplacée (rechargement du catalogue) : index reconstruit
+    updated = {**PLANT, "traditional_uses": [{"indication": "toux", "preparation": "sirop"}]}
+    assert index.retrieve(updated, "toux") == ["Usage contre toux : sirop"]
@@ -0,0 +1,108 @@
+"""
+Tests de l'index d'embeddings (recherche IVF, votes kNN) et de leur
+combinaison avec la tête softmax
+"""
+
+import numpy as np
+import pytest
+
+from app.services.embedding_index import EmbeddingIndex
+from app.services.vision_service import VisionService
+
+DIM = 16
+
+
+def unit(*weights: float) -> np.ndarray:
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[:len(weights)] = weights
+    return vector / np.linalg.norm(vector)
+
+
+def clustered_index(n_plants: int = 8, per_plant: int = 25, seed: int = 0) -> EmbeddingIndex:
+    rng = np.random.default_rng(seed)
+    index = EmbeddingIndex(n_probe=2)
+    for plant in range(n_plants):
+        center = np.eye(DIM, dtype=np.float32)[plant]
+        index.add(f"plante_{plant}", center + 0.05 * rng.standard_normal((per_plant, DIM)))
+    return index
+
+
+def test_recherche_ivf_retrouve_la_plante():
+    index = clustered_index()
+    assert len(index) == 200
+    assert len(index.centroids) > 1
+    # Listes inversées contiguës couvrant tout l'index
+    assert index.offsets[0] == 0 and index.offsets[-1] == len(index)
+
+    similarities, labels = index.search(np.eye(DIM)[3], k=5)
+    assert len(labels) == 5
+    assert list(similarities) == sorted(similarities, reverse=True)
+    assert {index.plant_ids[label] for label in labels} == {"plante_3"}
+
+
+def test_sauvegarde_et_rechargement(tmp_path):
+    index = clustered_index(n_plants=3, per_plant=10)
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = EmbeddingIndex.load(path)
+    assert loaded.plant_ids == index.plant_ids
+    assert np.array_equal(loaded.embeddings, index.embeddings)
+    assert loaded.vote(np.eye(DIM)[1], k=5) == index.vote(np.eye(DIM)[1], k=5)
+
+
+def test_dimension_incompatible():
+    index = clustered_index(n_plants=1, per_plant=4)
+    with pytest.raises(ValueError):
+        index.add("autre", np.ones((2, DIM + 1)))
+
+
+def test_vote_non_renormalise():
+    index = EmbeddingIndex()
+    index.add("nouvelle", np.stack([unit(1, 0.1), unit(1, -0.1), unit(1, 0, 0.1)]))
+
+    votes = index.vote(unit(1), k=10)
+    # 3 voisins très similaires sur 10 votes possibles
+    assert votes["nouvelle"] == pytest.approx(0.3, abs=0.01)
+
+
+def test_vote_sous_le_seuil():
+    index = EmbeddingIndex()
+    index.add("nouvelle", np.stack([unit(1, 0.1), unit(1, -0.1)]))
+    # Similarité ~0.3 avec les références
+    assert index.vote(unit(0.3, 0, 0.95), k=10, min_similarity=0.5) == {}
+    assert index.vote(unit(0, 1), k=10, min_similarity=0.0) != {}
+    assert index.vote(-unit(1), k=10) == {}
+
+
+@pytest.fixture
+def vision_service():
+    service = VisionService(defer_model_load=True)
+    service.class_names = ["moringa_oleifera", "carica_papaya"]
+    service.identification_mode = "hybrid"
+    service.knn_k = 10
+    service.knn_weight = 0.5
+    service.knn_min_similarity = 0.5
+    # Plante ajoutée sans réentraînement, indexée avec trois images seulement
+    service.embedding_index = EmbeddingIndex()
+    service.embedding_index.add("nouvelle", np.stack([unit(1, 0.1), unit(1, -0.1), unit(1, 0, 0.1)]))
+    return service
+
+
+def test_image_hors_index_laissee_au_classifieur(vision_service):
+    probabilities = np.array([0.7, 0.3])
+    scores = vision_service._combine_scores(probabilities, unit(0.2, 0, 0, 1))
+    assert "nouvelle" not in scores
+    assert max(scores, key=scores.get) == "moringa_oleifera"
+    assert scores["moringa_oleifera"] == pytest.approx(0.7)
+
+    vision_service.identification_mode = "knn"
+    scores = vision_service._combine_scores(probabilities, unit(0.2, 0, 0, 1))
+    assert max(scores, key=scores.get) == "moringa_oleifera"
+
+
+def test_plante_peu_indexee_ne_prend_pas_tout(vision_service):
+    # Proche des références mais le classifieur est sûr de lui
+    scores = vision_service._combine_scores(np.array([0.9, 0.1]), unit(1, 0.05))
+    assert max(scores, key=scores.get) == "moringa_oleifera"
+    assert scores["nouvelle"] <= 0.5 * 0.3 + 1e-6
+    assert sum(scores.values()) <= 1.0 + 1e-6
@@ -0,0 +1,64 @@
+"""
+Tests du stockage des feedbacks partagé entre workers (verrou, remplacement atomique)
+"""
+
+import asyncio
+import json
+import multiprocessing
+
+import pytest
+
+from app.models.feedback_schemas import FeedbackStatus, FeedbackType, PredictionFeedback
+from app.services import feedback_service
+from app.services.feedback_service import FeedbackService
+
+
+def make_feedback(plant_id: str = "1") -> PredictionFeedback:
+    return PredictionFeedback(
+        image_hash="0" * 64,
+        predicted_plant_id=plant_id,
+        predicted_confidence=80.0,
+        feedback_type=FeedbackType.CONFIRMATION,
+    )
+
+
+def submit_many(storage_path: str, count: int):
+    service = FeedbackService(storage_path)
+    for _ in range(count):
+        asyncio.run(service.submit_feedback(make_feedback()))
+
+
+def test_deux_workers_ne_s_ecrasent_pas(tmp_path):
+    first = FeedbackService(str(tmp_path))
+    second = FeedbackService(str(tmp_path))
+    first_id = asyncio.run(first.submit_feedback(make_feedback("1")))
+    # second a chargé un fichier vide : l'écriture relit le fichier sous le verrou
+    asyncio.run(second.submit_feedback(make_feedback("2")))
+
+    stored = json.loads((tmp_path / "feedbacks.json").read_text(encoding="utf-8"))
+    assert [fb["predicted_plant_id"] for fb in stored] == ["1", "2"]
+    # Les lectures voient aussi les écritures de l'autre instance
+    assert second.get_feedback(first_id) is not None
+    assert second.update_feedback_status(first_id, FeedbackStatus.APPROVED)
+    assert first.get_feedback(first_id)["status"] == "approved"
+
+
+def test_remplacement_atomique(tmp_path):
+    service = FeedbackService(str(tmp_path))
+    asyncio.run(service.submit_feedback(make_feedback()))
+    assert not (tmp_path / "feedbacks.tmp").exists()
+    assert len(json.loads((tmp_path / "feedbacks.json").read_text(encoding="utf-8"))) == 1
+
+
+@pytest.mark.skipif(not feedback_service.FCNTL_AVAILABLE, reason="verrou fcntl indisponible")
+def test_ecritures_concurrentes_entre_processus(tmp_path):
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=submit_many, args=(str(tmp_path), 10)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    stored = json.loads((tmp_path / "feedbacks.json").read_text(encoding="utf-8"))
+    assert len(stored) == 40
@@ -0,0 +1,73 @@
+"""
+Tests du générateur de données synthétiques (déterminisme, cohérence)
+"""
+
+import json
+
+from generate_fixtures import (
+    JSONArrayWriter,
+    django_feedback_fixture,
+    django_plant_fixtures,
+    generate_feedback_images,
+    generate_feedbacks,
+    generate_plants,
+)
+
+
+def test_plantes_deterministes():
+    first = list(generate_plants(50, seed=3))
+    assert first == list(generate_plants(50, seed=3))
+    assert first != list(generate_plants(50, seed=4))
+    assert [plant["id"] for plant in first] == [str(i) for i in range(1, 51)]
+    assert len({plant["scientific_name"] for plant in first}) == 50
+
+
+def test_feedbacks_deterministes_et_coherents():
+    plant_ids = [str(i) for i in range(1, 21)]
+    hashes = ["a" * 64, "b" * 64]
+    first = list(generate_feedbacks(500, plant_ids, seed=1, image_hashes=hashes))
+    assert first == list(generate_feedbacks(500, plant_ids, seed=1, image_hashes=hashes))
+    assert first != list(generate_feedbacks(500, plant_ids, seed=2, image_hashes=hashes))
+
+    timestamps = [feedback["timestamp"] for feedback in first]
+    assert timestamps == sorted(timestamps)
+    for feedback in first:
+        assert feedback["predicted_plant_id"] in plant_ids
+        if feedback["feedback_type"] == "correction":
+            assert feedback["is_correct"] is False
+            assert feedback["correct_plant_id"] in plant_ids
+            assert feedback["correct_plant_id"] != feedback["predicted_plant_id"]
+        if feedback["image_path"] is not None:
+            assert feedback["image_hash"] in hashes
+        assert (feedback["curated_at"] is None) == (feedback["status"] == "pending")
+
+
+def test_images_deterministes():
+    first = [(h, plant_id) for h, plant_id, _ in generate_feedback_images(3, ["1", "2"], seed=0, size=(32, 24))]
+    second = [(h, plant_id) for h, plant_id, _ in generate_feedback_images(3, ["1", "2"], seed=0, size=(32, 24))]
+    assert first == second
+
+
+def test_fixtures_django():
+    plants = list(generate_plants(3))
+    objects = list(django_plant_fixtures(plants))
+    assert [obj["pk"] for obj in objects if obj["model"] == "plants.plant"] == [1, 2, 3]
+    properties = [obj for obj in objects if obj["model"] == "plants.medicinalproperty"]
+    assert [obj["pk"] for obj in properties] == list(range(1, len(properties) + 1))
+
+    feedback = next(generate_feedbacks(1, ["1", "2"]))
+    fixture = django_feedback_fixture(7, feedback)
+    assert fixture["pk"] == 7
+    assert fixture["fields"]["predicted_plant"] == int(feedback["predicted_plant_id"])
+    assert fixture["fields"]["timestamp"].endswith("Z")
+
+
+def test_ecriture_en_flux(tmp_path):
+    path = tmp_path / "out" / "items.json"
+    with JSONArrayWriter(str(path)) as writer:
+        for i in range(3):
+            writer.write({"i": i, "nom": "é"})
+    assert json.loads(path.read_text(encoding="utf-8")) == [{"i": 0, "nom": "é"}, {"i": 1, "nom": "é"}, {"i": 2, "nom": "é"}]
+    with JSONArrayWriter(str(tmp_path / "vide.json")):
+        pass
+    assert json.loads((tmp_path / "vide.json").read_text()) == []
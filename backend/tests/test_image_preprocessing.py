@@ -0,0 +1,55 @@
+"""
+Tests du prétraitement des images, dans le processus et dans le pool de
+processus (mémoire partagée)
+"""
+
+import asyncio
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services.image_preprocessing import TENSOR_SHAPE, PreprocessPool, preprocess
+
+
+def image_bytes(color, size=(300, 200), mode="RGB", image_format="PNG") -> bytes:
+    buffer = io.BytesIO()
+    Image.new(mode, size, color).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def test_tenseur_normalise():
+    tensor = preprocess(image_bytes((255, 0, 51)))
+    assert tensor.shape == (1,) + TENSOR_SHAPE
+    assert tensor.dtype == np.float32
+    assert tensor[0, 0, 0] == pytest.approx([1.0, 0.0, 0.2])
+
+
+def test_conversion_en_rgb():
+    tensor = preprocess(image_bytes(128, mode="L"))
+    assert tensor.shape == (1,) + TENSOR_SHAPE
+    assert np.allclose(tensor, 128 / 255)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = PreprocessPool(workers=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_identique_au_processus(pool):
+    images = [image_bytes((10, 200, 30)), b"pas une image", image_bytes((90, 90, 250), image_format="JPEG")]
+    decoded = pool.preprocess_batch(images)
+
+    assert decoded[1] is None
+    assert np.array_equal(decoded[0], preprocess(images[0]))
+    assert np.array_equal(decoded[2], preprocess(images[2]))
+    assert pool.pending == 0
+
+
+def test_pool_asynchrone(pool):
+    decoded = asyncio.run(pool.preprocess_batch_async([image_bytes((1, 2, 3))]))
+    assert decoded[0].shape == (1,) + TENSOR_SHAPE
+    assert pool.preprocess_batch([]) == []
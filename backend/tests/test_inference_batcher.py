@@ -0,0 +1,104 @@
+"""
+Tests du regroupement des identifications et du thread d'inférence unique
+"""
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.services.inference_batcher import InferenceBatcher, InferenceThread
+
+
+class CountingModel:
+    """Passe avant factice qui mesure les appels simultanés"""
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.batch_sizes = []
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def predict(self, images: np.ndarray):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.batch_sizes.append(len(images))
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        # Probabilités : l'identifiant de chaque image, répété
+        return np.repeat(images[:, :1], 3, axis=1), None
+
+
+def image(value: float) -> np.ndarray:
+    return np.full((1, 2), value, dtype=np.float32)
+
+
+def test_batch_regroupe_et_resultats_alignes():
+    model = CountingModel()
+    thread = InferenceThread()
+    batcher = InferenceBatcher(model.predict, window_ms=20, max_batch_size=8, inference_thread=thread)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(image(i)) for i in range(20)))
+
+    results = asyncio.run(main())
+    thread.shutdown()
+    assert [float(probabilities[0]) for probabilities, _ in results] == list(range(20))
+    assert all(embedding is None for _, embedding in results)
+    assert max(model.batch_sizes) == 8
+    assert sum(model.batch_sizes) == 20
+
+
+def test_passes_avant_une_par_une():
+    model = CountingModel()
+    thread = InferenceThread()
+    batcher = InferenceBatcher(model.predict, window_ms=1, max_batch_size=2, inference_thread=thread)
+    # Travaux en arrière-plan : appels depuis d'autres threads
+    workers = [
+        threading.Thread(target=thread.run_sync, args=(model.predict, np.zeros((4, 2))))
+        for _ in range(3)
+    ]
+
+    async def main():
+        for worker in workers:
+            worker.start()
+        await asyncio.gather(
+            *(batcher.submit(image(i)) for i in range(10)),
+            *(thread.run(model.predict, np.zeros((3, 2))) for _ in range(5))
+        )
+        for worker in workers:
+            await asyncio.to_thread(worker.join)
+
+    asyncio.run(main())
+    thread.shutdown()
+    assert model.peak == 1
+    assert len(model.threads) == 1 and next(iter(model.threads)).startswith("inference")
+
+
+def test_erreur_propagee_a_tout_le_batch():
+    def failing(images):
+        raise RuntimeError("modèle indisponible")
+
+    batcher = InferenceBatcher(failing, window_ms=5)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(image(i)) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    batcher.inference_thread.shutdown()
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_run_sync_retourne_le_resultat():
+    thread = InferenceThread()
+    assert thread.run_sync(sum, [1, 2, 3]) == 6
+    with pytest.raises(ZeroDivisionError):
+        thread.run_sync(lambda: 1 / 0)
+    thread.shutdown()
@@ -0,0 +1,40 @@
+"""
+Tests de la configuration d'inférence recommandée (fichier, CPU, priorité de l'environnement)
+"""
+
+import json
+
+from app.services.inference_config import available_cpus, inference_setting, load_inference_config
+
+
+def write_config(tmp_path, cpus, recommended) -> str:
+    path = tmp_path / "inference_config.json"
+    path.write_text(json.dumps({"host": {"cpus": cpus}, "recommended": recommended}), encoding="utf-8")
+    return str(path)
+
+
+def test_configuration_de_la_machine(tmp_path):
+    path = write_config(tmp_path, available_cpus(), {"workers": 2, "batch_window_ms": 4})
+    assert load_inference_config(path) == {"workers": 2, "batch_window_ms": 4}
+
+
+def test_configuration_d_une_autre_machine_ignoree(tmp_path):
+    path = write_config(tmp_path, available_cpus() + 1, {"workers": 2})
+    assert load_inference_config(path) == {}
+
+
+def test_fichier_absent_ou_illisible(tmp_path):
+    assert load_inference_config(str(tmp_path / "absent.json")) == {}
+    path = tmp_path / "illisible.json"
+    path.write_text("{", encoding="utf-8")
+    assert load_inference_config(str(path)) == {}
+
+
+def test_priorite_environnement(monkeypatch):
+    config = {"intra_op_threads": 4}
+    monkeypatch.delenv("TF_NUM_INTRAOP_THREADS", raising=False)
+    monkeypatch.delenv("TF_NUM_INTEROP_THREADS", raising=False)
+    assert inference_setting(config, "intra_op_threads", 1) == 4.0
+    assert inference_setting(config, "inter_op_threads", 1) == 1.0
+    monkeypatch.setenv("TF_NUM_INTRAOP_THREADS", "2")
+    assert inference_setting(config, "intra_op_threads", 1) == 2.0
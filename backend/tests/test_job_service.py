@@ -0,0 +1,110 @@
+"""
+Tests des travaux d'identification en masse (archive ZIP, résultats JSONL/CSV)
+"""
+
+import csv
+import io
+import json
+import zipfile
+
+import pytest
+
+from app.models.job_schemas import JobStatus, ResultFormat
+from app.services.job_service import JobService
+
+
+class FakeVision:
+    """Identifie chaque image par son contenu ; b"illisible" échoue"""
+
+    def __init__(self):
+        self.batches = []
+
+    def identify_batch_sync(self, images, top_k=5):
+        self.batches.append(len(images))
+        return [
+            None if image == b"illisible" else [
+                {"plant_id": image.decode(), "confidence": 91.23456},
+                {"plant_id": "autre", "confidence": 5.0},
+            ]
+            for image in images
+        ]
+
+
+def write_archive(path, files):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+
+
+@pytest.fixture
+def service(tmp_path):
+    return JobService(FakeVision(), storage_path=str(tmp_path), workers=1, batch_size=2)
+
+
+def run_job(service, files, result_format=ResultFormat.JSONL):
+    job = service.create_job("photos.zip", result_format)
+    write_archive(service.archive_path(job.id), files)
+    service.process_job(job)
+    return job, service.result_path(job).read_text(encoding="utf-8")
+
+
+FILES = {
+    "photos/a.jpg": b"moringa_oleifera",
+    "photos/b.PNG": b"carica_papaya",
+    "photos/c.jpg": b"illisible",
+    "photos/notes.txt": b"ignore",
+    "__MACOSX/photos/._a.jpg": b"ignore",
+    "photos/vide/": b"",
+}
+
+
+def test_resultats_jsonl(service):
+    job, output = run_job(service, FILES)
+    records = [json.loads(line) for line in output.splitlines()]
+
+    assert job.status == JobStatus.COMPLETED
+    assert (job.total_images, job.processed_images, job.failed_images) == (3, 3, 1)
+    assert service.vision_service.batches == [2, 1]
+    assert records[0] == {
+        "filename": "photos/a.jpg",
+        "plant_id": "moringa_oleifera",
+        "confidence": 91.2346,
+        "alternatives": [{"plant_id": "autre", "confidence": 5.0}],
+    }
+    assert records[2] == {"filename": "photos/c.jpg", "error": "Image illisible"}
+
+
+def test_resultats_csv(service):
+    _, output = run_job(service, FILES, ResultFormat.CSV)
+    rows = list(csv.DictReader(io.StringIO(output)))
+    assert [row["filename"] for row in rows] == ["photos/a.jpg", "photos/b.PNG", "photos/c.jpg"]
+    assert json.loads(rows[1]["alternatives"]) == [{"plant_id": "autre", "confidence": 5.0}]
+    assert rows[2]["error"] == "Image illisible"
+
+
+def test_image_trop_volumineuse(service):
+    service.max_image_bytes = 10
+    job, output = run_job(service, {"a.jpg": b"moringa_oleifera", "b.jpg": b"neem"})
+    records = [json.loads(line) for line in output.splitlines()]
+    assert records[0]["error"].startswith("Image trop volumineuse")
+    assert records[1]["plant_id"] == "neem"
+    assert job.failed_images == 1
+
+
+def test_archive_invalide_refusee(service):
+    job = service.create_job("photos.zip")
+    service.archive_path(job.id).write_bytes(b"pas un zip")
+    with pytest.raises(ValueError):
+        service.submit(job)
+    service.discard(job)
+    assert not service.job_dir(job.id).exists()
+
+
+def test_travail_interrompu_marque_en_echec(service, tmp_path):
+    job = service.create_job("photos.zip")
+    job.status = JobStatus.RUNNING
+    service._save_job(job)
+
+    reloaded = JobService(FakeVision(), storage_path=str(tmp_path)).jobs[job.id]
+    assert reloaded.status == JobStatus.FAILED
+    assert "redémarrage" in reloaded.error
@@ -0,0 +1,67 @@
+"""
+Tests des routes LLM (disjoncteur, quantiles de latence)
+"""
+
+import pytest
+
+from app.services import llm_routing
+from app.services.llm_routing import CircuitBreaker, LLMRoute
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(llm_routing.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_ouverture_apres_echecs_consecutifs(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_seconds=10)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    # Le succès remet le compteur à zéro
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_semi_ouvert_un_seul_essai(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=10)
+    breaker.record_failure()
+    clock[0] += 9.9
+    assert not breaker.allow()
+    clock[0] += 0.1
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    # Essai annulé : un nouvel essai est permis
+    breaker.release()
+    assert breaker.allow()
+    # Essai échoué : réouverture pour un nouveau délai
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_quantile_de_latence():
+    route = LLMRoute("groq", client=None, model_name="modele", window=50)
+    assert route.name == "groq:modele"
+    for i in range(19):
+        route.observe(i / 100)
+    assert route.latency_quantile(0.95) is None
+    route.observe(0.19)
+    assert route.latency_quantile(0.95) == pytest.approx(0.19)
+    assert route.latency_quantile(0.5) == pytest.approx(0.10)
+    # Fenêtre glissante : seules les 50 dernières durées comptent
+    for _ in range(50):
+        route.observe(1.0)
+    assert route.latency_quantile(0.5) == 1.0
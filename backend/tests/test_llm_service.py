@@ -0,0 +1,64 @@
+"""
+Tests du routage des demandes LLM par niveau de modèle (faits vérifiés, options)
+"""
+
+import pytest
+
+from app.services.llm_service import GROQ_AVAILABLE, LLMService
+
+PLANT = {
+    "id": "1",
+    "scientific_name": "Parkia biglobosa",
+    "medicinal_properties": [
+        {"type": "antipyrétique", "description": "Fait baisser la fièvre", "evidence_level": "traditionnel"},
+    ],
+    "traditional_uses": [{"indication": "fièvre", "preparation": "décoction"}],
+}
+BARE_PLANT = {"id": "2", "scientific_name": "Ficus sur"}
+
+pytestmark = pytest.mark.skipif(not GROQ_AVAILABLE, reason="client groq non installé")
+
+
+@pytest.fixture
+def make_service(monkeypatch):
+    def factory(**flags):
+        monkeypatch.setenv("LLM_PROVIDER", "groq")
+        monkeypatch.setenv("GROQ_API_KEY", "test")
+        monkeypatch.setenv("LLM_MODEL", "grand-modele")
+        monkeypatch.setenv("LLM_FAST_MODEL", "petit-modele")
+        monkeypatch.setenv("MEDICINAL_STORE_PATH", "")
+        for name, value in flags.items():
+            monkeypatch.setenv(name, value)
+        return LLMService()
+    return factory
+
+
+def test_options_desactivees_par_defaut(make_service, monkeypatch):
+    monkeypatch.delenv("LLM_RAG", raising=False)
+    monkeypatch.delenv("LLM_TIER_ROUTING", raising=False)
+    monkeypatch.delenv("LLM_HEDGE", raising=False)
+    service = make_service()
+    assert not service.rag_enabled and not service.hedge_enabled
+    assert list(service.tiers) == ["large"]
+    assert service.classify(PLANT, None) == ("none", "large")
+
+
+def test_routage_par_niveau(make_service):
+    service = make_service(LLM_RAG="true", LLM_TIER_ROUTING="true")
+    fast = [route.model_name for route in service.tiers["fast"]]
+    # Repli du niveau rapide : le grand modèle
+    assert fast[0] == "petit-modele" and "grand-modele" in fast
+
+    assert service.classify(PLANT, None) == ("none", "fast")
+    assert service.classify(PLANT, "Fièvre") == ("keyword", "fast")
+    # Mot-clé sans fait vérifié, plante sans faits, question libre : grand modèle
+    assert service.classify(PLANT, "toux") == ("keyword", "large")
+    assert service.classify(BARE_PLANT, None) == ("none", "large")
+    assert service.classify(PLANT, "Comment préparer une tisane contre la fièvre ?") == ("question", "large")
+
+
+def test_routage_sans_rag(make_service):
+    # Sans faits vérifiés dans le prompt, le petit modèle n'est jamais choisi
+    service = make_service(LLM_RAG="false", LLM_TIER_ROUTING="true")
+    assert "fast" in service.tiers
+    assert service.classify(PLANT, "Fièvre") == ("keyword", "large")
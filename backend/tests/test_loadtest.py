@@ -0,0 +1,77 @@
+"""
+Tests des outils du test de charge (mélange, percentiles, serveur LLM factice)
+"""
+
+import json
+
+import httpx
+import pytest
+
+from loadtest.run import make_images, parse_mix, percentile, summarize
+from loadtest.stub_llm import MEDICINAL_INFO, start_stub_llm
+
+
+def test_melange():
+    assert parse_mix("identify=6, feedback=2,feedback_query") == {
+        "identify": 6.0, "feedback": 2.0, "feedback_query": 1.0
+    }
+    with pytest.raises(ValueError):
+        parse_mix("identify=1,inconnu=2")
+
+
+def test_percentile_rang_le_plus_proche():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+def test_resume():
+    samples = [(0.010, True), (0.020, True), (0.030, False), (0.040, True)]
+    summary = summarize(samples, {"200": 3, "500": 1}, elapsed=2.0)
+    assert summary["requests"] == 4
+    assert summary["error_rate"] == 0.25
+    assert summary["rps"] == 2.0
+    assert (summary["p50_ms"], summary["p99_ms"], summary["max_ms"]) == (20.0, 40.0, 40.0)
+    assert summarize([], {}, 0)["error_rate"] == 0.0
+
+
+def test_images_reproductibles():
+    assert make_images(2, 64, 48, seed=1) == make_images(2, 64, 48, seed=1)
+    assert make_images(1, 64, 48, seed=1) != make_images(1, 64, 48, seed=2)
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    server = start_stub_llm(latency_ms=0)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def completion(url, **request):
+    response = httpx.post(f"{url}/openai/v1/chat/completions", json={
+        "model": "stub", "messages": [{"role": "user", "content": "x" * 400}], **request
+    })
+    return response
+
+
+def test_llm_factice_texte_libre(stub_url):
+    body = completion(stub_url).json()
+    assert json.loads(body["choices"][0]["message"]["content"]) == MEDICINAL_INFO
+    assert body["choices"][0]["finish_reason"] == "stop"
+    assert body["usage"]["prompt_tokens"] == 100
+
+
+def test_llm_factice_mode_json_et_troncature(stub_url):
+    content = completion(stub_url, response_format={"type": "json_object"}).json()["choices"][0]["message"]["content"]
+    assert "formatted_response" not in json.loads(content)
+
+    choice = completion(stub_url, max_tokens=10).json()["choices"][0]
+    assert choice["finish_reason"] == "length"
+    assert len(choice["message"]["content"]) == 40
+
+
+def test_llm_factice_chemin_inconnu(stub_url):
+    assert httpx.post(f"{stub_url}/autre", json={}).status_code == 404
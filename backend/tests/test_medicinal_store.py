@@ -0,0 +1,76 @@
+"""
+Tests des fiches médicinales pré-générées (empreintes, format, relecture)
+"""
+
+import json
+import os
+import threading
+
+from app.services.medicinal_store import STORE_FORMAT, MedicinalStore, prompt_fingerprint
+
+INFO = {"summary": "Antipaludique traditionnel"}
+
+
+def wait_reload(store: MedicinalStore):
+    """Attend la fin d'une relecture en arrière-plan"""
+    assert store._lock.acquire(timeout=5)
+    store._lock.release()
+
+
+def test_ecriture_puis_lecture(tmp_path):
+    path = str(tmp_path / "store.json")
+    writer = MedicinalStore(path, check_interval=0)
+    fingerprint = prompt_fingerprint("prompt de la plante 1")
+    writer.put("1", fingerprint, INFO, route="groq:modele")
+    writer.save()
+    assert not os.path.exists(path + ".tmp")
+
+    reader = MedicinalStore(path)
+    assert reader.version == 1
+    assert reader.get("1", fingerprint) == INFO
+    assert reader.is_fresh("1", fingerprint)
+    # Prompt modifié (plante éditée, autre mode de sortie) : fiche périmée
+    assert reader.get("1", prompt_fingerprint("autre prompt")) is None
+    assert not reader.is_fresh("2", fingerprint)
+
+
+def test_desactive_et_fichier_absent(tmp_path):
+    assert MedicinalStore("").get("1", "x") is None
+    store = MedicinalStore(str(tmp_path / "absent.json"))
+    assert store.entries == {} and not store.load()
+
+
+def test_format_inconnu(tmp_path):
+    path = tmp_path / "store.json"
+    path.write_text(json.dumps({"format": STORE_FORMAT + 1, "entries": {"1": {}}}), encoding="utf-8")
+    assert MedicinalStore(str(path)).entries == {}
+    path.write_text("{tronqué", encoding="utf-8")
+    assert MedicinalStore(str(path)).entries == {}
+
+
+def test_relecture_hors_de_l_appelant(tmp_path):
+    path = str(tmp_path / "store.json")
+    fingerprint = prompt_fingerprint("p")
+    reader = MedicinalStore(path, check_interval=0)
+    assert reader.get("1", fingerprint) is None
+    wait_reload(reader)
+
+    writer = MedicinalStore(path)
+    writer.put("1", fingerprint, INFO, route="groq:modele")
+    writer.save()
+    os.utime(path, ns=(1, 10**18))
+
+    loads = []
+    original_load = reader.load
+
+    def tracked_load():
+        loads.append(threading.current_thread().name)
+        return original_load()
+
+    reader.load = tracked_load
+    # La relecture est lancée en arrière-plan : l'appel courant n'attend pas
+    reader.get("1", fingerprint)
+    wait_reload(reader)
+    assert loads == ["medicinal-store-reload"]
+    assert reader.get("1", fingerprint) == INFO
+    wait_reload(reader)
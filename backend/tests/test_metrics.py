@@ -0,0 +1,82 @@
+"""
+Tests des métriques au format texte Prometheus
+"""
+
+import pytest
+
+from app.services import metrics
+from app.services.metrics import Registry
+
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+
+def lines(registry):
+    return registry.render().decode().splitlines()
+
+
+def test_compteur_et_etiquettes(registry):
+    counter = registry.counter("test_requests_total", "Requêtes", ["route", "status"])
+    counter.inc(route="/api/identify", status="200")
+    counter.inc(2, route="/api/identify", status="200")
+    counter.inc(route='/chemin "bizarre"\n', status="500")
+
+    assert lines(registry) == [
+        "# HELP test_requests_total Requêtes",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{route="/api/identify",status="200"} 3',
+        'test_requests_total{route="/chemin \\"bizarre\\"\\n",status="500"} 1',
+    ]
+    assert counter.value(route="/api/identify", status="200") == 3
+
+
+def test_histogramme_cumulatif(registry):
+    histogram = registry.histogram("test_seconds", "Durée", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, stage="predict")
+
+    assert lines(registry)[2:] == [
+        'test_seconds_bucket{stage="predict",le="0.1"} 1',
+        'test_seconds_bucket{stage="predict",le="1"} 3',
+        'test_seconds_bucket{stage="predict",le="+Inf"} 4',
+        'test_seconds_sum{stage="predict"} 4.05',
+        'test_seconds_count{stage="predict"} 4',
+    ]
+    assert histogram.count(stage="predict") == 4
+
+
+def test_jauge_fonction_et_valeurs_non_finies(registry):
+    gauge = registry.gauge("test_gauge", "Jauge", ["queue"])
+    gauge.set(float("inf"), queue="a")
+    gauge.set(float("-inf"), queue="b")
+    gauge.set(float("nan"), queue="c")
+    gauge.set_function(lambda: 7, queue="d")
+    gauge.set_function(lambda: 1 / 0, queue="e")
+
+    assert lines(registry)[2:] == [
+        'test_gauge{queue="a"} +Inf',
+        'test_gauge{queue="b"} -Inf',
+        'test_gauge{queue="c"} NaN',
+        'test_gauge{queue="d"} 7',
+    ]
+
+
+def test_nom_unique(registry):
+    registry.counter("test_total", "Compteur")
+    with pytest.raises(ValueError):
+        registry.gauge("test_total", "Autre")
+
+
+def test_etape_mesuree_meme_en_erreur():
+    before = metrics.STAGE_SECONDS.count(stage="test_stage")
+    errors = metrics.STAGE_ERRORS.value(stage="test_stage")
+    with metrics.stage("test_stage"):
+        pass
+    with pytest.raises(RuntimeError):
+        with metrics.stage("test_stage"):
+            raise RuntimeError("échec")
+
+    assert metrics.STAGE_SECONDS.count(stage="test_stage") == before + 2
+    assert metrics.STAGE_ERRORS.value(stage="test_stage") == errors + 1
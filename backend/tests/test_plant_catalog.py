@@ -0,0 +1,108 @@
+"""
+Tests du cache du catalogue Django (chargement en bloc, plantes actives,
+rafraîchissement sur changement de version)
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+from app.services.plant_catalog import PlantCatalog
+from app.services.vision_service import VisionService
+
+SCHEMA = """
+CREATE TABLE plants_plant (
+    id INTEGER PRIMARY KEY, plant_id TEXT, scientific_name TEXT, common_name_fr TEXT,
+    common_names_local TEXT, family TEXT, genus TEXT, species TEXT, description TEXT,
+    plant_type TEXT, parts_used TEXT, regions TEXT, images TEXT, is_active INTEGER
+);
+CREATE TABLE plants_medicinalproperty (
+    id INTEGER PRIMARY KEY, plant_id INTEGER, property_type TEXT, description TEXT, evidence_level TEXT
+);
+CREATE TABLE plants_traditionaluse (
+    id INTEGER PRIMARY KEY, plant_id INTEGER, indication TEXT, preparation TEXT, recipe TEXT, region TEXT
+);
+CREATE TABLE plants_catalogversion (id INTEGER PRIMARY KEY, version INTEGER);
+INSERT INTO plants_catalogversion VALUES (1, 1);
+"""
+
+
+def add_plant(conn, pk, plant_id, active=True):
+    conn.execute(
+        "INSERT INTO plants_plant VALUES (?, ?, ?, ?, ?, 'Moringaceae', 'Moringa', 'oleifera', "
+        "'Arbre', 'arbre', ?, ?, 'pas du json', ?)",
+        (pk, plant_id, plant_id.replace("_", " ").capitalize(), "Nom", json.dumps(["Local"]),
+         json.dumps(["feuilles"]), json.dumps(["Sud"]), int(active))
+    )
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "db.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    add_plant(conn, 1, "moringa_oleifera")
+    add_plant(conn, 2, "carica_papaya", active=False)
+    conn.execute("INSERT INTO plants_medicinalproperty VALUES (1, 1, 'antioxydant', 'Riche en vitamines', 'clinique')")
+    conn.execute("INSERT INTO plants_traditionaluse VALUES (1, 1, 'fièvre', 'décoction', '', 'Nord')")
+    conn.execute("INSERT INTO plants_traditionaluse VALUES (2, 2, 'paludisme', 'infusion', '', '')")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_chargement_des_plantes_actives(db_path):
+    catalog = PlantCatalog(db_path)
+    assert catalog.load()
+    assert catalog.version == 1
+    assert list(catalog.plants) == ["moringa_oleifera"]
+
+    plant = catalog.get("moringa_oleifera")
+    assert plant["common_names"] == {"fr": "Nom", "local": ["Local"]}
+    assert plant["parts_used"] == ["feuilles"]
+    assert plant["images"] == []
+    assert plant["medicinal_properties"] == [
+        {"type": "antioxydant", "description": "Riche en vitamines", "evidence_level": "clinique"}
+    ]
+    assert plant["traditional_uses"] == [
+        {"preparation": "décoction", "indication": "fièvre", "recipe": None, "region": "Nord"}
+    ]
+
+
+def test_rafraichi_quand_la_version_change(db_path):
+    catalog = PlantCatalog(db_path)
+    catalog.load()
+    assert not catalog.refresh()
+
+    conn = sqlite3.connect(db_path)
+    add_plant(conn, 3, "azadirachta_indica")
+    conn.execute("UPDATE plants_catalogversion SET version = 2")
+    conn.commit()
+    conn.close()
+
+    assert catalog.refresh()
+    assert catalog.version == 2
+    assert set(catalog.plants) == {"moringa_oleifera", "azadirachta_indica"}
+
+
+def test_base_absente(tmp_path):
+    catalog = PlantCatalog(str(tmp_path / "absente.sqlite3"))
+    assert not catalog.enabled
+    assert not catalog.load()
+    assert catalog.get("moringa_oleifera") is None
+
+
+def test_plante_desactivee_non_servie_depuis_le_json(db_path):
+    service = VisionService(defer_model_load=True)
+    service.plant_database = {
+        "moringa_oleifera": {"id": "moringa_oleifera", "source": "json"},
+        "carica_papaya": {"id": "carica_papaya", "source": "json"},
+    }
+    # Catalogue non chargé : base JSON
+    service.catalog = PlantCatalog(db_path)
+    assert service.lookup_plant("carica_papaya")["source"] == "json"
+
+    service.catalog.load()
+    assert service.lookup_plant("moringa_oleifera")["scientific_name"] == "Moringa oleifera"
+    assert service.lookup_plant("carica_papaya") is None
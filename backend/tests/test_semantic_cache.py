@@ -0,0 +1,67 @@
+"""
+Tests du cache sémantique des questions médicinales
+"""
+
+import pytest
+
+from app.services.semantic_cache import SemanticCache, guards
+
+PLANT_ID = "moringa_oleifera"
+CONTEXT = "fiche-v1"
+INFO = {"summary": "Réponse en cache"}
+
+
+def cache_with(query: str) -> SemanticCache:
+    cache = SemanticCache(enabled=True)
+    cache.put(PLANT_ID, CONTEXT, query, INFO)
+    return cache
+
+
+@pytest.mark.parametrize("cached, query", [
+    ("fièvre", "FIEVRES"),
+    ("fièvre", "Fièvre ?"),
+    ("fievre", "fièvres"),
+    ("Peut-on en donner aux enfants ?", "peut-on en donner à un enfant"),
+    ("Dose pour la toux", "dose contre la toux ?"),
+])
+def test_variantes_servies(cached, query):
+    assert cache_with(cached).get(PLANT_ID, CONTEXT, query) is INFO
+
+
+@pytest.mark.parametrize("cached, query", [
+    # Négation
+    ("Peut-on en donner aux enfants ?", "Ne pas en donner aux enfants ?"),
+    ("En donner aux enfants", "N'en donnez jamais aux enfants"),
+    ("Tisane pour dormir", "Tisane sans dormir"),
+    # Public à risque
+    ("Peut-on en boire ?", "Peut-on en boire enceinte ?"),
+    ("Peut-on en boire enceinte ?", "Peut-on en boire en allaitement ?"),
+    ("Dose pour la toux", "Dose pour la toux du bébé"),
+    # Précision ajoutée
+    ("fièvre", "fièvre chez l'enfant"),
+    ("diabète", "diabète de type 2"),
+])
+def test_questions_differentes_non_servies(cached, query):
+    assert cache_with(cached).get(PLANT_ID, CONTEXT, query) is None
+
+
+def test_mots_de_garde_normalises():
+    assert guards("Ne pas en donner aux BÉBÉS") == guards("ne pas en donner au bébé")
+    assert guards("Peut-on en donner aux enfants ?") == {"enfant"}
+    assert guards("fièvre") == frozenset()
+
+
+def test_plante_modifiee_oubliee():
+    cache = cache_with("fièvre")
+    assert cache.get(PLANT_ID, "fiche-v2", "fièvre") is None
+    assert cache.get(PLANT_ID, CONTEXT, "fièvre") is None
+
+
+def test_autre_plante_non_servie():
+    assert cache_with("fièvre").get("carica_papaya", CONTEXT, "fièvre") is None
+
+
+def test_desactive():
+    cache = SemanticCache(enabled=False)
+    cache.put(PLANT_ID, CONTEXT, "fièvre", INFO)
+    assert cache.get(PLANT_ID, CONTEXT, "fièvre") is None
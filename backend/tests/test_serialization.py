@@ -0,0 +1,82 @@
+"""
+Tests de l'assemblage des réponses d'identification à partir de fragments
+pré-sérialisés
+"""
+
+import json
+
+from app.models.schemas import FusedIdentificationResponse, IdentificationResponse
+from app.services.serialization import FastJSONResponse, IdentificationSerializer, dumps
+
+
+def plant(plant_id: str, **fields):
+    return {
+        "id": plant_id,
+        "scientific_name": plant_id.replace("_", " ").capitalize(),
+        "common_names": {"fr": "Nom", "local": ["Nom local"]},
+        "family": "Famille",
+        "genus": "Genre",
+        "species": "espèce",
+        "description": "Description accentuée : « ok »",
+        "plant_type": "arbre",
+        "parts_used": ["feuilles"],
+        **fields,
+    }
+
+
+MEDICINAL_INFO = {
+    "summary": "Résumé",
+    "properties": [{"type": "antioxydant", "description": "…", "evidence_level": "clinique"}],
+    "traditional_uses": [{"preparation": "décoction", "indication": "fièvre"}],
+    "diseases_treated": ["fièvre"],
+    "preparation_methods": ["décoction"],
+    "precautions": [],
+    "warnings": [],
+    "formatted_response": "Texte",
+}
+
+
+def test_identique_a_pydantic():
+    result = {
+        "plant": plant("moringa_oleifera", region=["Sud"]),
+        "confidence": 87.5,
+        "alternatives": [{"plant": plant("carica_papaya"), "confidence": 8.25}],
+        "medicinal_info": MEDICINAL_INFO,
+        "user_intent": "medecine",
+    }
+    body = IdentificationSerializer().render(result, catalog_version=1)
+    assert json.loads(body) == json.loads(IdentificationResponse(**result).model_dump_json())
+
+
+def test_sans_alternatives_ni_infos():
+    result = {"plant": plant("moringa_oleifera"), "confidence": 50.0, "alternatives": []}
+    body = json.loads(IdentificationSerializer().render(result))
+    assert body["alternatives"] is None
+    assert body["medicinal_info"] is None
+    assert body["user_intent"] is None
+
+
+def test_champs_supplementaires():
+    result = {"plant": plant("moringa_oleifera"), "confidence": 50.0}
+    body = IdentificationSerializer().render(result, extra={"image_count": 3, "used_image_count": 2})
+    assert FusedIdentificationResponse.model_validate_json(body).used_image_count == 2
+
+
+def test_confiance_bornee():
+    result = {"plant": plant("moringa_oleifera"), "confidence": 100.00001}
+    assert json.loads(IdentificationSerializer().render(result))["confidence"] == 100.0
+
+
+def test_fragment_invalide_au_changement_de_version():
+    serializer = IdentificationSerializer()
+    first = serializer.plant_fragment(plant("moringa_oleifera"), catalog_version=1)
+    # Même version : fragment réutilisé même si la fiche a changé
+    assert serializer.plant_fragment(plant("moringa_oleifera", description="Nouvelle"), 1) is first
+    updated = serializer.plant_fragment(plant("moringa_oleifera", description="Nouvelle"), 2)
+    assert json.loads(updated)["description"] == "Nouvelle"
+
+
+def test_reponse_deja_serialisee():
+    assert FastJSONResponse(b'{"a":1}').body == b'{"a":1}'
+    assert json.loads(FastJSONResponse({"é": [1, 2]}).body) == {"é": [1, 2]}
+    assert json.loads(dumps({"texte": "é"})) == {"texte": "é"}
@@ -0,0 +1,59 @@
+"""
+Tests du mode feedback seul (API_ROUTERS=feedback, sans TensorFlow)
+
+L'application est configurée à l'import : chaque cas tourne dans un
+interpréteur séparé.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from conftest import BACKEND_DIR
+
+SCRIPT = """
+import json, sys
+from fastapi.testclient import TestClient
+from app.main import app
+with TestClient(app) as client:
+    ready = client.get("/api/health/ready")
+    result = {
+        "tensorflow": "tensorflow" in sys.modules,
+        "ready": [ready.status_code, ready.json()["status"]],
+        "identify": client.post("/api/identify").status_code,
+        "feedback_stats": client.get("/api/feedback/stats").status_code,
+    }
+print(json.dumps(result))
+"""
+
+
+def run_app(tmp_path, **env) -> subprocess.CompletedProcess:
+    environment = {
+        **os.environ,
+        "PYTHONPATH": BACKEND_DIR,
+        "FEEDBACK_STORAGE_PATH": str(tmp_path / "feedbacks"),
+        **env,
+    }
+    return subprocess.run(
+        [sys.executable, "-c", SCRIPT], cwd=BACKEND_DIR, env=environment,
+        capture_output=True, text=True, timeout=120
+    )
+
+
+def test_mode_feedback_sans_tensorflow(tmp_path):
+    process = run_app(tmp_path, API_ROUTERS="feedback")
+    assert process.returncode == 0, process.stderr
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    assert result == {
+        "tensorflow": False,
+        "ready": [200, "ready"],
+        "identify": 404,
+        "feedback_stats": 200,
+    }
+
+
+def test_routeur_inconnu(tmp_path):
+    process = run_app(tmp_path, API_ROUTERS="feedback,inconnu")
+    assert process.returncode != 0
+    assert "routeur(s) inconnu(s) inconnu" in process.stderr
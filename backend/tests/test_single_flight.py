@@ -0,0 +1,90 @@
+"""
+Tests du regroupement des appels concurrents (single-flight)
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+class Counter:
+    def __init__(self, delay: float = 0.05, error: Exception = None):
+        self.calls = 0
+        self.delay = delay
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {"appel": self.calls}
+
+
+def test_appels_concurrents_regroupes():
+    async def scenario():
+        flight = SingleFlight("test")
+        work = Counter()
+        results = await asyncio.gather(*(flight.do("cle", work) for _ in range(5)))
+        other = await flight.do("autre", work)
+        return flight, work, results, other
+
+    flight, work, results, other = asyncio.run(scenario())
+    assert work.calls == 2
+    assert all(result is results[0] for result in results)
+    assert other == {"appel": 2}
+    # Pas un cache : rien n'est gardé après la fin
+    assert flight.in_flight == 0
+
+
+def test_appels_successifs_non_regroupes():
+    async def scenario():
+        flight = SingleFlight("test")
+        work = Counter(delay=0)
+        await flight.do("cle", work)
+        await flight.do("cle", work)
+        return work.calls
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_exception_partagee():
+    async def scenario():
+        flight = SingleFlight("test")
+        work = Counter(error=ValueError("échec"))
+        results = await asyncio.gather(*(flight.do("cle", work) for _ in range(3)), return_exceptions=True)
+        return work.calls, results
+
+    calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_annulation_d_un_appelant():
+    async def scenario():
+        flight = SingleFlight("test")
+        work = Counter(delay=0.1)
+        first = asyncio.ensure_future(flight.do("cle", work))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flight.do("cle", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return work.calls, await second
+
+    calls, result = asyncio.run(scenario())
+    assert calls == 1
+    assert result == {"appel": 1}
+
+
+def test_desactive():
+    async def scenario():
+        flight = SingleFlight("test", enabled=False)
+        work = Counter()
+        await asyncio.gather(*(flight.do("cle", work) for _ in range(3)))
+        return work.calls
+
+    assert asyncio.run(scenario()) == 3
@@ -0,0 +1,105 @@
+"""
+Tests de la capture des requêtes lentes (trace par requête, tampon circulaire)
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.services import metrics, slow_requests
+from app.services.slow_requests import RequestTrace, SlowRequestMiddleware, SlowRequestRecorder
+
+
+def make_trace(path: str = "/api/identify") -> RequestTrace:
+    trace = RequestTrace("POST", path)
+    trace.add_stage("decode", 0.010)
+    trace.add_stage("decode", 0.005)
+    trace.add_stage("predict", 0.100)
+    return trace
+
+
+def test_sous_le_seuil_ignoree():
+    recorder = SlowRequestRecorder(threshold_ms=500, capacity=10)
+    assert not recorder.record(make_trace(), 0.2, 200)
+    assert recorder.entries() == []
+
+
+def test_detail_par_etape(tmp_path):
+    log_path = tmp_path / "slow.jsonl"
+    recorder = SlowRequestRecorder(threshold_ms=100, capacity=10, log_path=str(log_path))
+    trace = make_trace()
+    trace.images.append(b"image")
+    trace.annotations["model_version"] = "v1"
+
+    assert recorder.record(trace, 0.25, 200)
+    entry = recorder.entries()[0]
+    assert entry["duration_ms"] == 250.0
+    assert entry["stages"] == {
+        "decode": {"duration_ms": 15.0, "calls": 2},
+        "predict": {"duration_ms": 100.0, "calls": 1},
+    }
+    assert entry["images"] == [{"hash": hashlib.sha256(b"image").hexdigest(), "size": 5}]
+    assert entry["model_version"] == "v1"
+    assert json.loads(log_path.read_text(encoding="utf-8")) == entry
+
+
+def test_tampon_circulaire():
+    recorder = SlowRequestRecorder(threshold_ms=0, capacity=3)
+    for i in range(5):
+        recorder.record(make_trace(f"/requete/{i}"), 1.0, 200)
+
+    assert [entry["path"] for entry in recorder.entries()] == ["/requete/4", "/requete/3", "/requete/2"]
+    assert [entry["path"] for entry in recorder.entries(limit=1)] == ["/requete/4"]
+    assert [json.loads(line)["path"] for line in recorder.to_jsonl().splitlines()] == [
+        "/requete/2", "/requete/3", "/requete/4"
+    ]
+    assert recorder.clear() == 3
+    assert recorder.entries() == []
+
+
+def test_annotations_hors_requete_ignorees():
+    assert slow_requests.current_trace() is None
+    slow_requests.annotate(model_version="v1")
+    slow_requests.add_tokens(10, 20)
+
+
+def decode():
+    with metrics.stage("decode"):
+        pass
+
+
+def test_middleware_trace_par_requete():
+    recorder = SlowRequestRecorder(threshold_ms=0, capacity=10)
+    app = FastAPI()
+
+    @app.get("/lent")
+    async def slow():
+        with metrics.stage("predict"):
+            time.sleep(0.01)
+        # Étape exécutée dans un thread : contexte propagé par to_thread
+        await asyncio.to_thread(decode)
+        slow_requests.annotate(llm_provider="groq")
+        slow_requests.add_tokens(100, 50)
+        slow_requests.add_tokens(None, 10)
+        return {}
+
+    @app.get("/metrics")
+    async def excluded():
+        return {}
+
+    app.add_middleware(SlowRequestMiddleware, recorder=recorder)
+    client = TestClient(app)
+    assert client.get("/lent").status_code == 200
+    assert client.get("/metrics").status_code == 200
+
+    (entry,) = recorder.entries()
+    assert entry["path"] == "/lent"
+    assert entry["status"] == 200
+    assert entry["stages"]["predict"]["duration_ms"] >= 10
+    assert entry["stages"]["decode"]["calls"] == 1
+    assert entry["llm_provider"] == "groq"
+    assert (entry["prompt_tokens"], entry["completion_tokens"]) == (100, 60)
@@ -0,0 +1,76 @@
+"""
+Tests de la sortie JSON structurée (schémas, parseur tolérant)
+"""
+
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from app.services.structured_output import (
+    TolerantJSONParser,
+    compact_schema,
+    parse_tolerant,
+    strict_json_schema,
+)
+
+
+class Property(BaseModel):
+    type: str
+    score: int
+
+
+class Sheet(BaseModel):
+    summary: str
+    properties: List[Property]
+    recipe: Optional[str] = None
+    plant_id: str = ""
+
+
+def test_schema_compact():
+    assert compact_schema(Sheet, exclude=["plant_id"]) == \
+        '{"summary":str,"properties":[{"type":str,"score":int}],"recipe":str?}'
+
+
+def test_schema_strict():
+    schema = strict_json_schema(Sheet, exclude=["plant_id"])
+    assert schema["required"] == ["summary", "properties", "recipe"]
+    assert schema["additionalProperties"] is False
+    item = schema["properties"]["properties"]["items"]
+    assert item["required"] == ["type", "score"] and "$ref" not in str(schema)
+    assert schema["properties"]["recipe"] == {"anyOf": [{"type": "string"}, {"type": "null"}]}
+
+
+def test_texte_autour_ignore():
+    text = 'Voici la fiche :\n```json\n{"summary": "Plante {utile}", "n": [1, 2]}\n```\nBonne lecture.'
+    assert parse_tolerant(text) == {"summary": "Plante {utile}", "n": [1, 2]}
+    assert parse_tolerant("aucun objet") is None
+
+
+def test_reparation_chaine_coupee():
+    assert parse_tolerant('{"summary": "Feuilles en déco') == {"summary": "Feuilles en déco"}
+    # Échappement incomplet retiré
+    assert parse_tolerant('{"summary": "caf\\u00') == {"summary": "caf"}
+    assert parse_tolerant('{"a": "x\\') == {"a": "x"}
+
+
+def test_reparation_valeurs_incompletes_retirees():
+    assert parse_tolerant('{"a": 1, "b": [{"c": "d"}, {"c": "e", "f": 12') == {"a": 1, "b": [{"c": "d"}, {"c": "e"}]}
+    assert parse_tolerant('{"a": 1, "b": tr') == {"a": 1}
+    assert parse_tolerant('{"a": 1, "cl') == {"a": 1}
+    assert parse_tolerant('{"a": 1, "b":') == {"a": 1}
+
+
+def test_flux_par_fragments():
+    text = '{"summary": "ok", "properties": [{"type": "antipaludique", "score": 3}]} fin'
+    parser = TolerantJSONParser()
+    for i in range(0, len(text), 3):
+        parser.feed(text[i:i + 3])
+    assert parser.complete
+    assert parser.result() == {"summary": "ok", "properties": [{"type": "antipaludique", "score": 3}]}
+    assert "".join(parser.buffer).endswith("}")
+
+    truncated = TolerantJSONParser()
+    truncated.feed(text[:text.index("score") + 8])
+    assert not truncated.complete
+    assert truncated.result() == {"summary": "ok", "properties": [{"type": "antipaludique"}]}
+    assert TolerantJSONParser().result() is None
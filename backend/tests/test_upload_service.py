@@ -0,0 +1,101 @@
+"""
+Tests de la validation des images envoyées et de la limite de taille des corps
+"""
+
+import io
+
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.services.upload_service import (
+    RequestSizeLimitMiddleware,
+    UploadRejected,
+    UploadService,
+    sniff_image_format,
+)
+
+LIMIT = 4096
+
+
+def image_bytes(image_format: str = "PNG", size=(32, 32)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (20, 120, 40)).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("image_format", ["PNG", "JPEG", "GIF", "BMP", "TIFF", "WEBP"])
+def test_format_reconnu(image_format):
+    assert sniff_image_format(image_bytes(image_format)[:12]) == image_format
+
+
+@pytest.mark.parametrize("header", [b"", b"%PDF-1.7\n", b"RIFF\x00\x00\x00\x00WAVE", b"<svg xmlns="])
+def test_format_inconnu(header):
+    assert sniff_image_format(header) is None
+
+
+def test_inspect_image():
+    info = UploadService(max_pixels=10_000).inspect_image(image_bytes(size=(64, 48)))
+    assert info == {"format": "PNG", "width": 64, "height": 48}
+
+
+def test_image_trop_grande():
+    with pytest.raises(UploadRejected) as excinfo:
+        UploadService(max_pixels=1_000).inspect_image(image_bytes(size=(64, 48)))
+    assert excinfo.value.status_code == 413
+
+
+def test_image_corrompue():
+    with pytest.raises(UploadRejected) as excinfo:
+        UploadService().inspect_image(b"\x89PNG\r\n\x1a\n" + b"\x00" * 64)
+    assert excinfo.value.status_code == 400
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    app.add_middleware(RequestSizeLimitMiddleware, limits={"/upload": LIMIT})
+    return TestClient(app)
+
+
+def multipart(payload: bytes) -> bytes:
+    return (
+        b"--limite\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.png\"\r\n"
+        b"Content-Type: image/png\r\n\r\n" + payload + b"\r\n--limite--\r\n"
+    )
+
+
+def chunked(body: bytes, size: int = 512):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+HEADERS = {"Content-Type": "multipart/form-data; boundary=limite"}
+
+
+def test_corps_sous_la_limite(client):
+    response = client.post("/upload", content=multipart(b"x" * 1000), headers=HEADERS)
+    assert response.status_code == 200
+    assert response.json() == {"size": 1000}
+
+
+def test_content_length_trop_grand(client):
+    response = client.post("/upload", content=multipart(b"x" * 2 * LIMIT), headers=HEADERS)
+    assert response.status_code == 413
+
+
+def test_corps_chunked_sous_la_limite(client):
+    response = client.post("/upload", content=chunked(multipart(b"x" * 1000)), headers=HEADERS)
+    assert response.status_code == 200
+
+
+def test_corps_chunked_trop_grand(client):
+    response = client.post("/upload", content=chunked(multipart(b"x" * 20 * LIMIT)), headers=HEADERS)
+    assert response.status_code == 413
+    assert "maximum 4096 octets" in response.json()["detail"]
@@ -0,0 +1,101 @@
+"""
+Tests de l'identification par lots et multi-vues du service de vision
+(modèle factice)
+"""
+
+import asyncio
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services.vision_service import VisionService
+
+CLASS_NAMES = ["moringa_oleifera", "carica_papaya", "azadirachta_indica"]
+
+
+class FakeModel:
+    """Tête softmax factice : la couleur dominante de l'image choisit la plante"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, batch, verbose=0):
+        self.batch_sizes.append(len(batch))
+        channels = batch.mean(axis=(1, 2)) + 1e-3
+        return channels / channels.sum(axis=1, keepdims=True)
+
+
+def image_bytes(color) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+RED, GREEN, BLUE = image_bytes((250, 10, 10)), image_bytes((10, 250, 10)), image_bytes((10, 10, 250))
+
+
+@pytest.fixture
+def vision_service():
+    service = VisionService(defer_model_load=True)
+    service.model = FakeModel()
+    service.class_names = CLASS_NAMES
+    yield service
+    service.inference_thread.shutdown()
+
+
+def test_lot_en_une_passe_aligne_sur_les_images(vision_service):
+    results = asyncio.run(vision_service.identify_batch([RED, b"pas une image", GREEN, BLUE], top_k=2))
+    assert vision_service.model.batch_sizes == [3]
+    assert results[1] is None
+    assert [result[0]["plant_id"] for i, result in enumerate(results) if i != 1] == CLASS_NAMES
+    assert all(len(result) == 2 for result in results if result is not None)
+
+
+def test_lot_sans_image_lisible(vision_service):
+    assert asyncio.run(vision_service.identify_batch([b"x", b"y"])) == [None, None]
+    assert vision_service.model.batch_sizes == []
+
+
+def test_lot_synchrone_des_travaux(vision_service):
+    results = vision_service.identify_batch_sync([BLUE, RED])
+    assert [result[0]["plant_id"] for result in results] == ["azadirachta_indica", "moringa_oleifera"]
+    assert vision_service.model.batch_sizes == [2]
+
+
+def test_fusion_moyenne_geometrique():
+    fused = VisionService.fuse_scores([
+        {"moringa_oleifera": 0.6, "carica_papaya": 0.4},
+        {"moringa_oleifera": 0.6, "carica_papaya": 0.4},
+    ])
+    assert fused == pytest.approx({"moringa_oleifera": 0.6, "carica_papaya": 0.4})
+    assert sum(fused.values()) == pytest.approx(1.0)
+
+
+def test_fusion_plausible_sur_toutes_les_vues():
+    # carica_papaya domine une vue mais est exclue par l'autre : la plante
+    # plausible sur les deux vues l'emporte
+    fused = VisionService.fuse_scores([
+        {"moringa_oleifera": 0.4, "carica_papaya": 0.6},
+        {"moringa_oleifera": 0.5, "carica_papaya": 0.0, "azadirachta_indica": 0.5},
+    ])
+    assert max(fused, key=fused.get) == "moringa_oleifera"
+    assert fused["carica_papaya"] < 0.01
+
+
+def test_fusion_vide():
+    assert VisionService.fuse_scores([]) == {}
+    assert VisionService.fuse_scores([{}, {}]) == {}
+
+
+def test_multi_vues_en_une_passe(vision_service):
+    results, used = asyncio.run(vision_service.identify_fused([GREEN, b"pas une image", GREEN, RED], top_k=2))
+    assert used == 3
+    assert vision_service.model.batch_sizes == [3]
+    assert results[0]["plant_id"] == "carica_papaya"
+    assert len(results) == 2
+
+
+def test_multi_vues_sans_image_lisible(vision_service):
+    assert asyncio.run(vision_service.identify_fused([b"x"])) == ([], 0)
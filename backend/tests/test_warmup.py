@@ -0,0 +1,75 @@
+"""
+Tests du préchauffage au démarrage (étapes, échec, état exposé aux sondes)
+"""
+
+import pytest
+
+from app.services.vision_service import VisionService
+from app.services.warmup import StartupWarmup, parse_batch_sizes
+
+
+class FakeModel:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, batch, verbose=0):
+        self.batch_sizes.append(len(batch))
+        return batch.mean(axis=(1, 2)) + 1e-3
+
+
+class FakeSerializer:
+    def __init__(self):
+        self.plants = []
+
+    def plant_fragment(self, plant, catalog_version=None):
+        self.plants.append(plant.get("id"))
+        return b"{}"
+
+
+@pytest.fixture
+def vision_service():
+    service = VisionService(defer_model_load=True)
+    service.defer_model_load = False
+    service.model = FakeModel()
+    service.class_names = ["a", "b", "c"]
+    service.plant_database = {"a": {"id": "a"}, "b": {"id": "b"}}
+    yield service
+    service.inference_thread.shutdown()
+
+
+def test_tailles_de_batch():
+    assert parse_batch_sizes("8, 1,32,8,0,") == [1, 8, 32]
+
+
+def test_prechauffage_complet(vision_service):
+    serializer = FakeSerializer()
+    warmup = StartupWarmup(vision_service, serializer, batch_sizes=[1, 4], enabled=True)
+    assert not warmup.ready and warmup.snapshot()["status"] == "pending"
+    warmup.run()
+
+    assert warmup.ready
+    assert vision_service.model.batch_sizes == [1, 4]
+    # Plantes du modèle absentes du catalogue ignorées
+    assert serializer.plants == ["a", "b"]
+    snapshot = warmup.snapshot()
+    assert set(snapshot["steps"]) == {"model", "decode", "predict", "plant_fragments"}
+    assert snapshot["error"] is None
+
+
+def test_prechauffage_desactive(vision_service):
+    warmup = StartupWarmup(vision_service, batch_sizes=[1], enabled=False)
+    warmup.run()
+    # Le modèle est chargé quand même : seul le préchauffage est sauté
+    assert warmup.ready and list(warmup.steps) == ["model"]
+    assert vision_service.model.batch_sizes == []
+
+
+def test_echec_laisse_le_worker_non_pret(vision_service):
+    def broken():
+        raise OSError("modèle illisible")
+
+    vision_service.ensure_model = broken
+    warmup = StartupWarmup(vision_service, batch_sizes=[1], enabled=True)
+    warmup.run()
+    assert warmup.status == StartupWarmup.FAILED and not warmup.ready
+    assert warmup.snapshot()["error"] == "OSError: modèle illisible"